@@ -59,6 +59,15 @@ public:
    * Logo Perception Data - Contains what a turtle perceives.
    */
   class LogoPerceivedData : public mk::agents::IPerceivedData {
+  public:
+    // Nearby turtles. Python sees strided views over this storage.
+    struct NearbyTurtle {
+      tools::Point2D position;
+      double heading;
+      double distance;
+      mk::AgentCategory category;
+    };
+
   private:
     mk::LevelIdentifier level;
     mk::SimulationTimeStamp timeLower, timeUpper;
@@ -68,13 +77,6 @@ public:
     double heading;
     double speed;
 
-    // Nearby turtles
-    struct NearbyTurtle {
-      tools::Point2D position;
-      double heading;
-      double distance;
-      mk::AgentCategory category;
-    };
     std::vector<NearbyTurtle> nearbyTurtles;
 
     // Pheromones at current location
@@ -139,11 +141,22 @@ public:
         std::function<void(std::shared_ptr<LogoPerceivedData>,
                            std::shared_ptr<mk::influences::InfluencesMap>)>;
 
+    // Callback shared by many agents, told which agent is deciding
+    using IndexedDecisionCallback =
+        std::function<void(int, std::shared_ptr<LogoPerceivedData>,
+                           std::shared_ptr<mk::influences::InfluencesMap>)>;
+
     DecisionCallback callback;
+    IndexedDecisionCallback indexedCallback;
+    int agentIndex = -1;
 
     PythonDecisionModel(const mk::LevelIdentifier &level, DecisionCallback cb)
         : level(level), callback(cb) {}
 
+    PythonDecisionModel(const mk::LevelIdentifier &level, int agentIndex,
+                        IndexedDecisionCallback cb)
+        : level(level), indexedCallback(cb), agentIndex(agentIndex) {}
+
     mk::LevelIdentifier getLevel() const override { return level; }
 
     void
@@ -158,7 +171,12 @@ public:
       // Cast to LogoPerceivedData
       auto logoPerception =
           std::dynamic_pointer_cast<LogoPerceivedData>(perceivedData);
-      if (logoPerception && callback) {
+      if (!logoPerception) {
+        return;
+      }
+      if (indexedCallback) {
+        indexedCallback(agentIndex, logoPerception, producedInfluences);
+      } else if (callback) {
         callback(logoPerception, producedInfluences);
       }
     }
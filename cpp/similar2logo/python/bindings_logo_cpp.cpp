@@ -1,4 +1,5 @@
 #include <pybind11/functional.h>
+#include <pybind11/numpy.h>
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
 
@@ -118,6 +119,42 @@ PYBIND11_MODULE(_core, m) {
       .def("get_nearby_turtles",
            &::fr::univ_artois::lgi2a::similar::similar2logo::kernel::agents::
                LogoAgent::LogoPerceivedData::getNearbyTurtles)
+      // Zero-copy read-only views (positions (k, 2), headings (k,),
+      // distances (k,)) over the nearby turtles of the perception. The
+      // arrays keep the perception alive through their base object.
+      .def("get_nearby_arrays",
+           [](py::object self) -> py::tuple {
+             using NearbyTurtle = ::fr::univ_artois::lgi2a::similar::
+                 similar2logo::kernel::agents::LogoAgent::LogoPerceivedData::
+                     NearbyTurtle;
+             const auto &perception = self.cast<
+                 const ::fr::univ_artois::lgi2a::similar::similar2logo::
+                     kernel::agents::LogoAgent::LogoPerceivedData &>();
+             const auto &nearby = perception.getNearbyTurtles();
+             const py::ssize_t count =
+                 static_cast<py::ssize_t>(nearby.size());
+             const py::ssize_t stride = sizeof(NearbyTurtle);
+
+             if (count == 0) {
+               return py::make_tuple(py::array_t<double>(
+                                         std::vector<py::ssize_t>{0, 2}),
+                                     py::array_t<double>(0),
+                                     py::array_t<double>(0));
+             }
+
+             const NearbyTurtle *first = nearby.data();
+             py::array_t<double> positions({count, py::ssize_t(2)},
+                                           {stride, py::ssize_t(sizeof(double))},
+                                           &first->position.x, self);
+             py::array_t<double> headings({count}, {stride}, &first->heading,
+                                          self);
+             py::array_t<double> distances({count}, {stride},
+                                           &first->distance, self);
+             for (auto *array : {&positions, &headings, &distances}) {
+               array->attr("setflags")(py::arg("write") = false);
+             }
+             return py::make_tuple(positions, headings, distances);
+           })
       .def("get_pheromone",
            &::fr::univ_artois::lgi2a::similar::similar2logo::kernel::agents::
                LogoAgent::LogoPerceivedData::getPheromone)
@@ -144,7 +181,12 @@ PYBIND11_MODULE(_core, m) {
                const mk::LevelIdentifier &,
                ::fr::univ_artois::lgi2a::similar::similar2logo::kernel::agents::
                    LogoAgent::PythonDecisionModel::DecisionCallback>(),
-           py::arg("level"), py::arg("callback"));
+           py::arg("level"), py::arg("callback"))
+      .def(py::init<const mk::LevelIdentifier &, int,
+                    ::fr::univ_artois::lgi2a::similar::similar2logo::kernel::
+                        agents::LogoAgent::PythonDecisionModel::
+                            IndexedDecisionCallback>(),
+           py::arg("level"), py::arg("agent_index"), py::arg("callback"));
 
   // ========== ISimulationModel (Microkernel) ==========
   py::class_<mk::ISimulationModel, std::shared_ptr<mk::ISimulationModel>>(
@@ -175,10 +217,14 @@ PYBIND11_MODULE(_core, m) {
              std::shared_ptr<mk::engine::MultiThreadedSimulationEngine>>(
       m, "MultiThreadedEngine")
       .def(py::init<size_t>(), py::arg("num_threads") = 0)
+      // The GIL is released while the engine runs so that its worker
+      // threads can acquire it to call Python decision callbacks
       .def("run_new_simulation",
-           &mk::engine::MultiThreadedSimulationEngine::runNewSimulation)
+           &mk::engine::MultiThreadedSimulationEngine::runNewSimulation,
+           py::call_guard<py::gil_scoped_release>())
       .def("run_simulation",
-           &mk::engine::MultiThreadedSimulationEngine::runSimulation)
+           &mk::engine::MultiThreadedSimulationEngine::runSimulation,
+           py::call_guard<py::gil_scoped_release>())
       .def("clone", &mk::engine::MultiThreadedSimulationEngine::clone);
 
   // ========== Environment (New) ==========
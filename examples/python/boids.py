@@ -40,14 +40,15 @@ class Boid(SimpleTurtle):
 
         # Gather nearby boids within the configured radius
         neighbors = self.nearby_turtles(perception, radius=self.params.neighbor_radius)
-        influences = []
-        if neighbors:
-            # Alignment: turn towards average heading of neighbors
-            influences += self.align_with(neighbors, weight=self.params.alignment_weight)
-            # Cohesion: move towards center of mass of neighbors
-            influences += self.cohere_with(neighbors, weight=self.params.cohesion_weight)
-            # Separation: avoid crowding neighbors
-            influences += self.separate_from(neighbors, min_distance=self.params.neighbor_radius/2, weight=self.params.separation_weight)
+        # Alignment, cohesion and separation fused into a single turn,
+        # computed in one pass over the neighbors
+        influences = self.boid_turn(
+            neighbors,
+            min_distance=self.params.neighbor_radius / 2,
+            w_align=self.params.alignment_weight,
+            w_sep=self.params.separation_weight,
+            w_coh=self.params.cohesion_weight,
+        )
         # Clamp speed to max_speed
         if self.speed > self.params.max_speed:
             influences.append(self.influence_change_speed(delta_speed=self.params.max_speed - self.speed))
@@ -14,7 +14,9 @@ import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'python'))
 
-from similar2logo.dsl import *
+from similar2logo import LogoSimulation, Turtle, Environment
+from similar2logo.probes import IProbe
+from similar2logo.web import WebSimulation
 import random
 
 # Simulation parameters
@@ -25,10 +27,13 @@ INFECTION_PROBABILITY = 0.05
 RECOVERY_TIME = 100  # steps
 INITIAL_INFECTED = 5
 
-# Agent states
-STATE_HEALTHY = "healthy"
-STATE_INFECTED = "infected"
-STATE_RECOVERED = "recovered"
+# Agent states, used as indices into COLORS
+STATE_HEALTHY = 0
+STATE_INFECTED = 1
+STATE_RECOVERED = 2
+
+# Display color of each state
+COLORS = ("green", "red", "blue")
 
 class VirusAgent(Turtle):
     """Agent that can be healthy, infected, or recovered."""
@@ -37,26 +42,22 @@ class VirusAgent(Turtle):
         super().__init__(**kwargs)
         self.state = STATE_HEALTHY
         self.infection_time = 0
-        self.update_color()
     
-    def update_color(self):
-        """Update color based on state."""
-        if self.state == STATE_HEALTHY:
-            self.color = "green"
-        elif self.state == STATE_INFECTED:
-            self.color = "red"
-        else:  # recovered
-            self.color = "blue"
+    @property
+    def color(self):
+        """Color derived from the state, no per-agent string stored."""
+        return COLORS[self.state]
     
     def infect(self):
-        """Infect this agent."""
-        if self.state == STATE_HEALTHY:
-            self.state = STATE_INFECTED
-            self.infection_time = 0
-            self.update_color()
+        """Infect this agent, returning whether it was healthy."""
+        if self.state != STATE_HEALTHY:
+            return False
+        self.state = STATE_INFECTED
+        self.infection_time = 0
+        return True
     
     def decide(self, perception):
-        """Agent behavior: random walk and potential infection/recovery."""
+        """Agent behavior: random walk (infection is handled by InfectionProbe)."""
         influences = []
         
         # Random walk
@@ -64,26 +65,62 @@ class VirusAgent(Turtle):
             influences.append(self.influence_turn(random.uniform(-0.5, 0.5)))
         influences.append(self.influence_move_forward(1.0))
         
-        # Handle infection state
-        if self.state == STATE_INFECTED:
-            self.infection_time += 1
+        return influences
+
+
+class InfectionProbe(IProbe):
+    """
+    Spread the virus once per step, visiting only the infected agents.
+    
+    Healthy and recovered agents never enter the infection loop, and the
+    whole sub-step is skipped while nobody is infected. Each simulation
+    has its own probe, and so its own infected agents.
+    """
+    
+    def __init__(self):
+        # Agents currently infected, as an insertion-ordered set so that
+        # a seeded run visits them in the same order
+        self.infected = {}
+    
+    def infect(self, agent):
+        """Infect an agent and track it if it was healthy."""
+        if agent.infect():
+            self.infected[agent] = None
+    
+    def observe_at_initial_time(self, initial_time, simulation):
+        pass
+    
+    def observe_at_partial_consistent_time(self, current_time, simulation):
+        infected = self.infected
+        if not infected:
+            return
+        
+        newly_infected = []
+        recovered = []
+        for agent in infected:
+            agent.infection_time += 1
             
             # Try to infect nearby healthy agents
-            for neighbor_info in perception['nearby_turtles']:
-                neighbor = neighbor_info['turtle']
-                distance = neighbor_info['distance']
-                
-                if (distance < INFECTION_RADIUS and 
+            neighbors = simulation.spatial_index.query_radius(
+                agent.position.x, agent.position.y, INFECTION_RADIUS,
+                exclude=agent
+            )
+            for neighbor, distance in neighbors:
+                if (distance < INFECTION_RADIUS and
                     neighbor.state == STATE_HEALTHY and
                     random.random() < INFECTION_PROBABILITY):
-                    neighbor.infect()
+                    newly_infected.append(neighbor)
             
             # Recover after infection period
-            if self.infection_time >= RECOVERY_TIME:
-                self.state = STATE_RECOVERED
-                self.update_color()
+            if agent.infection_time >= RECOVERY_TIME:
+                recovered.append(agent)
         
-        return influences
+        # Apply state changes at the tick boundary
+        for agent in recovered:
+            agent.state = STATE_RECOVERED
+            del infected[agent]
+        for agent in newly_infected:
+            self.infect(agent)
 
 
 def create_virus_simulation():
@@ -91,24 +128,17 @@ def create_virus_simulation():
     
     # Create environment
     env = Environment(GRID_SIZE, GRID_SIZE, toroidal=True)
+    sim = LogoSimulation(env, turtle_class=VirusAgent, parallel_backend=None)
     
-    # Create simulation
-    sim = Simulation(
-        environment=env,
-        title="Virus Spread Simulation"
+    # Place the whole population in one call
+    agents = sim.add_agents_bulk(
+        env.random_positions(NUM_AGENTS), env.random_headings(NUM_AGENTS)
     )
+    infection = InfectionProbe()
+    for agent in agents[:INITIAL_INFECTED]:
+        infection.infect(agent)
     
-    # Add agents
-    for i in range(NUM_AGENTS):
-        agent = VirusAgent(
-            position=env.random_position(),
-            heading=env.random_heading()
-        )
-        # Infect initial agents
-        if i < INITIAL_INFECTED:
-            agent.infect()
-        sim.add_agent(agent)
-    
+    sim.probe_manager.add_probe("infection", infection)
     return sim
 
 
@@ -128,22 +158,12 @@ def main():
     
     sim = create_virus_simulation()
     
+    print("Green: healthy, Red: infected, Blue: recovered/immune")
+    print("Open your browser to: http://localhost:8080")
+    print()
+    
     # Run with web interface
-    sim.run_web(
-        port=8080,
-        steps_per_frame=1,
-        description="""
-        # Virus Spread Simulation
-        
-        Watch how a virus spreads through a population:
-        - **Green**: Healthy agents
-        - **Red**: Infected agents  
-        - **Blue**: Recovered/immune agents
-        
-        Infected agents can spread the virus to nearby healthy agents.
-        After a period, infected agents recover and become immune.
-        """
-    )
+    WebSimulation(sim, update_rate=30).start_server(port=8080)
 
 
 if __name__ == "__main__":
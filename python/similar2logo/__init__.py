@@ -11,14 +11,77 @@ except ImportError:
     HAS_CPP_CORE = False
     _core = None
 
-# Import Python modules (these work without C++ core)
-from .tools import Point2D, MathUtil
-from .environment import Pheromone, Environment
-from .influences import *
-from .reaction import LogoReactionModel
-from .model import Turtle, LogoSimulation
-from .probes import IProbe, RealTimeMatcherProbe, ProbeManager
-from . import fastmath
+# Python modules are imported lazily (PEP 562): importing the package only
+# probes the C++ core, and each subsystem is loaded on first access.
+_LAZY_ATTRIBUTES = {
+    "Point2D": "tools",
+    "MathUtil": "tools",
+    "Pheromone": "environment",
+    "Environment": "environment",
+    "LogoReactionModel": "reaction",
+    "Turtle": "model",
+    "LogoSimulation": "model",
+    "Perception": "model",
+    "IProbe": "probes",
+    "RealTimeMatcherProbe": "probes",
+    "ProbeManager": "probes",
+}
+_LAZY_ATTRIBUTES.update(dict.fromkeys((
+    "IInfluence",
+    "RegularInfluence",
+    "SystemInfluence",
+    "ChangePosition",
+    "ChangeDirection",
+    "ChangeSpeed",
+    "ChangeAcceleration",
+    "Stop",
+    "DropMark",
+    "RemoveMark",
+    "RemoveMarks",
+    "EmitPheromone",
+    "AgentPositionUpdate",
+    "PheromoneFieldUpdate",
+    "SystemInfluenceAddAgent",
+    "SystemInfluenceRemoveAgent",
+    "InfluencesMap",
+    "get_backend_info",
+), "influences"))
+
+_LAZY_SUBMODULES = (
+    "tools",
+    "spatial",
+    "fastmath",
+    "environment",
+    "influences",
+    "reaction",
+    "model",
+    "probes",
+    "parallel",
+    "cpp_engine",
+    "dsl",
+    "web",
+)
+
+
+def __getattr__(name):
+    from importlib import import_module
+
+    if name in _LAZY_ATTRIBUTES:
+        module = import_module("." + _LAZY_ATTRIBUTES[name], __name__)
+        value = getattr(module, name)
+    elif name in _LAZY_SUBMODULES:
+        value = import_module("." + name, __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    # Cache so later lookups skip __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES) | set(_LAZY_SUBMODULES))
+
 
 __all__ = [
     "Point2D",
@@ -27,6 +90,7 @@ __all__ = [
     "Environment",
     "Turtle",
     "LogoSimulation",
+    "Perception",
     "LogoReactionModel",
     "HAS_CPP_CORE",
     "fastmath",
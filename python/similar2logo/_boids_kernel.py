@@ -0,0 +1,357 @@
+"""
+Fused boids steering kernel.
+
+Computes the alignment, cohesion and separation turns of one boid in a
+single pass over its neighbours, instead of one pass per rule. The result
+is the weighted sum of the three turns returned by SimpleTurtle's
+align_with, cohere_with and separate_from helpers.
+
+boid_turns() computes the turns of a whole population at once, on the
+GPU when numba finds a CUDA device and on the CPU otherwise.
+"""
+
+import math
+
+import numpy as np
+
+from ._kernels import HAS_NUMBA, JIT_OPTIONS
+from .spatial import SpatialHashGrid
+
+if HAS_NUMBA:
+    from numba import njit, prange
+
+TWO_PI = 2 * math.pi
+
+# Below this norm a cohesion or separation vector gives no turn
+STEER_EPSILON = 0.01
+
+# Population size from which boid_turns() prefers the GPU. Below it the
+# transfers cost more than the grid-based CPU kernel.
+CUDA_MIN_AGENTS = 4096
+
+# Agents per CUDA block, and positions staged per shared-memory tile
+CUDA_TILE = 256
+
+
+def _wrap(angle):
+    """Wrap an angle to [-pi, pi)."""
+    return angle - TWO_PI * math.floor(angle / TWO_PI + 0.5)
+
+
+def _boid_turn_numpy(self_x, self_y, self_heading, nx, ny, nh,
+                     min_dist, w_align, w_sep, w_coh):
+    """NumPy version of boid_turn."""
+    count = len(nx)
+    if count == 0:
+        return 0.0
+
+    # Alignment: average neighbour heading
+    turn = w_align * _wrap(float(np.mean(nh)) - self_heading)
+
+    # Cohesion: centre of mass of the neighbours
+    dx = float(np.mean(nx)) - self_x
+    dy = float(np.mean(ny)) - self_y
+    if abs(dx) > STEER_EPSILON or abs(dy) > STEER_EPSILON:
+        desired = math.atan2(dy, dx) + math.pi / 2
+        turn += w_coh * _wrap(desired - self_heading)
+
+    # Separation: inverse-distance repulsion from close neighbours
+    rx = self_x - nx
+    ry = self_y - ny
+    dist = np.hypot(rx, ry)
+    close = (dist < min_dist) & (dist > 0)
+    if close.any():
+        factor = (min_dist - dist[close]) / dist[close]
+        rep_x = float(np.dot(rx[close], factor))
+        rep_y = float(np.dot(ry[close], factor))
+        if abs(rep_x) > STEER_EPSILON or abs(rep_y) > STEER_EPSILON:
+            desired = math.atan2(rep_y, rep_x) + math.pi / 2
+            turn += w_sep * _wrap(desired - self_heading)
+
+    return turn
+
+
+def _steer(count, sum_heading, sum_x, sum_y, rep_x, rep_y,
+           self_x, self_y, self_heading, w_align, w_sep, w_coh):
+    """Turn of one boid from its neighbour sums, see _boid_turn_numba."""
+    diff = sum_heading / count - self_heading
+    turn = w_align * (diff - TWO_PI * math.floor(diff / TWO_PI + 0.5))
+
+    dx = sum_x / count - self_x
+    dy = sum_y / count - self_y
+    if abs(dx) > STEER_EPSILON or abs(dy) > STEER_EPSILON:
+        diff = math.atan2(dy, dx) + math.pi / 2 - self_heading
+        turn += w_coh * (diff - TWO_PI * math.floor(diff / TWO_PI + 0.5))
+
+    if abs(rep_x) > STEER_EPSILON or abs(rep_y) > STEER_EPSILON:
+        diff = math.atan2(rep_y, rep_x) + math.pi / 2 - self_heading
+        turn += w_sep * (diff - TWO_PI * math.floor(diff / TWO_PI + 0.5))
+
+    return turn
+
+
+def _boid_turns_csr(xs, ys, headings, offsets, idx, min_dist,
+                    w_align, w_sep, w_coh, out):
+    """NumPy version of the CPU path of boid_turns."""
+    for i in range(xs.shape[0]):
+        rows = idx[offsets[i]:offsets[i + 1]]
+        out[i] = _boid_turn_numpy(xs[i], ys[i], headings[i], xs[rows],
+                                  ys[rows], headings[rows], min_dist,
+                                  w_align, w_sep, w_coh)
+
+
+if HAS_NUMBA:
+    _steer_numba = njit(**JIT_OPTIONS)(_steer)
+
+    @njit(**JIT_OPTIONS)
+    def _boid_turn_numba(self_x, self_y, self_heading, nx, ny, nh,
+                         min_dist, w_align, w_sep, w_coh):
+        """Compiled single-pass version of boid_turn."""
+        count = nx.shape[0]
+        if count == 0:
+            return 0.0
+
+        sum_heading = 0.0
+        sum_x = 0.0
+        sum_y = 0.0
+        rep_x = 0.0
+        rep_y = 0.0
+        for i in range(count):
+            sum_heading += nh[i]
+            sum_x += nx[i]
+            sum_y += ny[i]
+            dx = self_x - nx[i]
+            dy = self_y - ny[i]
+            dist = math.sqrt(dx * dx + dy * dy)
+            if dist < min_dist and dist > 0.0:
+                factor = (min_dist - dist) / dist
+                rep_x += dx * factor
+                rep_y += dy * factor
+
+        return _steer_numba(count, sum_heading, sum_x, sum_y, rep_x, rep_y,
+                            self_x, self_y, self_heading,
+                            w_align, w_sep, w_coh)
+
+    @njit(parallel=True, **JIT_OPTIONS)
+    def _boid_turns_csr_numba(xs, ys, headings, offsets, idx, min_dist,
+                              w_align, w_sep, w_coh, out):
+        """Compiled CPU path of boid_turns, one parallel task per boid."""
+        for i in prange(xs.shape[0]):
+            rows = idx[offsets[i]:offsets[i + 1]]
+            out[i] = _boid_turn_numba(xs[i], ys[i], headings[i], xs[rows],
+                                      ys[rows], headings[rows], min_dist,
+                                      w_align, w_sep, w_coh)
+
+
+# CUDA kernel of boid_turns(), built by _cuda_kernel() on first use:
+# probing for a device initialises the CUDA driver, which is slow
+_cuda = None
+
+
+def has_cuda():
+    """Whether boid_turns() can run on a CUDA device."""
+    return _cuda_kernel() is not None
+
+
+def _cuda_kernel():
+    """
+    Compile the CUDA kernel of boid_turns() the first time it is needed.
+
+    Returns:
+        tuple: (numba.cuda module, kernel), or None when numba finds no
+        CUDA device
+    """
+    global _cuda
+    if _cuda is None:
+        _cuda = _build_cuda_kernel()
+    return _cuda or None
+
+
+def _build_cuda_kernel():
+    """Build the CUDA kernel, or return False without a CUDA device."""
+    # A module global, as numba's CUDA simulator expects of the kernel
+    global cuda
+    if not HAS_NUMBA:
+        return False
+    try:
+        from numba import cuda
+        if not cuda.is_available():
+            return False
+    except Exception:
+        # Missing or broken CUDA driver
+        return False
+
+    _steer_cuda = cuda.jit(device=True)(_steer)
+
+    @cuda.jit
+    def _boid_turns_cuda(xs, ys, headings, radius_sq, min_dist, width,
+                         height, toroidal, w_align, w_sep, w_coh, out):
+        """
+        All-pairs boids turns, one thread per boid. Each block stages
+        CUDA_TILE positions at a time in shared memory, which all its
+        threads then compare against, as in an N-body kernel.
+        """
+        tile_x = cuda.shared.array(CUDA_TILE, np.float64)
+        tile_y = cuda.shared.array(CUDA_TILE, np.float64)
+        tile_h = cuda.shared.array(CUDA_TILE, np.float64)
+        n = xs.shape[0]
+        i = cuda.grid(1)
+        lane = cuda.threadIdx.x
+        active = i < n
+        self_x = xs[i] if active else 0.0
+        self_y = ys[i] if active else 0.0
+        half_width = width / 2
+        half_height = height / 2
+
+        count = 0
+        sum_heading = 0.0
+        sum_x = 0.0
+        sum_y = 0.0
+        rep_x = 0.0
+        rep_y = 0.0
+        for base in range(0, n, CUDA_TILE):
+            j = base + lane
+            if j < n:
+                tile_x[lane] = xs[j]
+                tile_y[lane] = ys[j]
+                tile_h[lane] = headings[j]
+            cuda.syncthreads()
+            if active:
+                for k in range(min(CUDA_TILE, n - base)):
+                    if base + k == i:
+                        continue
+                    # Perceived like SpatialHashGrid.neighbors()
+                    dx = self_x - tile_x[k]
+                    dy = self_y - tile_y[k]
+                    if toroidal:
+                        if dx > half_width:
+                            dx -= width
+                        elif dx < -half_width:
+                            dx += width
+                        if dy > half_height:
+                            dy -= height
+                        elif dy < -half_height:
+                            dy += height
+                    if dx * dx + dy * dy > radius_sq:
+                        continue
+                    # Steered like _boid_turn_numba, from raw positions
+                    count += 1
+                    sum_heading += tile_h[k]
+                    sum_x += tile_x[k]
+                    sum_y += tile_y[k]
+                    dx = self_x - tile_x[k]
+                    dy = self_y - tile_y[k]
+                    dist = math.sqrt(dx * dx + dy * dy)
+                    if dist < min_dist and dist > 0.0:
+                        factor = (min_dist - dist) / dist
+                        rep_x += dx * factor
+                        rep_y += dy * factor
+            cuda.syncthreads()
+
+        if active:
+            if count == 0:
+                out[i] = 0.0
+            else:
+                out[i] = _steer_cuda(count, sum_heading, sum_x, sum_y,
+                                     rep_x, rep_y, self_x, self_y,
+                                     headings[i], w_align, w_sep, w_coh)
+
+    return cuda, _boid_turns_cuda
+
+
+def boid_turn(self_x, self_y, self_heading, nx, ny, nh,
+              min_dist, w_align=1.0, w_sep=1.0, w_coh=1.0):
+    """
+    Combined boids turn for one agent.
+
+    Args:
+        self_x: Agent x position
+        self_y: Agent y position
+        self_heading: Agent heading in radians
+        nx: Neighbour x positions, float64 array
+        ny: Neighbour y positions, float64 array
+        nh: Neighbour headings, float64 array
+        min_dist: Separation distance
+        w_align: Alignment weight
+        w_sep: Separation weight
+        w_coh: Cohesion weight
+
+    Returns:
+        float: Heading change in radians
+    """
+    if HAS_NUMBA:
+        return _boid_turn_numba(self_x, self_y, self_heading, nx, ny, nh,
+                                min_dist, w_align, w_sep, w_coh)
+    return _boid_turn_numpy(self_x, self_y, self_heading, nx, ny, nh,
+                            min_dist, w_align, w_sep, w_coh)
+
+
+def boid_turns(xs, ys, headings, radius, min_dist, width, height,
+               toroidal=False, w_align=1.0, w_sep=1.0, w_coh=1.0,
+               backend='auto'):
+    """
+    Combined boids turn of every agent of a population, each flocking
+    with the agents within radius of it, as boid_turn() would.
+
+    Suited to a ``decide_kernel`` for LogoSimulation.step_vectorized().
+    On the CPU the neighbours are found with a SpatialHashGrid; on the
+    GPU every thread compares its boid with the whole population, which
+    outruns the grid once the population is large. Both give the same
+    turns up to the summation order.
+
+    Args:
+        xs, ys, headings: Agent positions and headings, float64 arrays
+        radius: Perception radius
+        min_dist: Separation distance
+        width, height: Size of the space
+        toroidal: Whether distances wrap around the edges
+        w_align, w_sep, w_coh: Rule weights
+        backend: 'cuda', 'cpu', or 'auto' to use the GPU from
+            CUDA_MIN_AGENTS agents on; 'cuda' falls back to the CPU when
+            no CUDA device is available
+
+    Returns:
+        numpy.ndarray: Heading change of each agent in radians
+    """
+    xs = np.ascontiguousarray(xs, dtype=np.float64)
+    ys = np.ascontiguousarray(ys, dtype=np.float64)
+    headings = np.ascontiguousarray(headings, dtype=np.float64)
+    n = xs.shape[0]
+    if backend == 'auto':
+        backend = 'cuda' if n >= CUDA_MIN_AGENTS else 'cpu'
+    compiled = _cuda_kernel() if backend == 'cuda' and n else None
+    if compiled is not None:
+        cuda, _boid_turns_cuda = compiled
+        out = cuda.device_array(n, dtype=np.float64)
+        blocks = (n + CUDA_TILE - 1) // CUDA_TILE
+        _boid_turns_cuda[blocks, CUDA_TILE](
+            cuda.to_device(xs), cuda.to_device(ys), cuda.to_device(headings),
+            float(radius * radius), float(min_dist), float(width),
+            float(height), bool(toroidal), float(w_align), float(w_sep),
+            float(w_coh), out
+        )
+        return out.copy_to_host()
+
+    grid = SpatialHashGrid(radius, width, height, toroidal=toroidal)
+    grid.rebuild_soa(xs, ys)
+    offsets, idx, _ = grid.neighbors(radius)
+    out = np.empty(n)
+    csr = _boid_turns_csr_numba if HAS_NUMBA else _boid_turns_csr
+    csr(xs, ys, headings, offsets, idx, float(min_dist),
+        float(w_align), float(w_sep), float(w_coh), out)
+    return out
+
+
+def warmup():
+    """
+    Compile the kernels of this module for float64 inputs.
+
+    Returns:
+        list: Names of the kernels that were compiled
+    """
+    if not HAS_NUMBA:
+        return []
+    xs = np.zeros(2)
+    _boid_turn_numba(0.0, 0.0, 0.0, xs, xs, xs, 1.0, 1.0, 1.0, 1.0)
+    boid_turns(xs, xs, xs, 1.0, 0.5, 2.0, 2.0, backend='cpu')
+    return ['boid_turn', 'boid_turns']
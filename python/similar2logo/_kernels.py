@@ -0,0 +1,613 @@
+"""
+Array kernels for the pure Python simulation path.
+
+This module holds the grid and agent kernels used when the C++ engine is
+not available. Every kernel has a NumPy implementation; when Numba is
+installed a compiled version is used instead.
+"""
+
+import os
+
+import numpy as np
+
+# Try to use Numba for compiled kernels
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+# Options shared by every compiled kernel. Compiled code is cached on disk
+# so that only the first run after an install pays the JIT cost, and runs
+# without the GIL, so that other Python threads, such as the web server
+# encoding the last frame, keep running during a step.
+JIT_OPTIONS = dict(cache=True, fastmath=True, boundscheck=False,
+                   error_model='numpy', nogil=True)
+
+# Number of grid rows processed per tile. A strip of 64 rows of a few
+# hundred cells keeps the stencil temporaries inside L2.
+TILE_ROWS = 64
+
+# Storage type of scalar fields such as pheromone grids. Single precision
+# halves the memory traffic of the bandwidth-bound stencils; setting
+# SIMILAR_F64_PHEROMONE=1 switches back to double precision, e.g. to
+# validate a model against float64 results.
+if os.environ.get('SIMILAR_F64_PHEROMONE', '').lower() in ('1', 'true', 'yes'):
+    FIELD_DTYPE = np.float64
+else:
+    FIELD_DTYPE = np.float32
+
+# 8-connected neighbourhood as (dy, dx) offsets
+NEIGHBOR_OFFSETS = (
+    (-1, -1), (-1, 0), (-1, 1),
+    (0, -1), (0, 1),
+    (1, -1), (1, 0), (1, 1),
+)
+
+_neighbor_counts_cache = {}
+
+
+def _neighbor_counts(shape):
+    """Number of in-bounds 8-neighbours of every cell of a bounded grid."""
+    counts = _neighbor_counts_cache.get(shape)
+    if counts is None:
+        height, width = shape
+        cy = np.full(height, 3.0)
+        cx = np.full(width, 3.0)
+        cy[0] -= 1
+        cy[-1] -= 1
+        cx[0] -= 1
+        cx[-1] -= 1
+        counts = np.outer(cy, cx) - 1.0
+        # Degenerate 1-cell grids have no neighbours at all
+        counts[counts <= 0] = np.inf
+        _neighbor_counts_cache[shape] = counts
+    return counts
+
+
+def halo_for(src, halo=None):
+    """
+    Scratch grid of the diffusion kernels for src, allocated unless a
+    fitting one is given.
+
+    The NumPy kernel pads the whole grid with a one-cell border, of
+    shape (height + 2, width + 2); the compiled kernel pads each tile
+    of TILE_ROWS rows separately, one layer per tile.
+
+    Args:
+        src: Grid to be diffused
+        halo: Scratch grid returned by an earlier call, or None
+
+    Returns:
+        numpy.ndarray: halo if it fits src, else a new scratch grid
+    """
+    height, width = src.shape
+    if HAS_NUMBA:
+        n_tiles = (height + TILE_ROWS - 1) // TILE_ROWS
+        shape = (n_tiles, min(TILE_ROWS, height) + 2, width + 2)
+    else:
+        shape = (height + 2, width + 2)
+    return _fit_halo(src, halo, shape)
+
+
+def _fit_halo(src, halo, shape):
+    """halo if it has the given shape and the dtype of src, else a new grid."""
+    if halo is None or halo.shape != shape or halo.dtype != src.dtype:
+        halo = np.empty(shape, dtype=src.dtype)
+    return halo
+
+
+def _diffuse_numpy(src, dst, rate, toroidal, halo=None):
+    """
+    NumPy 8-neighbour diffusion over row tiles with a one-cell halo.
+
+    dst first holds the amount each cell sends, so the halo is the only
+    temporary grid.
+    """
+    height, width = src.shape
+    outflow = np.maximum(src, 0.0, out=dst)
+    outflow *= rate
+
+    # Amount sent to each neighbour, padded with a one-cell halo
+    halo = _fit_halo(src, halo, (height + 2, width + 2))
+    inner = halo[1:-1, 1:-1]
+    if toroidal:
+        np.divide(outflow, 8.0, out=inner)
+        halo[0, 1:-1] = halo[-2, 1:-1]
+        halo[-1, 1:-1] = halo[1, 1:-1]
+        halo[:, 0] = halo[:, -2]
+        halo[:, -1] = halo[:, 1]
+    else:
+        np.divide(outflow, _neighbor_counts(src.shape), out=inner)
+        halo[[0, -1], :] = 0.0
+        halo[:, [0, -1]] = 0.0
+
+    for top in range(0, height, TILE_ROWS):
+        bottom = min(top + TILE_ROWS, height)
+        tile = dst[top:bottom]
+        np.subtract(src[top:bottom], tile, out=tile)
+        for dy, dx in NEIGHBOR_OFFSETS:
+            tile += halo[top + 1 + dy:bottom + 1 + dy, 1 + dx:width + 1 + dx]
+    return dst
+
+
+if HAS_NUMBA:
+
+    @njit(parallel=True, **JIT_OPTIONS)
+    def _diffuse_halo_numba(src, dst, rate, factor, min_value, toroidal,
+                            evaporate, halos):
+        """
+        Compiled 8-neighbour diffusion, optionally followed by evaporation.
+
+        The grid is processed in tiles of TILE_ROWS rows. Each tile first
+        writes the amount its cells, and the rows just above and below
+        it, send to one neighbour into a small grid padded with a
+        one-cell border (wrapped copies on a toroidal grid, zeros
+        otherwise), then runs the stencil over it. The padded rows are
+        still in cache when the stencil reads them, and the stencil pass
+        has no modulo or bounds test, so it vectorizes. Each tile pads
+        into its own layer of halos, see halo_for().
+
+        Arithmetic is done in the dtype of the grid: float64 constants
+        would promote a float32 stencil and halve its SIMD width.
+        """
+        real = src.dtype.type
+        zero = real(0.0)
+        share = real(rate)  # Fraction of a cell's value sent out
+        keep = real(factor)
+        floor = real(min_value)
+        height, width = src.shape
+        n_tiles = (height + TILE_ROWS - 1) // TILE_ROWS
+        for tile in prange(n_tiles):
+            top = tile * TILE_ROWS
+            bottom = min(top + TILE_ROWS, height)
+            halo = halos[tile]
+            for r in range(bottom - top + 2):
+                row = halo[r]
+                y = top - 1 + r
+                if toroidal:
+                    values = src[(y + height) % height]
+                    for x in range(width):
+                        row[x + 1] = share * max(values[x], zero) / real(8.0)
+                    row[0] = row[width]
+                    row[width + 1] = row[1]
+                    continue
+                row[0] = zero
+                row[width + 1] = zero
+                if y < 0 or y >= height:
+                    for x in range(width):
+                        row[x + 1] = zero
+                    continue
+                # Number of in-bounds neighbours along this row
+                values = src[y]
+                cy = 3 - (y == 0) - (y == height - 1)
+                if width == 1:
+                    count = real(cy - 1)
+                    row[1] = share * max(values[0], zero) / count if cy > 1 else zero
+                    continue
+                inner = real(cy * 3 - 1)
+                edge = real(cy * 2 - 1)
+                row[1] = share * max(values[0], zero) / edge
+                for x in range(1, width - 1):
+                    row[x + 1] = share * max(values[x], zero) / inner
+                row[width] = share * max(values[width - 1], zero) / edge
+
+            for y in range(top, bottom):
+                up = halo[y - top]
+                mid = halo[y - top + 1]
+                down = halo[y - top + 2]
+                for x in range(width):
+                    value = src[y, x]
+                    value += (up[x] + up[x + 1] + up[x + 2] + mid[x] + mid[x + 2]
+                              + down[x] + down[x + 1] + down[x + 2]
+                              - share * max(value, zero))
+                    if evaporate:
+                        value *= keep
+                        if value < floor:
+                            value = zero
+                    dst[y, x] = value
+        return dst
+
+
+def diffuse(src, dst, rate, toroidal, halo=None):
+    """
+    Diffuse a scalar field to its 8 neighbours.
+
+    Each positive cell sends ``rate`` times its value, shared equally
+    between its in-bounds neighbours (all 8 on a toroidal grid), so the
+    total amount on the grid is conserved.
+
+    Args:
+        src: Input grid of shape (height, width)
+        dst: Output grid with the same shape and dtype, must not alias src
+        rate: Fraction of each cell diffused during the step
+        toroidal: Whether the grid wraps around its edges
+        halo: Optional scratch grid from halo_for(), reused instead of
+            allocating one per call
+
+    Returns:
+        The dst array
+    """
+    if HAS_NUMBA:
+        return _diffuse_halo_numba(src, dst, rate, 1.0, 0.0, toroidal, False,
+                                   halo_for(src, halo))
+    return _diffuse_numpy(src, dst, rate, toroidal, halo)
+
+
+def diffuse_evaporate(src, dst, rate, factor, min_value, toroidal,
+                      halo=None):
+    """
+    Diffuse a scalar field, then evaporate it, reading and writing each
+    cell once.
+    
+    Equivalent to ``diffuse(src, dst, rate, toroidal)`` followed by
+    ``evaporate(dst, factor, min_value)``.
+    
+    Args:
+        src: Input grid of shape (height, width)
+        dst: Output grid with the same shape and dtype, must not alias src
+        rate: Fraction of each cell diffused during the step
+        factor: Multiplier applied to every cell after diffusion
+        min_value: Cells below this value are set to 0
+        toroidal: Whether the grid wraps around its edges
+        halo: Optional scratch grid, as for diffuse()
+    
+    Returns:
+        The dst array
+    """
+    if HAS_NUMBA:
+        return _diffuse_halo_numba(src, dst, rate, factor, min_value,
+                                   toroidal, True, halo_for(src, halo))
+    _diffuse_numpy(src, dst, rate, toroidal, halo)
+    return evaporate(dst, factor, min_value)
+
+
+def _advance_numpy(xs, ys, headings, speeds, width, height, toroidal):
+    """NumPy version of advance."""
+    xs += np.cos(headings) * speeds
+    ys += np.sin(headings) * speeds
+    if toroidal:
+        np.mod(xs, width, out=xs)
+        np.mod(ys, height, out=ys)
+    return xs, ys
+
+
+if HAS_NUMBA:
+
+    @njit(parallel=True, **JIT_OPTIONS)
+    def _advance_numba(xs, ys, headings, speeds, width, height, toroidal):
+        """Compiled version of advance, one parallel task per chunk of agents."""
+        for i in prange(xs.shape[0]):
+            x = xs[i] + np.cos(headings[i]) * speeds[i]
+            y = ys[i] + np.sin(headings[i]) * speeds[i]
+            if toroidal:
+                x %= width
+                y %= height
+            xs[i] = x
+            ys[i] = y
+        return xs, ys
+
+
+def advance(xs, ys, headings, speeds, width, height, toroidal):
+    """
+    Move every agent by its speed along its heading, in place.
+    
+    This is the natural (physics) reaction of a step. Headings follow the
+    natural reaction's convention, with x along cos(heading).
+    
+    Args:
+        xs: Agent x positions, float64 array modified in place
+        ys: Agent y positions, float64 array modified in place
+        headings: Agent headings in radians
+        speeds: Agent speeds
+        width: Environment width
+        height: Environment height
+        toroidal: Whether positions wrap around the environment
+    
+    Returns:
+        tuple: The (xs, ys) arrays
+    """
+    if HAS_NUMBA:
+        return _advance_numba(xs, ys, headings, speeds, float(width),
+                              float(height), toroidal)
+    return _advance_numpy(xs, ys, headings, speeds, width, height, toroidal)
+
+
+# Random walk of Turtle.decide(): chance to turn at each step, and
+# largest turn in radians
+RANDOM_WALK_TURN_CHANCE = 0.1
+RANDOM_WALK_TURN = 0.3
+
+
+def _random_walk_numpy(xs, ys, headings, speeds, pheromone, seed,
+                       out_dh, out_ds, out_dx, out_dy):
+    """NumPy version of random_walk."""
+    rng = np.random.default_rng(seed)
+    n = xs.shape[0]
+    turns = rng.random(n) < RANDOM_WALK_TURN_CHANCE
+    out_dh[:] = np.where(
+        turns, rng.uniform(-RANDOM_WALK_TURN, RANDOM_WALK_TURN, n), 0.0
+    )
+    out_ds[:] = 0.0
+    np.multiply(np.sin(headings), speeds, out=out_dx)
+    np.multiply(-np.cos(headings), speeds, out=out_dy)
+
+
+def _apply_deltas_numpy(xs, ys, headings, speeds, dx, dy, dh, ds,
+                        width, height, toroidal, natural):
+    """NumPy version of apply_deltas."""
+    xs += dx
+    ys += dy
+    if toroidal:
+        np.mod(xs, width, out=xs)
+        np.mod(ys, height, out=ys)
+    else:
+        np.clip(xs, 0, width - 1, out=xs)
+        np.clip(ys, 0, height - 1, out=ys)
+    headings += dh
+    # Same wrapping to [-pi, pi] as MathUtil.normalize_angle
+    headings -= 2 * np.pi * np.rint(headings / (2 * np.pi))
+    changed = ds != 0
+    speeds[changed] = np.maximum(speeds[changed] + ds[changed], 0.0)
+    if natural:
+        _advance_numpy(xs, ys, headings, speeds, width, height, toroidal)
+
+
+if HAS_NUMBA:
+
+    @njit(**JIT_OPTIONS)
+    def _random_walk_numba(start, stop, xs, ys, headings, speeds, pheromone,
+                           seed, out_dh, out_ds, out_dx, out_dy):
+        """
+        Compiled version of random_walk_range. Sequential, so that a seed
+        gives the same walk whatever the number of Numba threads, and
+        without the GIL, so that several Python threads can run it at
+        once on disjoint ranges.
+        """
+        np.random.seed(seed)
+        for i in range(start, stop):
+            heading = headings[i]
+            out_dx[i] = np.sin(heading) * speeds[i]
+            out_dy[i] = -np.cos(heading) * speeds[i]
+            out_ds[i] = 0.0
+            if np.random.random() < RANDOM_WALK_TURN_CHANCE:
+                out_dh[i] = np.random.uniform(-RANDOM_WALK_TURN,
+                                              RANDOM_WALK_TURN)
+            else:
+                out_dh[i] = 0.0
+
+    @njit(parallel=True, **JIT_OPTIONS)
+    def _apply_deltas_numba(xs, ys, headings, speeds, dx, dy, dh, ds,
+                            width, height, toroidal, natural):
+        """Compiled version of apply_deltas, one pass over the agents."""
+        two_pi = 2 * np.pi
+        for i in prange(xs.shape[0]):
+            x = xs[i] + dx[i]
+            y = ys[i] + dy[i]
+            if toroidal:
+                x %= width
+                y %= height
+            else:
+                x = min(max(x, 0.0), width - 1)
+                y = min(max(y, 0.0), height - 1)
+            heading = headings[i] + dh[i]
+            # Branchless wrap to [-pi, pi], whatever the number of turns
+            heading -= two_pi * np.rint(heading / two_pi)
+            speed = speeds[i]
+            if ds[i] != 0.0:
+                speed = max(speed + ds[i], 0.0)
+            if natural:
+                x += np.cos(heading) * speed
+                y += np.sin(heading) * speed
+                if toroidal:
+                    x %= width
+                    y %= height
+            xs[i] = x
+            ys[i] = y
+            headings[i] = heading
+            speeds[i] = speed
+
+
+def random_walk_range(start, stop, xs, ys, headings, speeds, pheromone,
+                      seed, out_dh, out_ds, out_dx, out_dy):
+    """
+    Decisions of Turtle.random_walk_influences() for the agents of index
+    ``start`` to ``stop - 1``.
+    
+    With probability RANDOM_WALK_TURN_CHANCE an agent turns by up to
+    RANDOM_WALK_TURN radians, and every agent moves forward by its speed
+    along its current heading (x along sin(heading), y along
+    -cos(heading), like influence_move_forward). Only the given range of
+    the output arrays is written, and the compiled version runs without
+    the GIL.
+    
+    Args:
+        start: First agent index
+        stop: Index after the last agent
+        xs, ys: Agent positions
+        headings: Agent headings in radians
+        speeds: Agent speeds
+        pheromone: Pheromone field perceived by the agents (unused)
+        seed: Seed of the random draws
+        out_dh: Receives the heading changes
+        out_ds: Receives the speed changes
+        out_dx, out_dy: Receive the position changes
+    """
+    if HAS_NUMBA:
+        _random_walk_numba(start, stop, xs, ys, headings, speeds, pheromone,
+                           seed, out_dh, out_ds, out_dx, out_dy)
+    else:
+        rows = slice(start, stop)
+        _random_walk_numpy(xs[rows], ys[rows], headings[rows], speeds[rows],
+                           pheromone, seed, out_dh[rows], out_ds[rows],
+                           out_dx[rows], out_dy[rows])
+
+
+def random_walk(xs, ys, headings, speeds, pheromone, seed,
+                out_dh, out_ds, out_dx, out_dy):
+    """
+    Decisions of Turtle.random_walk_influences() for a whole population,
+    see random_walk_range().
+    """
+    random_walk_range(0, xs.shape[0], xs, ys, headings, speeds, pheromone,
+                      seed, out_dh, out_ds, out_dx, out_dy)
+
+
+def apply_deltas(xs, ys, headings, speeds, dx, dy, dh, ds,
+                 width, height, toroidal, natural=True):
+    """
+    Apply per-agent position, heading and speed changes in place, as the
+    regular reaction applies move, turn and speed influences, then
+    optionally advance every agent like advance().
+    
+    Positions wrap on a toroidal environment and are clamped to
+    [0, size - 1] otherwise; headings are wrapped to [-pi, pi] and speeds
+    that change are kept non-negative.
+    
+    Args:
+        xs, ys, headings, speeds: Agent state, float64 arrays modified
+            in place
+        dx, dy, dh, ds: Changes of each agent
+        width: Environment width
+        height: Environment height
+        toroidal: Whether positions wrap around the environment
+        natural: Whether to apply the natural reaction afterwards
+    """
+    if HAS_NUMBA:
+        _apply_deltas_numba(xs, ys, headings, speeds, dx, dy, dh, ds,
+                            float(width), float(height), toroidal, natural)
+    else:
+        _apply_deltas_numpy(xs, ys, headings, speeds, dx, dy, dh, ds,
+                            width, height, toroidal, natural)
+
+
+def as_field(grid):
+    """
+    View a grid as a floating point array, converting it only when needed.
+
+    Args:
+        grid: ndarray or nested sequence of shape (height, width)
+
+    Returns:
+        A floating point ndarray, ``grid`` itself when it already is one
+    """
+    if isinstance(grid, np.ndarray) and grid.dtype.kind == 'f':
+        return grid
+    return np.asarray(grid, dtype=FIELD_DTYPE)
+
+
+def evaporate(grid, factor, min_value):
+    """
+    Scale a scalar field in place and zero the cells below a threshold.
+
+    Args:
+        grid: Floating point ndarray, modified in place
+        factor: Multiplier applied to every cell
+        min_value: Cells below this value are set to 0
+
+    Returns:
+        The grid
+    """
+    np.multiply(grid, factor, out=grid)
+    grid[grid < min_value] = 0.0
+    return grid
+
+
+def _cone_filter_numpy(self_x, self_y, dir_x, dir_y, half_cone_cos,
+                       radius, positions, distances, out):
+    """NumPy dot-product cone test."""
+    dx = positions[:, 0] - self_x
+    dy = positions[:, 1] - self_y
+    # cos(angle) >= cos(half cone) written as dot >= cos(half cone) * |d|
+    # so that no division is needed
+    np.greater_equal(dx * dir_x + dy * dir_y,
+                     half_cone_cos * np.hypot(dx, dy), out=out)
+    out &= distances <= radius
+    return out
+
+
+if HAS_NUMBA:
+
+    @njit(**JIT_OPTIONS)
+    def _cone_filter_numba(self_x, self_y, dir_x, dir_y, half_cone_cos,
+                           radius, positions, distances, out):
+        """Compiled dot-product cone test."""
+        for i in range(positions.shape[0]):
+            dx = positions[i, 0] - self_x
+            dy = positions[i, 1] - self_y
+            norm = np.sqrt(dx * dx + dy * dy)
+            out[i] = (distances[i] <= radius and
+                      dx * dir_x + dy * dir_y >= half_cone_cos * norm)
+        return out
+
+
+def cone_filter(self_x, self_y, heading, angle, radius, positions, distances,
+                out=None):
+    """
+    Select the neighbours inside a vision cone.
+
+    The cone test compares the dot product of the unit heading vector
+    and the direction to each neighbour with ``cos(angle / 2)``, so no
+    per-neighbour atan2 or angle wrapping is needed. A neighbour at the
+    exact position of the agent is considered inside the cone.
+
+    Args:
+        self_x: Agent x position
+        self_y: Agent y position
+        heading: Agent heading in radians (0 = North)
+        angle: Full opening angle of the cone in radians
+        radius: Maximum distance
+        positions: Neighbour positions, array of shape (k, 2)
+        distances: Neighbour distances, array of shape (k,)
+        out: Optional boolean array of shape (k,) receiving the mask
+
+    Returns:
+        Boolean mask of the neighbours inside the cone
+    """
+    if out is None:
+        out = np.empty(len(distances), dtype=np.bool_)
+    # Logo headings are measured from North, i.e. the screen direction
+    # (sin(heading), -cos(heading))
+    dir_x = np.sin(heading)
+    dir_y = -np.cos(heading)
+    half_cone_cos = np.cos(angle / 2)
+    if HAS_NUMBA:
+        return _cone_filter_numba(self_x, self_y, dir_x, dir_y, half_cone_cos,
+                                  radius, positions, distances, out)
+    return _cone_filter_numpy(self_x, self_y, dir_x, dir_y, half_cone_cos,
+                              radius, positions, distances, out)
+
+
+def warmup():
+    """
+    Compile every kernel of this module for the argument types used
+    by the simulation, filling the on-disk cache.
+
+    Returns:
+        list: Names of the kernels that were compiled
+    """
+    if not HAS_NUMBA:
+        return []
+    for dtype in (FIELD_DTYPE, np.float64):
+        src = np.zeros((4, 4), dtype=dtype)
+        dst = np.empty_like(src)
+        halo = halo_for(src)
+        for toroidal in (True, False):
+            for evaporating in (True, False):
+                _diffuse_halo_numba(src, dst, 0.1, 0.9, 0.0, toroidal,
+                                    evaporating, halo)
+    xs = np.zeros(2)
+    for toroidal in (True, False):
+        _advance_numba(xs, xs.copy(), xs, xs, 1.0, 1.0, toroidal)
+    positions = np.zeros((2, 2))
+    _cone_filter_numba(0.0, 0.0, 0.0, -1.0, 0.0, 1.0, positions,
+                       np.zeros(2), np.empty(2, dtype=np.bool_))
+    empty = np.zeros((0, 0), dtype=FIELD_DTYPE)
+    _random_walk_numba(0, 2, xs, xs, xs, xs, empty, 0, xs.copy(), xs.copy(),
+                       xs.copy(), xs.copy())
+    for toroidal in (True, False):
+        for natural in (True, False):
+            _apply_deltas_numba(xs.copy(), xs.copy(), xs.copy(), xs.copy(),
+                                xs, xs, xs, xs, 1.0, 1.0, toroidal, natural)
+    return ['diffuse', 'diffuse_evaporate', 'advance', 'cone_filter',
+            'random_walk', 'apply_deltas']
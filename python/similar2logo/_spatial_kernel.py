@@ -0,0 +1,352 @@
+"""
+Fixed-radius neighbour queries over a SpatialHashGrid in CSR form.
+
+The grid is read as flat arrays (see SpatialHashGrid.to_csr()): the
+objects of cell ``c`` are the rebuild indices
+``cell_idx[cell_start[c]:cell_start[c + 1]]``, and ``xs`` / ``ys`` hold
+their positions. Queries compare squared distances only and write the
+indices and squared distances of the neighbours into caller-provided
+buffers, so no Python object is created per neighbour.
+
+Cells are visited in the same order as SpatialHashGrid.query_radius(),
+which therefore returns the same neighbours in the same order.
+"""
+
+import numpy as np
+
+from ._kernels import HAS_NUMBA, JIT_OPTIONS
+
+if HAS_NUMBA:
+    from numba import njit, prange
+
+
+def _axis_cells(center, reach, count, toroidal):
+    """First cell, number of cells and wrapping of one axis of a query."""
+    if toroidal:
+        if 2 * reach + 1 >= count:
+            return 0, count, False
+        return center - reach, 2 * reach + 1, True
+    start = max(center - reach, 0)
+    return start, min(center + reach, count - 1) - start + 1, False
+
+
+def _scan_cells(x, y, cell_x, cell_y, exclude, xs, ys, cell_start, cell_idx,
+                cols, rows, reach_x, reach_y, width, height, radius_sq,
+                toroidal, out_idx, out_d2, pos):
+    """
+    Neighbours of (x, y) found in the cells within reach of its cell.
+
+    Writes at most ``len(out_idx) - pos`` rows from ``pos`` on, and
+    returns the number of neighbours found. A negative ``pos`` only
+    counts them.
+    """
+    half_width = width / 2
+    half_height = height / 2
+    capacity = out_idx.shape[0]
+    start_x, count_x, wrap_x = _axis_cells(cell_x, reach_x, cols, toroidal)
+    start_y, count_y, wrap_y = _axis_cells(cell_y, reach_y, rows, toroidal)
+    found = 0
+    # A wrapped axis spans less than the grid, so its cells are at most
+    # one grid length out of range and wrap without a modulo
+    for oy in range(count_y):
+        row = start_y + oy
+        if wrap_y:
+            if row < 0:
+                row += rows
+            elif row >= rows:
+                row -= rows
+        row *= cols
+        for ox in range(count_x):
+            col = start_x + ox
+            if wrap_x:
+                if col < 0:
+                    col += cols
+                elif col >= cols:
+                    col -= cols
+            cell = row + col
+            for k in range(cell_start[cell], cell_start[cell + 1]):
+                j = cell_idx[k]
+                if j == exclude:
+                    continue
+                dx = x - xs[j]
+                dy = y - ys[j]
+                if toroidal:
+                    # Shortest distance across the wrapped edges
+                    if dx > half_width:
+                        dx -= width
+                    elif dx < -half_width:
+                        dx += width
+                    if dy > half_height:
+                        dy -= height
+                    elif dy < -half_height:
+                        dy += height
+                dist_sq = dx * dx + dy * dy
+                if dist_sq <= radius_sq:
+                    if pos >= 0 and pos + found < capacity:
+                        out_idx[pos + found] = j
+                        out_d2[pos + found] = dist_sq
+                    found += 1
+    return found
+
+
+def query_numpy(x, y, cell_x, cell_y, exclude, xs, ys, cell_start, cell_idx,
+                cols, rows, reach_x, reach_y, width, height, radius_sq,
+                toroidal):
+    """
+    NumPy version of query_radius_sq: gathers the objects of the cells
+    within reach and tests them all in one array expression.
+
+    Returns:
+        tuple: (indices, squared distances) of the neighbours, in scan order
+    """
+    start_x, count_x, wrap_x = _axis_cells(cell_x, reach_x, cols, toroidal)
+    start_y, count_y, wrap_y = _axis_cells(cell_y, reach_y, rows, toroidal)
+    cell_xs = np.arange(start_x, start_x + count_x)
+    cell_ys = np.arange(start_y, start_y + count_y)
+    if wrap_x:
+        cell_xs %= cols
+    if wrap_y:
+        cell_ys %= rows
+    cells = (cell_ys[:, None] * cols + cell_xs).ravel()
+    starts = cell_start[cells].tolist()
+    ends = cell_start[cells + 1].tolist()
+    candidates = np.concatenate([cell_idx[s:e] for s, e in zip(starts, ends)])
+    dx = x - xs[candidates]
+    dy = y - ys[candidates]
+    if toroidal:
+        dx = np.where(dx > width / 2, dx - width,
+                      np.where(dx < -width / 2, dx + width, dx))
+        dy = np.where(dy > height / 2, dy - height,
+                      np.where(dy < -height / 2, dy + height, dy))
+    d2 = dx * dx + dy * dy
+    hit = d2 <= radius_sq
+    if exclude >= 0:
+        hit &= candidates != exclude
+    return candidates[hit], d2[hit]
+
+
+def _axis_steps(centers, reach, count, toroidal):
+    """
+    Cell coordinate scanned by every query at each step along one axis,
+    in scan order, and which of them lie inside a bounded grid.
+    """
+    if toroidal and 2 * reach + 1 >= count:
+        return np.broadcast_to(np.arange(count), (len(centers), count)), None
+    cells = centers[:, None] - reach + np.arange(2 * reach + 1)
+    if toroidal:
+        return cells % count, None
+    return cells, (cells >= 0) & (cells < count)
+
+
+def _neighbors_numpy(cell_ids, xs, ys, cell_start, cell_idx, cols, rows,
+                     reach_x, reach_y, width, height, radius_sq, toroidal):
+    """
+    NumPy version of neighbors: handles one neighbouring cell of every
+    object at a time, expanding the cell contents into candidate pairs.
+
+    Returns:
+        tuple: (counts, indices, squared distances), rows sorted by query
+    """
+    n = len(cell_ids)
+    cell_ids = cell_ids.astype(np.int64)
+    steps_x, valid_x = _axis_steps(cell_ids % cols, reach_x, cols, toroidal)
+    steps_y, valid_y = _axis_steps(cell_ids // cols, reach_y, rows, toroidal)
+    everyone = np.arange(n)
+    queries = []
+    found = []
+    found_d2 = []
+    for sy in range(steps_y.shape[1]):
+        for sx in range(steps_x.shape[1]):
+            cells = steps_y[:, sy] * cols + steps_x[:, sx]
+            if valid_x is None:
+                query = everyone
+            else:
+                inside = valid_x[:, sx] & valid_y[:, sy]
+                query = everyone[inside]
+                cells = cells[inside]
+            starts = cell_start[cells]
+            lengths = cell_start[cells + 1] - starts
+            total = int(lengths.sum())
+            if total == 0:
+                continue
+            # Position in cell_idx of every (query, candidate) pair
+            ends = np.cumsum(lengths)
+            slots = (np.arange(total) - np.repeat(ends - lengths, lengths)
+                     + np.repeat(starts, lengths))
+            query = np.repeat(query, lengths)
+            candidate = cell_idx[slots]
+            dx = xs[query] - xs[candidate]
+            dy = ys[query] - ys[candidate]
+            if toroidal:
+                dx = np.where(dx > width / 2, dx - width,
+                              np.where(dx < -width / 2, dx + width, dx))
+                dy = np.where(dy > height / 2, dy - height,
+                              np.where(dy < -height / 2, dy + height, dy))
+            d2 = dx * dx + dy * dy
+            hit = (d2 <= radius_sq) & (query != candidate)
+            queries.append(query[hit])
+            found.append(candidate[hit])
+            found_d2.append(d2[hit])
+
+    if not queries:
+        return (np.zeros(n, dtype=np.int64), np.empty(0, dtype=np.int32),
+                np.empty(0))
+    queries = np.concatenate(queries)
+    # Stable sort keeps each query's neighbours in cell scan order
+    order = np.argsort(queries, kind='stable')
+    return (np.bincount(queries, minlength=n),
+            np.concatenate(found)[order].astype(np.int32),
+            np.concatenate(found_d2)[order])
+
+
+if HAS_NUMBA:
+    # Rebound so that the compiled _scan_cells calls the compiled helper
+    _axis_cells = njit(**JIT_OPTIONS)(_axis_cells)
+    _scan_cells_numba = njit(**JIT_OPTIONS)(_scan_cells)
+
+    @njit(parallel=True, **JIT_OPTIONS)
+    def _neighbor_counts_numba(cell_ids, xs, ys, cell_start, cell_idx, cols,
+                               rows, reach_x, reach_y, width, height,
+                               radius_sq, toroidal, out_idx, out_d2):
+        """First pass of neighbors: number of neighbours of each object."""
+        n = xs.shape[0]
+        counts = np.empty(n, dtype=np.int64)
+        for i in prange(n):
+            counts[i] = _scan_cells_numba(
+                xs[i], ys[i], cell_ids[i] % cols, cell_ids[i] // cols, i,
+                xs, ys, cell_start, cell_idx, cols, rows, reach_x, reach_y,
+                width, height, radius_sq, toroidal, out_idx, out_d2, -1
+            )
+        return counts
+
+    @njit(parallel=True, **JIT_OPTIONS)
+    def _neighbor_fill_numba(cell_ids, xs, ys, cell_start, cell_idx, cols,
+                             rows, reach_x, reach_y, width, height,
+                             radius_sq, toroidal, offsets, out_idx, out_d2):
+        """Second pass of neighbors: write each object's rows."""
+        for i in prange(xs.shape[0]):
+            _scan_cells_numba(
+                xs[i], ys[i], cell_ids[i] % cols, cell_ids[i] // cols, i,
+                xs, ys, cell_start, cell_idx, cols, rows, reach_x, reach_y,
+                width, height, radius_sq, toroidal, out_idx, out_d2,
+                offsets[i]
+            )
+
+
+def query_radius_sq(x, y, cell_x, cell_y, exclude, xs, ys, cell_start,
+                    cell_idx, cols, rows, reach_x, reach_y, width, height,
+                    radius_sq, toroidal, out_idx, out_d2):
+    """
+    Neighbours of one point within a squared radius.
+
+    Args:
+        x, y: Query position
+        cell_x, cell_y: Grid cell of the query position
+        exclude: Rebuild index to skip, or -1
+        xs, ys: Object positions, float64 arrays in rebuild order
+        cell_start, cell_idx: Grid in CSR form
+        cols, rows: Grid size in cells
+        reach_x, reach_y: Number of cells searched on each side
+        width, height: Size of the space
+        radius_sq: Squared search radius
+        toroidal: Whether distances wrap around the edges
+        out_idx: int32 buffer receiving the neighbour indices
+        out_d2: float64 buffer receiving their squared distances
+
+    Returns:
+        int: Number of neighbours, which may exceed the buffer size, in
+        which case only the first ``len(out_idx)`` are written
+    """
+    if HAS_NUMBA:
+        return _scan_cells_numba(
+            x, y, cell_x, cell_y, exclude, xs, ys, cell_start, cell_idx,
+            cols, rows, reach_x, reach_y, width, height, radius_sq,
+            toroidal, out_idx, out_d2, 0
+        )
+    idx, d2 = query_numpy(x, y, cell_x, cell_y, exclude, xs, ys, cell_start,
+                          cell_idx, cols, rows, reach_x, reach_y, width,
+                          height, radius_sq, toroidal)
+    written = min(len(idx), out_idx.shape[0])
+    out_idx[:written] = idx[:written]
+    out_d2[:written] = d2[:written]
+    return len(idx)
+
+
+def neighbors(cell_ids, xs, ys, cell_start, cell_idx, cols, rows, reach_x,
+              reach_y, width, height, radius_sq, toroidal,
+              out_idx=None, out_d2=None):
+    """
+    Neighbours of every object of the grid, in CSR layout.
+
+    The neighbours of object ``i`` are
+    ``out_idx[offsets[i]:offsets[i + 1]]`` with squared distances
+    ``out_d2[offsets[i]:offsets[i + 1]]``.
+
+    Args:
+        cell_ids: Cell of each object, in rebuild order
+        xs, ys, cell_start, cell_idx, cols, rows, reach_x, reach_y,
+        width, height, radius_sq, toroidal: As for query_radius_sq
+        out_idx: Optional int32 buffer to reuse for the indices
+        out_d2: Optional float64 buffer to reuse for the squared distances
+
+    Returns:
+        tuple: (offsets, out_idx, out_d2); the buffers are the ones given
+        when they were large enough, otherwise larger new ones
+    """
+    n = len(xs)
+    if out_idx is None:
+        out_idx = np.empty(0, dtype=np.int32)
+    if out_d2 is None:
+        out_d2 = np.empty(0)
+
+    if HAS_NUMBA:
+        counts = _neighbor_counts_numba(
+            cell_ids, xs, ys, cell_start, cell_idx, cols, rows, reach_x,
+            reach_y, width, height, radius_sq, toroidal, out_idx, out_d2
+        )
+    else:
+        counts, found, found_d2 = _neighbors_numpy(
+            cell_ids, xs, ys, cell_start, cell_idx, cols, rows, reach_x,
+            reach_y, width, height, radius_sq, toroidal
+        )
+
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    total = int(offsets[-1])
+    if total > len(out_idx):
+        capacity = max(total, 2 * len(out_idx))
+        out_idx = np.empty(capacity, dtype=np.int32)
+        out_d2 = np.empty(capacity)
+
+    if HAS_NUMBA:
+        _neighbor_fill_numba(
+            cell_ids, xs, ys, cell_start, cell_idx, cols, rows, reach_x,
+            reach_y, width, height, radius_sq, toroidal, offsets, out_idx,
+            out_d2
+        )
+    else:
+        out_idx[:total] = found
+        out_d2[:total] = found_d2
+    return offsets, out_idx, out_d2
+
+
+def warmup():
+    """
+    Compile the kernels of this module for float64 inputs.
+
+    Returns:
+        list: Names of the kernels that were compiled
+    """
+    if not HAS_NUMBA:
+        return []
+    xs = np.array([0.5, 1.0])
+    cell_ids = np.zeros(2, dtype=np.int32)
+    cell_start = np.array([0, 2], dtype=np.int32)
+    cell_idx = np.arange(2, dtype=np.int32)
+    for toroidal in (False, True):
+        neighbors(cell_ids, xs, xs, cell_start, cell_idx, 1, 1, 1, 1,
+                  2.0, 2.0, 1.0, toroidal)
+        query_radius_sq(0.5, 0.5, 0, 0, -1, xs, xs, cell_start, cell_idx,
+                        1, 1, 1, 1, 2.0, 2.0, 1.0, toroidal,
+                        np.empty(2, dtype=np.int32), np.empty(2))
+    return ['neighbors', 'query_radius_sq']
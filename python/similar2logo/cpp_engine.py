@@ -8,6 +8,13 @@ C++ Logo simulation engine with true multithreading.
 from typing import List, Callable, Optional, Any
 import math
 
+import numpy as np
+
+from .tools import Point2D
+
+# Columns of the per-turtle state buffer
+STATE_COLUMNS = ('x', 'y', 'heading')
+
 
 class CppLogoSimulation:
     """
@@ -56,7 +63,14 @@ class CppLogoSimulation:
         self.engine = self._cpp.MultiThreadedEngine(self.num_threads)
         
         self._agents = []
+        self._py_agents = []
         self._pheromones = []
+        
+        # Persistent (N, 3) float32 state buffer, see STATE_COLUMNS,
+        # filled by the decision callback. get_state() hands out views of
+        # it instead of per-turtle dicts.
+        self._state_buffer = np.zeros((0, len(STATE_COLUMNS)), dtype=np.float32)
+        self._step = 0
     
     def add_pheromone(self, pheromone_id: str, diffusion: float = 0.1,
                      evaporation: float = 0.01):
@@ -136,42 +150,25 @@ class CppLogoSimulation:
         def agent_factory():
             """Factory function to create C++ agents."""
             cpp_agents = []
+            self._py_agents = []
+            decision_callback = self._decision_callback
             
             for agent_class, count, kwargs in self._agents:
+                category = AgentCategory(agent_class.__name__)
                 for i in range(count):
                     # Create C++ Logo agent
-                    category = AgentCategory(agent_class.__name__)
                     cpp_agent = self._cpp.LogoAgent(category)
                     
-                    # Create Python decision model wrapper
-                    py_agent = agent_class(**kwargs)
-                    
-                    def make_decision_callback(py_agent):
-                        def callback(perception, influences):
-                            # Call Python decide() method
-                            # Convert C++ perception to Python-friendly format
-                            py_perception = {
-                                'position': perception.get_position(),
-                                'heading': perception.get_heading(),
-                                'speed': perception.get_speed(),
-                                'nearby_turtles': perception.get_nearby_turtles(),
-                                'pheromones': perception.get_all_pheromones()
-                            }
-                            
-                            # Get influences from Python agent
-                            py_influences = py_agent.decide(py_perception)
-                            
-                            # Convert Python influences to C++ influences
-                            # and add to influences map
-                            for influence in py_influences:
-                                influences.add_all([influence])
-                        
-                        return callback
+                    # The Python agent is found by index from a single
+                    # shared callback instead of a closure per agent
+                    agent_index = len(self._py_agents)
+                    self._py_agents.append(agent_class(**kwargs))
                     
                     # Set decision model
                     decision_model = self._cpp.PythonDecisionModel(
                         LogoSimulationLevelList.LOGO,
-                        make_decision_callback(py_agent)
+                        agent_index,
+                        decision_callback
                     )
                     
                     cpp_agent.specify_behavior_for_level(
@@ -182,20 +179,135 @@ class CppLogoSimulation:
                     
                     cpp_agents.append(cpp_agent)
             
+            self._state_buffer = np.zeros(
+                (len(cpp_agents), len(STATE_COLUMNS)), dtype=np.float32
+            )
+            self._step = 0
             return cpp_agents
         
         self.model.set_agent_factory(agent_factory)
     
+    def _decision_callback(self, agent_index, perception, influences):
+        """
+        Decision callback shared by all agents of the simulation.
+        
+        Also records the position and heading the agent perceives into its
+        row of the state buffer, and counts the steps on the decisions of
+        the first agent.
+        
+        Args:
+            agent_index: Index of the deciding agent in self._py_agents
+            perception: C++ LogoPerceivedData instance
+            influences: C++ InfluencesMap receiving the produced influences
+        """
+        # Perception conversion and decision in a single pass;
+        # influences cross the boundary in one call
+        py_perception = _to_py_perception(perception)
+        position = py_perception['position']
+        self._state_buffer[agent_index] = (
+            position.x, position.y, py_perception['heading']
+        )
+        if agent_index == 0:
+            self._step += 1
+        py_influences = self._py_agents[agent_index].decide(py_perception)
+        if py_influences:
+            influences.add_all(py_influences)
+    
     def get_state(self):
-        """Get current simulation state."""
-        # TODO: Implement state extraction from C++ engine
+        """
+        Get current simulation state.
+        
+        Turtle data is returned as views of the persistent state buffer,
+        so no Python object is created per turtle and the arrays can be
+        serialized as they are. Each row holds what the turtle perceived
+        at its last decision, i.e. its state at the start of the current
+        step.
+        
+        Returns:
+            dict: Step, turtle count and positions (N, 2) and headings (N,)
+            float32 views
+        """
+        buffer = self._state_buffer
         return {
-            'step': 0,
-            'num_turtles': sum(count for _, count, _ in self._agents),
-            'turtles': []
+            'step': self._step,
+            'num_turtles': len(buffer),
+            'positions': buffer[:, 0:2],
+            'headings': buffer[:, 2],
+            'environment': {
+                'width': self.width,
+                'height': self.height
+            }
         }
 
 
+class _CppPerception(dict):
+    """
+    Perception dictionary of the C++ engine.
+    
+    ``nearby_turtles``, the list of neighbour dictionaries provided by the
+    Python engine, is only built from the neighbour arrays when first read,
+    through indexing, get() or ``in``. Its dictionaries have no ``turtle``
+    entry, since the C++ perception does not carry the agents.
+    """
+    
+    __slots__ = ()
+    
+    def __missing__(self, key):
+        if key != 'nearby_turtles':
+            raise KeyError(key)
+        positions = self['nearby_positions'].tolist()
+        distances = self['nearby_distances'].tolist()
+        nearby = [
+            {
+                'distance': distance,
+                'distance_sq': distance * distance,
+                'position': Point2D(x, y),
+                'heading': heading
+            }
+            for (x, y), heading, distance in zip(
+                positions, self['nearby_headings'].tolist(), distances
+            )
+        ]
+        self['nearby_turtles'] = nearby
+        return nearby
+    
+    def get(self, key, default=None):
+        if key == 'nearby_turtles':
+            return self[key]
+        return super().get(key, default)
+    
+    def __contains__(self, key):
+        return key == 'nearby_turtles' or super().__contains__(key)
+
+
+def _to_py_perception(perception):
+    """
+    Convert a C++ LogoPerceivedData into the dict expected by decide().
+    
+    Each accessor crosses the pybind11 boundary once per call, so the
+    conversion is done exactly once per agent and per step. Nearby turtles
+    are exposed as read-only NumPy views over the C++ perception rather
+    than as one Python object per neighbour; ``nearby_turtles`` is built
+    from them on first read.
+    
+    Args:
+        perception: C++ LogoPerceivedData instance
+        
+    Returns:
+        dict: Python-friendly perception
+    """
+    positions, headings, distances = perception.get_nearby_arrays()
+    return _CppPerception({
+        'position': perception.get_position(),
+        'heading': perception.get_heading(),
+        'speed': perception.get_speed(),
+        'nearby_positions': positions,
+        'nearby_headings': headings,
+        'nearby_distances': distances,
+        'pheromones': perception.get_all_pheromones()
+    })
+
+
 def use_cpp_engine():
     """
     Check if C++ engine is available.
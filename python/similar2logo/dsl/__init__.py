@@ -15,9 +15,8 @@ Example:
     
     class Boid(SimpleTurtle):
         def decide(self, perception):
-            neighbors = self.nearby_turtles(radius=5)
-            self.align_with(neighbors)
-            return []
+            neighbors = self.nearby_turtles(perception, radius=5)
+            return self.boid_turn(neighbors, min_distance=2.0)
     
     sim = Simulation().grid(100, 100).agents(Boid, 50).run_web()
     ```
@@ -25,17 +24,57 @@ Example:
 
 from dataclasses import dataclass, field
 from typing import List, Optional, Callable, Any, Type
+import inspect
 import math
+import sys
+
+import numpy as np
 from ..model import LogoSimulation, Turtle
+from .._boids_kernel import boid_turn
+from .._kernels import cone_filter
 from ..tools import Point2D
-from ..tools import Point2D
-try:
-    from ..web import WebSimulation
-except ImportError:
-    WebSimulation = None
+
+_TWO_PI = 2 * math.pi
+_HALF_PI = math.pi / 2
+
+
+# Number of neighbours from which filtering through a NumPy mask beats
+# a list comprehension
+_VECTOR_FILTER_MIN = 32
+
+
+def _nearby_objects(perception):
+    """
+    The perceived turtles as an object array aligned with the perception's
+    neighbour arrays, built on first use and kept in the perception so
+    that later filters of the same decide() reuse it.
+    """
+    objects = perception.get('nearby_objects')
+    if objects is None:
+        agents = _nearby_agents(perception)
+        objects = np.empty(len(agents), dtype=object)
+        objects[:] = agents
+        perception['nearby_objects'] = objects
+    return objects
+
+
+def _nearby_agents(perception):
+    """
+    The perceived turtles, read from a Perception's ``nearby_agents``
+    without building its ``nearby_turtles`` dictionaries, or from the
+    ``nearby_turtles`` of a plain dictionary perception.
+    """
+    agents = perception.get('nearby_agents')
+    if agents is None:
+        agents = [n['turtle'] for n in perception.get('nearby_turtles', ())]
+    return agents
+
+
+# Slotted dataclasses need Python 3.10
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class SimulationConfig:
     """Configuration for a simulation"""
     name: str = "SIMILAR Simulation"
@@ -44,6 +83,7 @@ class SimulationConfig:
     toroidal: bool = True
     max_steps: Optional[int] = None
     max_time: Optional[float] = None
+    perception_radius: float = 10.0
     update_rate: int = 30
     port: int = 8080
 
@@ -68,7 +108,7 @@ class Simulation:
         self._probes: List[Any] = []
         self._custom_env: Optional[Any] = None
         self._setup_callback: Optional[Callable] = None
-        self._parallel_backend: str = 'thread'  # 'thread', 'process', or None
+        self._parallel_backend: Optional[str] = 'auto'  # 'auto', 'thread', 'process', or None
         self._num_workers: Optional[int] = None
     
     def grid(self, width: int, height: int, toroidal: bool = True):
@@ -93,7 +133,8 @@ class Simulation:
         Configure parallel execution for agent decisions.
         
         Args:
-            backend: 'thread', 'process', or None
+            backend: 'auto', 'thread', 'process', or None
+                    - 'auto': Default, see _resolve_parallel_backend()
                     - 'thread': Uses threading (limited by GIL for CPU-bound tasks)
                     - 'process': Uses multiprocessing (TRUE parallelism, higher overhead)
                     - None: Sequential execution
@@ -123,6 +164,24 @@ class Simulation:
         self._num_workers = num_workers
         return self
     
+    def perception(self, radius: float):
+        """
+        Set the radius within which agents perceive each other.
+        
+        Nearby turtles are found through a uniform grid whose cells are
+        as large as this radius, so each query scans at most 9 cells.
+        Radii passed to nearby_turtles() or turtles_in_cone() cannot see
+        further than this.
+        
+        Args:
+            radius: Perception radius
+        
+        Returns:
+            self for method chaining
+        """
+        self.config.perception_radius = radius
+        return self
+    
     def agents(self, agent_class: Type, count: int, **kwargs):
         """
         Add agents to the simulation.
@@ -193,6 +252,24 @@ class Simulation:
         # TODO: Implement speed control
         return self
     
+    def _resolve_parallel_backend(self) -> Optional[str]:
+        """
+        Pick the decision backend when parallel() was left on 'auto'.
+        
+        Decisions written in Python hold the GIL, so threads only add
+        scheduling overhead, and processes pay for pickling every
+        perception each step. Those agents run sequentially. Threads are
+        kept for agent classes whose decide() is native code, which can
+        release the GIL.
+        """
+        if self._parallel_backend != 'auto':
+            return self._parallel_backend
+        
+        for agent_class, _, _ in self._agent_specs:
+            if inspect.isfunction(getattr(agent_class, 'decide', None)):
+                return None
+        return 'thread' if self._agent_specs else None
+    
     def _build_simulation(self) -> LogoSimulation:
         """Build the LogoSimulation instance"""
         if self._sim is None:
@@ -221,21 +298,34 @@ class Simulation:
             self._sim = LogoSimulation(
                 environment=env,
                 turtle_class=default_class,
-                parallel_backend=self._parallel_backend,
+                parallel_backend=self._resolve_parallel_backend(),
                 num_workers=self._num_workers,
+                perception_radius=self.config.perception_radius,
                 **default_kwargs
             )
             
-            # Create agents
+            # Create agents, spread at random unless a position is given
             for agent_class, count, kwargs in self._agent_specs:
-                for _ in range(count):
-                    agent = agent_class(**kwargs)
-                    agent._environment = self._sim.environment
-                    self._sim.turtles.append(agent)
+                if 'position' in kwargs:
+                    for _ in range(count):
+                        agent = agent_class(**kwargs)
+                        agent._environment = self._sim.environment
+                        self._sim.turtles.append(agent)
+                    continue
+                
+                kwargs = dict(kwargs)
+                heading = kwargs.pop('heading', None)
+                headings = (env.random_headings(count) if heading is None
+                            else [heading] * count)
+                self._sim.add_agents_bulk(
+                    env.random_positions(count), headings, agent_class, **kwargs
+                )
             
             # Add probes
-            for probe in self._probes:
-                self._sim.probe_manager.add_probe(probe)
+            for i, probe in enumerate(self._probes):
+                self._sim.probe_manager.add_probe(
+                    f"{type(probe).__name__}_{i}", probe
+                )
             
             # Run setup callback
             if self._setup_callback:
@@ -256,18 +346,24 @@ class Simulation:
         """
         sim = self._build_simulation()
         
+        # Progress is reported every 100 steps; the next report is
+        # scheduled instead of testing a modulo after every step
+        step_fn = sim.step
         if max_steps:
             print(f"Running {self.config.name} for {max_steps} steps...")
-            for step in range(max_steps):
-                sim.step()
-                if step % 100 == 0:
-                    print(f"  Step {step}/{max_steps}")
+            for first in range(0, max_steps, 100):
+                print(f"  Step {first}/{max_steps}")
+                for _ in range(min(100, max_steps - first)):
+                    step_fn()
         elif max_time:
             print(f"Running {self.config.name} until time {max_time}...")
-            while sim.time < max_time:
-                sim.step()
-                if int(sim.time) % 100 == 0:
-                    print(f"  Time: {sim.time:.2f}/{max_time}")
+            # Each step advances the simulation time by one unit
+            next_report = 100
+            while sim.current_step < max_time:
+                step_fn()
+                if sim.current_step >= next_report:
+                    print(f"  Time: {sim.current_step:.2f}/{max_time}")
+                    next_report += 100
         else:
             print(f"Running {self.config.name}...")
             sim.run()
@@ -286,7 +382,10 @@ class Simulation:
         Returns:
             The WebSimulation instance
         """
-        if WebSimulation is None:
+        # Imported here so that headless runs do not load fastapi/uvicorn
+        try:
+            from ..web import WebSimulation
+        except ImportError:
             raise ImportError("Web simulation requires 'fastapi' and 'uvicorn'. Install them with: pip install fastapi uvicorn")
 
         sim = self._build_simulation()
@@ -329,10 +428,29 @@ class SimpleTurtle(Turtle):
             # Fallback: try to get from nearby_turtles in perception
             return []
         
-        # Use the nearby_turtles from perception
+        # Use the perceived neighbours, comparing squared distances when
+        # the perception provides them
+        agents = perception.get('nearby_agents')
+        if agents is not None:
+            radius_sq = radius * radius
+            distances_sq = perception['nearby_distances_sq']
+            if len(agents) >= _VECTOR_FILTER_MIN:
+                return _nearby_objects(perception)[
+                    np.asarray(distances_sq) <= radius_sq].tolist()
+            if isinstance(distances_sq, np.ndarray):
+                distances_sq = distances_sq.tolist()
+            return [other for other, dist_sq in zip(agents, distances_sq)
+                    if dist_sq <= radius_sq]
         if 'nearby_turtles' in perception:
-            return [n['turtle'] for n in perception['nearby_turtles'] 
-                   if n['distance'] <= radius]
+            nearby = perception['nearby_turtles']
+            distances = perception.get('nearby_distances')
+            if len(nearby) >= _VECTOR_FILTER_MIN and distances is not None:
+                return _nearby_objects(perception)[distances <= radius].tolist()
+            if nearby and 'distance_sq' in nearby[0]:
+                radius_sq = radius * radius
+                return [n['turtle'] for n in nearby
+                        if n['distance_sq'] <= radius_sq]
+            return [n['turtle'] for n in nearby if n['distance'] <= radius]
         return []
     
     def turtles_in_cone(self, perception=None, radius: float = 5.0, angle: float = math.pi):
@@ -340,29 +458,69 @@ class SimpleTurtle(Turtle):
         if perception is None or 'nearby_turtles' not in perception:
             return []
         
-        nearby = []
-        for neighbor_data in perception['nearby_turtles']:
-            if neighbor_data['distance'] <= radius:
-                other = neighbor_data['turtle']
-                # Calculate angle to other turtle
-                dx = other.position.x - self.position.x
-                dy = other.position.y - self.position.y
-                # Convert atan2 (0=East) to Logo heading (0=North)
-                angle_to = math.atan2(dy, dx) + math.pi / 2
-                
-                angle_diff = abs(angle_to - self.heading)
-                
-                # Normalize angle difference
-                while angle_diff > math.pi:
-                    angle_diff -= 2 * math.pi
-                angle_diff = abs(angle_diff)
-                
-                if angle_diff <= angle / 2:
-                    nearby.append(other)
-        return nearby
+        agents = _nearby_agents(perception)
+        if not agents:
+            return []
+        
+        positions = perception.get('nearby_positions')
+        distances = perception.get('nearby_distances')
+        if positions is None or distances is None:
+            nearby = perception['nearby_turtles']
+            positions = np.array(
+                [(n['turtle'].position.x, n['turtle'].position.y) for n in nearby]
+            )
+            distances = np.array([n['distance'] for n in nearby])
+        
+        mask = cone_filter(self.position.x, self.position.y, self.heading,
+                           angle, radius, positions, distances)
+        if len(agents) >= _VECTOR_FILTER_MIN:
+            return _nearby_objects(perception)[mask].tolist()
+        return [agents[i] for i in np.flatnonzero(mask)]
+    
+    def boid_turn(self, neighbors, min_distance: float = 1.0,
+                  w_align: float = 1.0, w_sep: float = 1.0, w_coh: float = 1.0):
+        """
+        Alignment, separation and cohesion as one turn influence.
+        
+        Equivalent to summing the turns of align_with, separate_from and
+        cohere_with with the given weights, computed in a single pass over
+        the neighbors by the compiled boids kernel.
+        
+        Args:
+            neighbors: Turtles to flock with, e.g. from nearby_turtles()
+            min_distance: Separation distance
+            w_align: Alignment weight
+            w_sep: Separation weight
+            w_coh: Cohesion weight
+        
+        Returns:
+            List with one ChangeDirection influence, or an empty list
+        """
+        if not neighbors:
+            return []
+        
+        count = len(neighbors)
+        xs = np.empty(count)
+        ys = np.empty(count)
+        headings = np.empty(count)
+        for i, neighbor in enumerate(neighbors):
+            position = neighbor.position
+            xs[i] = position.x
+            ys[i] = position.y
+            headings[i] = neighbor.heading
+        
+        turn = boid_turn(self.position.x, self.position.y, self.heading,
+                         xs, ys, headings, min_distance,
+                         w_align, w_sep, w_coh)
+        return [self.influence_turn(turn)]
     
     def align_with(self, neighbors, weight: float = 1.0):
-        """Align heading with average of neighbors"""
+        """
+        Align heading with average of neighbors.
+        
+        Deprecated: use boid_turn(), which combines alignment, separation
+        and cohesion into a single turn influence.
+        """
         if not neighbors:
             return []
         
@@ -370,68 +528,80 @@ class SimpleTurtle(Turtle):
         angle_diff = avg_heading - self.heading
         
         # Normalize to [-pi, pi]
-        while angle_diff > math.pi:
-            angle_diff -= 2 * math.pi
-        while angle_diff < -math.pi:
-            angle_diff += 2 * math.pi
+        angle_diff = math.remainder(angle_diff, _TWO_PI)
         
         return [self.influence_turn(angle_diff * weight)]
     
     def separate_from(self, neighbors, min_distance: float = 1.0, weight: float = 1.0):
-        """Move away from neighbors that are too close"""
+        """
+        Move away from neighbors that are too close.
+        
+        Deprecated: use boid_turn(), which combines alignment, separation
+        and cohesion into a single turn influence.
+        """
         if not neighbors:
             return []
         
         repulsion_x = 0.0
         repulsion_y = 0.0
+        # Local names keep attribute and global lookups out of the loop
+        sqrt = math.sqrt
+        sx = self.position.x
+        sy = self.position.y
         
         for neighbor in neighbors:
-            dist = self.position.distance(neighbor.position)
+            position = neighbor.position
+            dx = sx - position.x
+            dy = sy - position.y
+            dist = sqrt(dx * dx + dy * dy)
             if dist < min_distance and dist > 0:
-                # Calculate repulsion vector
-                dx = self.position.x - neighbor.position.x
-                dy = self.position.y - neighbor.position.y
-                # Normalize and weight by inverse distance
+                # Repulsion weighted by inverse distance
                 factor = (min_distance - dist) / dist
                 repulsion_x += dx * factor
                 repulsion_y += dy * factor
         
         if abs(repulsion_x) > 0.01 or abs(repulsion_y) > 0.01:
             # Convert atan2 (0=East) to Logo heading (0=North)
-            desired_heading = math.atan2(repulsion_y, repulsion_x) + math.pi / 2
+            desired_heading = math.atan2(repulsion_y, repulsion_x) + _HALF_PI
             angle_diff = desired_heading - self.heading
             
-            # Normalize
-            while angle_diff > math.pi:
-                angle_diff -= 2 * math.pi
-            while angle_diff < -math.pi:
-                angle_diff += 2 * math.pi
+            # Normalize to [-pi, pi]
+            angle_diff = math.remainder(angle_diff, _TWO_PI)
             
             return [self.influence_turn(angle_diff * weight)]
         
         return []
     
     def cohere_with(self, neighbors, weight: float = 1.0):
-        """Move towards average position of neighbors"""
+        """
+        Move towards average position of neighbors.
+        
+        Deprecated: use boid_turn(), which combines alignment, separation
+        and cohesion into a single turn influence.
+        """
         if not neighbors:
             return []
         
-        avg_x = sum(n.position.x for n in neighbors) / len(neighbors)
-        avg_y = sum(n.position.y for n in neighbors) / len(neighbors)
+        # One pass over the neighbours for both coordinates
+        sum_x = 0.0
+        sum_y = 0.0
+        for neighbor in neighbors:
+            position = neighbor.position
+            sum_x += position.x
+            sum_y += position.y
+        count = len(neighbors)
         
-        dx = avg_x - self.position.x
-        dy = avg_y - self.position.y
+        position = self.position
+        dx = sum_x / count - position.x
+        dy = sum_y / count - position.y
         
         if abs(dx) > 0.01 or abs(dy) > 0.01:
             # Convert atan2 (0=East) to Logo heading (0=North)
-            desired_heading = math.atan2(dy, dx) + math.pi / 2
+            desired_heading = math.atan2(dy, dx) + _HALF_PI
             angle_diff = desired_heading - self.heading
             
-            # Normalize
-            while angle_diff > math.pi:
-                angle_diff -= 2 * math.pi
-            while angle_diff < -math.pi:
-                angle_diff += 2 * math.pi
+            # Normalize to [-pi, pi]
+            angle_diff = math.remainder(angle_diff, _TWO_PI)
             
             return [self.influence_turn(angle_diff * weight)]
         
@@ -4,6 +4,11 @@ This module provides a thin wrapper around the C++ Environment implementation.
 When C++ bindings are available, all heavy computation is done in C++.
 """
 
+import math
+import random
+
+import numpy as np
+
 try:
     from ._core.environment import Environment as CppEnvironment
     HAS_CPP_ENV = True
@@ -11,6 +16,44 @@ except ImportError:
     HAS_CPP_ENV = False
     CppEnvironment = None
 
+def _rng():
+    """
+    NumPy generator for one bulk draw, seeded from the ``random`` module
+    so that ``random.seed()`` makes agent placement reproducible.
+    """
+    return np.random.default_rng(random.getrandbits(64))
+
+
+def _random_positions(environment, n):
+    """Draw n uniform positions over the environment as an (n, 2) array."""
+    return _rng().uniform(
+        (0.0, 0.0), (environment.width, environment.height), size=(n, 2)
+    )
+
+
+def _random_headings(n):
+    """Draw n uniform headings in [0, 2*PI) as an (n,) array."""
+    return _rng().uniform(0.0, 2 * math.pi, size=n)
+
+
+def _distances(environment, from_pos, xs, ys):
+    """Distances from one position to many, wrapping if toroidal."""
+    dx = np.abs(np.asarray(xs, dtype=float) - from_pos.x)
+    dy = np.abs(np.asarray(ys, dtype=float) - from_pos.y)
+    if environment.toroidal:
+        np.minimum(dx, environment.width - dx, out=dx)
+        np.minimum(dy, environment.height - dy, out=dy)
+    return np.sqrt(dx * dx + dy * dy, out=dx)
+
+
+def _pow2_mask(size):
+    """``size - 1`` when size is a power of two, so that ``x & mask``
+    wraps like ``x % size``; None otherwise."""
+    if isinstance(size, int) and size > 0 and size & (size - 1) == 0:
+        return size - 1
+    return None
+
+
 # Simple Pheromone dataclass for Python-side configuration
 class Pheromone:
     """
@@ -44,6 +87,7 @@ if HAS_CPP_ENV:
             # Track pheromones added (for Python-side bookkeeping)
             self.pheromones = {}
             self.pheromone_grids = {}  # Not used, but kept for compatibility
+            self.marks = {}  # Mark id -> mark dict, see LogoReactionModel
         
         def add_pheromone(self, identifier, diffusion_coef=0.0, evaporation_coef=0.0,
                          default_value=0.0, min_value=0.0):
@@ -61,12 +105,24 @@ if HAS_CPP_ENV:
                                  default_value, min_value)
             self.pheromones[identifier] = pheromone
             return pheromone
+        
+        def random_positions(self, n):
+            """Generate n random positions as an (n, 2) array of (x, y)."""
+            return _random_positions(self, n)
+        
+        def random_headings(self, n):
+            """Generate n random headings as an (n,) array of radians."""
+            return _random_headings(n)
+        
+        def get_distances(self, from_pos, xs, ys):
+            """Distances from from_pos to every (xs[i], ys[i]), as an array."""
+            return _distances(self, from_pos, xs, ys)
 
 else:
     # Fallback: minimal Python implementation for when C++ is not available
-    import random
     from .tools import Point2D, MathUtil
-    import math
+    from ._kernels import (FIELD_DTYPE, diffuse, diffuse_evaporate, evaporate,
+                           halo_for)
     
     class Environment:
         """
@@ -80,6 +136,25 @@ else:
             self.toroidal = toroidal
             self.pheromones = {}
             self.pheromone_grids = {}
+            # Pheromone id -> whether its field may hold nonzero values;
+            # fields known to be all zero skip diffusion and evaporation
+            self.pheromone_dirty = {}
+            self.marks = {}  # Mark id -> mark dict, see LogoReactionModel
+            self._pheromone_scratch = {}  # Back buffers for diffusion
+            self._pheromone_halo = None  # Stencil scratch shared by the fields
+            # Constants of the per-query wrapping arithmetic
+            self._half_w = width / 2
+            self._half_h = height / 2
+            self._mask_w = _pow2_mask(width)
+            self._mask_h = _pow2_mask(height)
+        
+        def __getstate__(self):
+            # The diffusion scratch grids are reallocated on demand, so
+            # copies sent to decision workers leave them behind
+            state = self.__dict__.copy()
+            state['_pheromone_scratch'] = {}
+            state['_pheromone_halo'] = None
+            return state
         
         def add_pheromone(self, identifier, diffusion_coef=0.0, evaporation_coef=0.0,
                          default_value=0.0, min_value=0.0):
@@ -93,43 +168,162 @@ else:
             )
             self.pheromones[identifier] = pheromone
             
-            # Initialize grid
-            self.pheromone_grids[identifier] = [
-                [default_value for _ in range(self.width)]
-                for _ in range(self.height)
-            ]
+            # Initialize grid as a contiguous (height, width) float32 array
+            grid = self.pheromone_grids[identifier] = np.full(
+                (self.height, self.width), default_value, dtype=FIELD_DTYPE
+            )
+            # Cleared by the first dynamics step that finds the field empty
+            self.pheromone_dirty[identifier] = True
+            # Diffusing fields alternate with their back buffer every step
+            if diffusion_coef > 0:
+                self._pheromone_scratch[identifier] = np.empty_like(grid)
+            else:
+                self._pheromone_scratch.pop(identifier, None)
             
             return pheromone
         
-        def set_pheromone(self, x, y, identifier, value):
-            """Set pheromone value at a specific location."""
+        def has_pheromone(self, identifier):
+            """Check whether a pheromone type exists."""
+            return identifier in self.pheromones
+        
+        def _grid_cell(self, x, y):
+            """Grid cell of a position, wrapped or clamped to the grid."""
             x = int(round(x))
             y = int(round(y))
             
             if self.toroidal:
-                x = x % self.width
-                y = y % self.height
+                # Power-of-two sizes wrap with a bit mask
+                mask_w = self._mask_w
+                mask_h = self._mask_h
+                x = x & mask_w if mask_w is not None else x % self.width
+                y = y & mask_h if mask_h is not None else y % self.height
             else:
                 x = max(0, min(x, self.width - 1))
                 y = max(0, min(y, self.height - 1))
+            return x, y
+        
+        def set_pheromone(self, x, y, identifier, value):
+            """Set pheromone value at a specific location."""
+            x, y = self._grid_cell(x, y)
             
             if identifier in self.pheromone_grids:
-                self.pheromone_grids[identifier][y][x] = value
+                self.pheromone_grids[identifier][y, x] = value
+                self.pheromone_dirty[identifier] = True
+        
+        def set_pheromone_value(self, x, y, identifier, value):
+            """Set pheromone value at a specific location (same as set_pheromone)."""
+            self.set_pheromone(x, y, identifier, value)
+        
+        def diffuse(self, dt=1.0):
+            """
+            Diffuse every pheromone field to its 8 neighbours.
+            
+            Each field is written into a back buffer which is then swapped
+            with it, so no grid is allocated after the first step.
+            
+            Args:
+                dt: Time step size
+            """
+            for identifier, pheromone in self.pheromones.items():
+                if (pheromone.diffusion_coef <= 0 or
+                        not self.pheromone_dirty.get(identifier, True)):
+                    continue
+                
+                grid = self.pheromone_grids[identifier]
+                back = self._back_buffer(identifier, grid)
+                diffuse(grid, back, pheromone.diffusion_coef * dt, self.toroidal,
+                        self._halo_buffer(grid))
+                self._swap_buffers(identifier, grid, back)
+                self._settle(identifier, back)
+        
+        def _back_buffer(self, identifier, grid):
+            """Diffusion back buffer of a field, reallocated if it no longer fits."""
+            back = self._pheromone_scratch.get(identifier)
+            if (back is None or back.shape != grid.shape or
+                    back.dtype != grid.dtype):
+                back = np.empty_like(grid)
+            return back
+        
+        def _halo_buffer(self, grid):
+            """Stencil scratch of the diffusion kernels, sized for grid."""
+            self._pheromone_halo = halo_for(grid, self._pheromone_halo)
+            return self._pheromone_halo
+        
+        def _swap_buffers(self, identifier, grid, back):
+            """Make the back buffer the field and keep the old field as scratch."""
+            self.pheromone_grids[identifier] = back
+            self._pheromone_scratch[identifier] = grid
+        
+        def _settle(self, identifier, grid):
+            """
+            Mark a field clean once it is all zero, which diffusion and
+            evaporation leave unchanged, until the next deposit.
+            
+            Code writing into ``pheromone_grids`` directly rather than
+            through set_pheromone or EmitPheromone must set
+            ``pheromone_dirty[identifier]`` itself.
+            """
+            # max() is cheaper than any(); min() only runs on fields
+            # without positive values
+            if grid.max() == 0 and grid.min() == 0:
+                self.pheromone_dirty[identifier] = False
+        
+        def evaporate(self, dt=1.0):
+            """
+            Evaporate every pheromone field and zero the values below
+            the pheromone's minimum.
+            
+            Args:
+                dt: Time step size
+            """
+            for identifier, pheromone in self.pheromones.items():
+                if (pheromone.evaporation_coef <= 0 or
+                        not self.pheromone_dirty.get(identifier, True)):
+                    continue
+                
+                grid = self.pheromone_grids[identifier]
+                evaporate(grid, 1.0 - pheromone.evaporation_coef * dt,
+                          pheromone.min_value)
+                self._settle(identifier, grid)
+        
+        def diffuse_and_evaporate(self, dt=1.0):
+            """
+            Apply one diffusion then one evaporation step to every field.
+            
+            Fields that both diffuse and evaporate go through the fused
+            kernel, which makes a single pass over the grid.
+            
+            Args:
+                dt: Time step size
+            """
+            for identifier, pheromone in self.pheromones.items():
+                if not self.pheromone_dirty.get(identifier, True):
+                    continue
+                rate = pheromone.diffusion_coef * dt
+                factor = 1.0 - pheromone.evaporation_coef * dt
+                grid = self.pheromone_grids[identifier]
+                
+                if pheromone.diffusion_coef > 0:
+                    back = self._back_buffer(identifier, grid)
+                    if pheromone.evaporation_coef > 0:
+                        diffuse_evaporate(grid, back, rate, factor,
+                                          pheromone.min_value, self.toroidal,
+                                          self._halo_buffer(grid))
+                    else:
+                        diffuse(grid, back, rate, self.toroidal,
+                                self._halo_buffer(grid))
+                    self._swap_buffers(identifier, grid, back)
+                    self._settle(identifier, back)
+                elif pheromone.evaporation_coef > 0:
+                    evaporate(grid, factor, pheromone.min_value)
+                    self._settle(identifier, grid)
         
         def get_pheromone_value(self, x, y, identifier):
             """Get pheromone value at a specific location."""
-            x = int(round(x))
-            y = int(round(y))
-            
-            if self.toroidal:
-                x = x % self.width
-                y = y % self.height
-            else:
-                x = max(0, min(x, self.width - 1))
-                y = max(0, min(y, self.height - 1))
+            x, y = self._grid_cell(x, y)
             
             if identifier in self.pheromone_grids:
-                return self.pheromone_grids[identifier][y][x]
+                return float(self.pheromone_grids[identifier][y, x])
             return 0.0
         
         def random_position(self):
@@ -143,6 +337,18 @@ else:
             """Generate a random heading (angle in radians)."""
             return random.uniform(0, MathUtil.TWO_PI)
         
+        def random_positions(self, n):
+            """Generate n random positions as an (n, 2) array of (x, y)."""
+            return _random_positions(self, n)
+        
+        def random_headings(self, n):
+            """Generate n random headings as an (n,) array of radians."""
+            return _random_headings(n)
+        
+        def get_distances(self, from_pos, xs, ys):
+            """Distances from from_pos to every (xs[i], ys[i]), as an array."""
+            return _distances(self, from_pos, xs, ys)
+        
         def get_distance(self, pos1, pos2):
             """Calculate distance between two positions."""
             dx = abs(pos1.x - pos2.x)
@@ -160,9 +366,9 @@ else:
             dy = to_pos.y - from_pos.y
             
             if self.toroidal:
-                if abs(dx) > self.width / 2:
+                if abs(dx) > self._half_w:
                     dx = dx - self.width if dx > 0 else dx + self.width
-                if abs(dy) > self.height / 2:
+                if abs(dy) > self._half_h:
                     dy = dy - self.height if dy > 0 else dy + self.height
             
             return math.atan2(dx, -dy)  # Logo uses y-down, heading 0 = north
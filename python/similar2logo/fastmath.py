@@ -7,6 +7,8 @@ when available, with automatic fallback to Python's math module.
 
 import math as _stdlib_math
 
+import numpy as _np
+
 # Try to import C++ FastMath
 _use_cpp_fastmath = False
 try:
@@ -15,6 +17,20 @@ try:
 except ImportError:
     _CppFastMath = None
 
+# Scalar functions, specialized once for the available backend
+if _use_cpp_fastmath:
+    _sin = _CppFastMath.sin
+    _cos = _CppFastMath.cos
+    _sqrt = _CppFastMath.sqrt
+else:
+    _sin = _stdlib_math.sin
+    _cos = _stdlib_math.cos
+    _sqrt = _stdlib_math.sqrt
+
+_PI = _stdlib_math.pi
+_TWO_PI = 2 * _stdlib_math.pi
+_remainder = _stdlib_math.remainder
+
 
 class FastMath:
     """
@@ -36,85 +52,76 @@ class FastMath:
     TWO_PI = 2 * _stdlib_math.pi
     HALF_PI = _stdlib_math.pi / 2
     
-    @staticmethod
-    def sin(radians: float) -> float:
-        """
-        Fast sine function.
-        
-        Uses C++ lookup table if available, otherwise Python's math.sin.
-        
-        Args:
-            radians: Angle in radians
-            
-        Returns:
-            Sine value
-        """
-        if _use_cpp_fastmath:
-            return _CppFastMath.sin(radians)
-        return _stdlib_math.sin(radians)
+    # The implementations are chosen once at import time, so a call is a
+    # single C function call with no Python wrapper or backend check.
+    
+    # Sine and cosine of an angle in radians, from the C++ lookup table
+    # when available, otherwise math.sin / math.cos
+    sin = staticmethod(_sin)
+    cos = staticmethod(_cos)
+    
+    # Square root of a non-negative number
+    sqrt = staticmethod(_sqrt)
+    
+    # Arc tangent of y/x in radians
+    atan2 = staticmethod(_stdlib_math.atan2)
     
     @staticmethod
-    def cos(radians: float) -> float:
+    def sin_arr(radians, out=None):
         """
-        Fast cosine function.
-        
-        Uses C++ lookup table if available, otherwise Python's math.cos.
+        Element-wise sine of an array of angles.
         
         Args:
-            radians: Angle in radians
+            radians: NumPy array of angles in radians
+            out: Optional array receiving the result
             
         Returns:
-            Cosine value
+            NumPy array of sine values
         """
-        if _use_cpp_fastmath:
-            return _CppFastMath.cos(radians)
-        return _stdlib_math.cos(radians)
+        return _np.sin(radians, out=out)
     
     @staticmethod
-    def sqrt(value: float) -> float:
+    def cos_arr(radians, out=None):
         """
-        Fast square root.
+        Element-wise cosine of an array of angles.
         
         Args:
-            value: Non-negative number
+            radians: NumPy array of angles in radians
+            out: Optional array receiving the result
             
         Returns:
-            Square root
+            NumPy array of cosine values
         """
-        if _use_cpp_fastmath:
-            return _CppFastMath.sqrt(value)
-        return _stdlib_math.sqrt(value)
+        return _np.cos(radians, out=out)
     
     @staticmethod
-    def atan2(y: float, x: float) -> float:
+    def normalize_angle(angle: float) -> float:
         """
-        Arc tangent of y/x in radians.
+        Normalize angle to [-PI, PI].
+        
+        Uses the IEEE-754 remainder, a single C call whatever the input
+        magnitude.
         
         Args:
-            y: Y coordinate
-            x: X coordinate
+            angle: Angle in radians
             
         Returns:
-            Angle in radians
+            Normalized angle
         """
-        return _stdlib_math.atan2(y, x)
+        return _remainder(angle, _TWO_PI)
     
     @staticmethod
-    def normalize_angle(angle: float) -> float:
+    def normalize_angle_arr(angles):
         """
-        Normalize angle to [-PI, PI].
+        Normalize an array of angles to [-PI, PI).
         
         Args:
-            angle: Angle in radians
+            angles: NumPy array of angles in radians
             
         Returns:
-            Normalized angle
+            NumPy array of normalized angles
         """
-        while angle > FastMath.PI:
-            angle -= FastMath.TWO_PI
-        while angle < -FastMath.PI:
-            angle += FastMath.TWO_PI
-        return angle
+        return _np.mod(angles + _PI, _TWO_PI) - _PI
     
     @staticmethod
     def degrees_to_radians(degrees: float) -> float:
@@ -137,7 +144,10 @@ sin = FastMath.sin
 cos = FastMath.cos
 sqrt = FastMath.sqrt
 atan2 = FastMath.atan2
+sin_arr = FastMath.sin_arr
+cos_arr = FastMath.cos_arr
 normalize_angle = FastMath.normalize_angle
+normalize_angle_arr = FastMath.normalize_angle_arr
 PI = FastMath.PI
 TWO_PI = FastMath.TWO_PI
 HALF_PI = FastMath.HALF_PI
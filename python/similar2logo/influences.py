@@ -9,6 +9,10 @@ This module uses C++ implementations when available for better performance.
 
 from abc import ABC, abstractmethod
 from typing import Any, Optional
+import threading
+
+import numpy as np
+
 from .tools import Point2D
 
 # Try to import C++ influence classes
@@ -26,6 +30,8 @@ except (ImportError, AttributeError):
 class IInfluence(ABC):
     """Base interface for all influences."""
     
+    __slots__ = ()
+    
     @abstractmethod
     def get_category(self) -> str:
         """Get the category of this influence."""
@@ -35,6 +41,8 @@ class IInfluence(ABC):
 class RegularInfluence(IInfluence):
     """Base class for regular (agent-initiated) influences."""
     
+    __slots__ = ('source_agent', 'agent', 'time_stamp')
+    
     def __init__(self, source_agent=None):
         self.source_agent = source_agent
         self.time_stamp = None
@@ -46,15 +54,109 @@ class RegularInfluence(IInfluence):
 class SystemInfluence(IInfluence):
     """Base class for system influences."""
     
+    __slots__ = ()
+    
     def get_category(self) -> str:
         return "SYSTEM"
 
 
+# ============================================================================
+# Influence Pools
+# ============================================================================
+
+# Default maximum number of free influences kept per pooled class
+POOL_LIMIT = 4096
+
+
+class _PooledInfluence(RegularInfluence):
+    """
+    Regular influence recycled through a per-class free list.
+    
+    acquire() reuses a released instance when one is available, and
+    release() hands the instance back once the reaction is done with it,
+    so steady-state steps allocate no new influence objects. Subclasses
+    define their own ``_pool`` list and ``_reset()``.
+    
+    Only influences obtained from acquire() are ever pooled: one built
+    directly may be kept and returned again by its agent. Releasing an
+    influence that is already in its pool does nothing, so an influence
+    listed twice is never handed out to two agents.
+    """
+    
+    __slots__ = ('_from_pool', '_pooled')
+    
+    _pool = []
+    
+    def __init__(self, source_agent=None):
+        super().__init__(source_agent)
+        self._from_pool = False
+        self._pooled = False
+    
+    @classmethod
+    def acquire(cls, agent, *args, **kwargs):
+        """Get an influence from the pool, or build a new one."""
+        try:
+            influence = cls._pool.pop()
+        except IndexError:
+            influence = cls(agent, *args, **kwargs)
+            influence._from_pool = True
+            return influence
+        influence._pooled = False
+        influence.source_agent = agent
+        influence.agent = agent
+        influence._reset(*args, **kwargs)
+        return influence
+    
+    def release(self, limit=POOL_LIMIT):
+        """Return this influence to its pool; it must not be used afterwards."""
+        pool = type(self)._pool
+        if self._from_pool and not self._pooled and len(pool) < limit:
+            self._pooled = True
+            self.source_agent = None
+            self.agent = None
+            self.time_stamp = None
+            pool.append(self)
+    
+    @classmethod
+    def release_all(cls, influences, limit=POOL_LIMIT):
+        """
+        Return a list of influences of exactly this class to the pool,
+        like calling release() on each of them.
+        """
+        pool = cls._pool
+        room = limit - len(pool)
+        append = pool.append
+        for influence in influences:
+            if room <= 0:
+                break
+            if influence._pooled or not influence._from_pool:
+                continue
+            influence._pooled = True
+            influence.source_agent = None
+            influence.agent = None
+            influence.time_stamp = None
+            append(influence)
+            room -= 1
+
+
+def release_influences(influences, limit=POOL_LIMIT):
+    """
+    Return every pooled influence of a list to its pool.
+    
+    Args:
+        influences: Iterable of influences whose reaction is complete
+        limit: Maximum number of free instances kept per class
+    """
+    for influence in influences:
+        if isinstance(influence, _PooledInfluence):
+            influence.release(limit)
+
+
 # ============================================================================
 # Agent Movement Influences (Python Fallback)
 # ============================================================================
 
-class _PyChangePosition(RegularInfluence):
+class _PyChangePosition(_PooledInfluence):
     """
     Python implementation of ChangePosition influence.
     
@@ -65,6 +167,10 @@ class _PyChangePosition(RegularInfluence):
         target_position: Optional absolute target position
     """
     
+    __slots__ = ('dx', 'dy', 'target_position')
+    
+    _pool = []
+    
     def __init__(self, agent, dx: float = 0.0, dy: float = 0.0, 
                  target_position: Optional[Point2D] = None):
         super().__init__(agent)
@@ -73,13 +179,19 @@ class _PyChangePosition(RegularInfluence):
         self.dy = dy
         self.target_position = target_position
     
+    def _reset(self, dx: float = 0.0, dy: float = 0.0,
+               target_position: Optional[Point2D] = None):
+        self.dx = dx
+        self.dy = dy
+        self.target_position = target_position
+    
     def __repr__(self):
         if self.target_position:
             return f"ChangePosition(agent={self.agent}, target={self.target_position})"
         return f"ChangePosition(agent={self.agent}, dx={self.dx}, dy={self.dy})"
 
 
-class _PyChangeDirection(RegularInfluence):
+class _PyChangeDirection(_PooledInfluence):
     """
     Python implementation of ChangeDirection influence.
     
@@ -89,6 +201,10 @@ class _PyChangeDirection(RegularInfluence):
         target_heading: Optional absolute target heading
     """
     
+    __slots__ = ('delta_heading', 'target_heading')
+    
+    _pool = []
+    
     def __init__(self, agent, delta_heading: float = 0.0,
                  target_heading: Optional[float] = None):
         super().__init__(agent)
@@ -96,13 +212,18 @@ class _PyChangeDirection(RegularInfluence):
         self.delta_heading = delta_heading
         self.target_heading = target_heading
     
+    def _reset(self, delta_heading: float = 0.0,
+               target_heading: Optional[float] = None):
+        self.delta_heading = delta_heading
+        self.target_heading = target_heading
+    
     def __repr__(self):
         if self.target_heading is not None:
             return f"ChangeDirection(agent={self.agent}, target={self.target_heading})"
         return f"ChangeDirection(agent={self.agent}, delta={self.delta_heading})"
 
 
-class _PyChangeSpeed(RegularInfluence):
+class _PyChangeSpeed(_PooledInfluence):
     """
     Python implementation of ChangeSpeed influence.
     
@@ -112,12 +233,21 @@ class _PyChangeSpeed(RegularInfluence):
         target_speed: Optional absolute target speed
     """
     
+    __slots__ = ('delta_speed', 'target_speed')
+    
+    _pool = []
+    
     def __init__(self, agent, delta_speed: float = 0.0,
                  target_speed: Optional[float] = None):
         super().__init__(agent)
         self.agent = agent
         self.delta_speed = delta_speed
         self.target_speed = target_speed
+    
+    def _reset(self, delta_speed: float = 0.0,
+               target_speed: Optional[float] = None):
+        self.delta_speed = delta_speed
+        self.target_speed = target_speed
 
 
 class _PyChangeAcceleration(RegularInfluence):
@@ -130,6 +260,8 @@ class _PyChangeAcceleration(RegularInfluence):
         target_acceleration: Optional absolute target acceleration
     """
     
+    __slots__ = ('delta_acceleration', 'target_acceleration')
+    
     def __init__(self, agent, delta_acceleration: float = 0.0,
                  target_acceleration: Optional[float] = None):
         super().__init__(agent)
@@ -146,6 +278,8 @@ class _PyStop(RegularInfluence):
         agent: The agent requesting to stop
     """
     
+    __slots__ = ()
+    
     def __init__(self, agent):
         super().__init__(agent)
         self.agent = agent
@@ -166,6 +300,8 @@ class DropMark(RegularInfluence):
         category: Optional category for the mark
     """
     
+    __slots__ = ('position', 'content', 'category')
+    
     def __init__(self, agent, position: Point2D, content: Any,
                  category: str = "default"):
         super().__init__(agent)
@@ -187,6 +323,8 @@ class RemoveMark(RegularInfluence):
         mark_id: Identifier of the mark to remove
     """
     
+    __slots__ = ('mark_id',)
+    
     def __init__(self, agent, mark_id):
         super().__init__(agent)
         self.agent = agent
@@ -204,6 +342,8 @@ class RemoveMarks(RegularInfluence):
         radius: Optional radius around position
     """
     
+    __slots__ = ('category', 'position', 'radius')
+    
     def __init__(self, agent, category: str = "default",
                  position: Optional[Point2D] = None,
                  radius: Optional[float] = None):
@@ -225,6 +365,8 @@ class EmitPheromone(RegularInfluence):
         amount: Amount of pheromone to emit
     """
     
+    __slots__ = ('position', 'pheromone_id', 'amount')
+    
     def __init__(self, agent, position: Point2D, pheromone_id: str,
                  amount: float):
         super().__init__(agent)
@@ -249,6 +391,8 @@ class AgentPositionUpdate(SystemInfluence):
     based on their velocity, acceleration, etc.
     """
     
+    __slots__ = ('agent', 'new_position')
+    
     def __init__(self, agent, new_position: Point2D):
         super().__init__()
         self.agent = agent
@@ -262,6 +406,8 @@ class PheromoneFieldUpdate(SystemInfluence):
     This triggers diffusion and evaporation of pheromones.
     """
     
+    __slots__ = ('environment',)
+    
     def __init__(self, environment):
         super().__init__()
         self.environment = environment
@@ -276,6 +422,8 @@ class SystemInfluenceAddAgent(SystemInfluence):
         level: The level to add the agent to
     """
     
+    __slots__ = ('agent', 'level')
+    
     def __init__(self, agent, level: str = "LOGO"):
         super().__init__()
         self.agent = agent
@@ -291,6 +439,8 @@ class SystemInfluenceRemoveAgent(SystemInfluence):
         level: The level to remove the agent from
     """
     
+    __slots__ = ('agent', 'level')
+    
     def __init__(self, agent, level: str = "LOGO"):
         super().__init__()
         self.agent = agent
@@ -332,40 +482,192 @@ else:
 # Influence Collection
 # ============================================================================
 
+# Kinds of the rows of an InfluenceBuffer
+KIND_MOVE = 0
+KIND_TURN = 1
+KIND_SPEED = 2
+KIND_STOP = 3
+
+
+class InfluenceBuffer:
+    """
+    Columnar buffer of relative movement influences.
+    
+    Instead of one influence object per move, turn, speed change or stop, agents
+    push rows into preallocated arrays, and the reaction model applies
+    each kind with a few NumPy operations. Rows refer to agents by their
+    index in ``agents``.
+    
+    Columns:
+        kind: KIND_MOVE, KIND_TURN, KIND_SPEED or KIND_STOP (uint8)
+        agent_idx: Index of the agent in ``agents`` (int32)
+        dxdy: Position change of KIND_MOVE rows (float32, shape (n, 2))
+        dh: Heading change of KIND_TURN rows, speed change of
+            KIND_SPEED rows, unused by KIND_STOP rows (float32)
+    
+    Args:
+        agents: Sequence of agents indexed by agent_idx
+        capacity: Initial number of rows; the buffer grows when full
+    """
+    
+    def __init__(self, agents=(), capacity=1024):
+        capacity = max(1, capacity)
+        self.agents = agents
+        self.dxdy = np.zeros((capacity, 2), np.float32)
+        self.dh = np.zeros(capacity, np.float32)
+        self.kind = np.zeros(capacity, np.uint8)
+        self.agent_idx = np.zeros(capacity, np.int32)
+        self.n = 0
+        # Decisions may run on a thread pool
+        self._lock = threading.Lock()
+    
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+    
+    def _grow(self):
+        capacity = 2 * len(self.kind)
+        self.dxdy = np.resize(self.dxdy, (capacity, 2))
+        self.dh = np.resize(self.dh, capacity)
+        self.kind = np.resize(self.kind, capacity)
+        self.agent_idx = np.resize(self.agent_idx, capacity)
+    
+    def _push(self, kind, idx, a, b=0.0):
+        with self._lock:
+            i = self.n
+            if i == len(self.kind):
+                self._grow()
+            self.kind[i] = kind
+            self.agent_idx[i] = idx
+            if kind == KIND_MOVE:
+                self.dxdy[i, 0] = a
+                self.dxdy[i, 1] = b
+            else:
+                self.dh[i] = a
+            self.n = i + 1
+    
+    def push_move(self, idx: int, dx: float, dy: float):
+        """Move agent ``idx`` by (dx, dy)."""
+        self._push(KIND_MOVE, idx, dx, dy)
+    
+    def push_turn(self, idx: int, delta_heading: float):
+        """Turn agent ``idx`` by delta_heading radians."""
+        self._push(KIND_TURN, idx, delta_heading)
+    
+    def push_speed(self, idx: int, delta_speed: float):
+        """Change the speed of agent ``idx`` by delta_speed."""
+        self._push(KIND_SPEED, idx, delta_speed)
+    
+    def push_stop(self, idx: int):
+        """Stop agent ``idx``, like a Stop influence."""
+        self._push(KIND_STOP, idx, 0.0)
+    
+    def select(self, kind):
+        """
+        Rows of one kind.
+        
+        Returns:
+            tuple: (agent_idx, values) arrays, values being the dxdy rows
+            for KIND_MOVE and the dh entries otherwise
+        """
+        n = self.n
+        mask = self.kind[:n] == kind
+        values = self.dxdy[:n] if kind == KIND_MOVE else self.dh[:n]
+        return self.agent_idx[:n][mask], values[mask]
+    
+    def clear(self, agents=None):
+        """Empty the buffer, optionally rebinding it to a new agent list."""
+        if agents is not None:
+            self.agents = agents
+        self.n = 0
+    
+    def __len__(self):
+        return self.n
+    
+    def __repr__(self):
+        return f"InfluenceBuffer(rows={self.n}, capacity={len(self.kind)})"
+
+
 class InfluencesMap:
     """
     Container for collecting and organizing influences.
     
     Influences are organized by category (REGULAR, SYSTEM) and type.
+    Relative movement influences may also be collected in an
+    InfluenceBuffer attached as ``buffer``.
     """
     
-    def __init__(self):
+    def __init__(self, buffer: Optional[InfluenceBuffer] = None):
         self.regular_influences = []
         self.system_influences = []
+        # Influence class -> (bucket of that class, category list)
         self._influences_by_type = {}
+        # Class name -> classes of that name seen so far, for get_by_type
+        self._classes_by_name = {}
+        self.buffer = buffer
+    
+    def _targets(self, influence_type):
+        """Lists an influence of the given class is added to."""
+        targets = (
+            [],
+            self.system_influences if issubclass(influence_type, SystemInfluence)
+            else self.regular_influences
+        )
+        self._influences_by_type[influence_type] = targets
+        self._classes_by_name.setdefault(
+            influence_type.__name__, []
+        ).append(influence_type)
+        return targets
     
     def add(self, influence: IInfluence):
         """Add an influence to the map."""
-        if isinstance(influence, SystemInfluence):
-            self.system_influences.append(influence)
-        else:
-            self.regular_influences.append(influence)
-        
-        # Also organize by type
-        influence_type = type(influence).__name__
-        if influence_type not in self._influences_by_type:
-            self._influences_by_type[influence_type] = []
-        self._influences_by_type[influence_type].append(influence)
+        influence_type = type(influence)
+        targets = (self._influences_by_type.get(influence_type) or
+                   self._targets(influence_type))
+        targets[1].append(influence)
+        targets[0].append(influence)
     
     def add_all(self, influences):
         """Add multiple influences."""
+        by_type = self._influences_by_type
         for influence in influences:
-            self.add(influence)
+            influence_type = type(influence)
+            targets = by_type.get(influence_type) or self._targets(influence_type)
+            targets[1].append(influence)
+            targets[0].append(influence)
+    
+    def add_all_same_type(self, influence_type, influences):
+        """
+        Add influences that are all instances of exactly influence_type,
+        classifying them once for the whole batch.
+        """
+        targets = (self._influences_by_type.get(influence_type) or
+                   self._targets(influence_type))
+        targets[1].extend(influences)
+        targets[0].extend(influences)
     
     def get_by_type(self, influence_type):
-        """Get all influences of a specific type."""
-        type_name = influence_type.__name__ if hasattr(influence_type, '__name__') else str(influence_type)
-        return self._influences_by_type.get(type_name, [])
+        """Get all influences of a specific type, given as a class or a class name."""
+        targets = self._influences_by_type.get(influence_type)
+        if targets is not None:
+            return targets[0]
+        if isinstance(influence_type, type):
+            return []
+        # Class names match every class of that name
+        by_type = self._influences_by_type
+        matches = [
+            by_type[cls][0]
+            for cls in self._classes_by_name.get(influence_type, ())
+            if by_type[cls][0]
+        ]
+        if len(matches) == 1:
+            return matches[0]
+        return [influence for bucket in matches for influence in bucket]
     
     def get_all_regular(self):
         """Get all regular influences."""
@@ -375,14 +677,31 @@ class InfluencesMap:
         """Get all system influences."""
         return self.system_influences
     
-    def clear(self):
-        """Clear all influences."""
+    def clear(self, pool_limit: Optional[int] = None):
+        """
+        Clear all influences, keeping the containers for reuse.
+        
+        Args:
+            pool_limit: When given, the pooled regular influences are
+                returned to their pools, keeping at most this many free
+                instances per class. Only pass it once nothing refers to
+                the influences any more.
+        """
+        for influence_type, (bucket, _) in self._influences_by_type.items():
+            if bucket:
+                # Each bucket holds a single class, released as a batch
+                if (pool_limit is not None and
+                        issubclass(influence_type, _PooledInfluence)):
+                    influence_type.release_all(bucket, pool_limit)
+                bucket.clear()
         self.regular_influences.clear()
         self.system_influences.clear()
-        self._influences_by_type.clear()
+        if self.buffer is not None:
+            self.buffer.clear()
     
     def __len__(self):
-        return len(self.regular_influences) + len(self.system_influences)
+        buffered = len(self.buffer) if self.buffer is not None else 0
+        return len(self.regular_influences) + len(self.system_influences) + buffered
     
     def __repr__(self):
         backend = "C++" if _USING_CPP else "Python"
@@ -429,5 +748,11 @@ __all__ = [
     
     # Utilities
     'InfluencesMap',
+    'InfluenceBuffer',
+    'KIND_MOVE',
+    'KIND_TURN',
+    'KIND_SPEED',
+    'KIND_STOP',
+    'release_influences',
     'get_backend_info',
 ]
@@ -6,11 +6,18 @@ This implements the proper SIMILAR influence/reaction architecture.
 
 import random
 import math
+import numbers
+from collections.abc import MutableMapping
 from typing import List
+
+import numpy as np
 from .tools import Point2D, MathUtil
 from .environment import Environment
 from .influences import *
 from .reaction import LogoReactionModel
+from .spatial import MarkGrid
+from ._kernels import advance, apply_deltas, random_walk, random_walk_range
+from .probes import ProbeContext
 
 try:
     from ._core.environment import TurtlePLS
@@ -26,6 +33,40 @@ try:
 except ImportError:
     HAS_CPP_CORE = False
 
+# Influence constructors, drawing from the influence pools when the
+# Python implementations are in use
+_new_change_position = getattr(ChangePosition, 'acquire', ChangePosition)
+_new_change_direction = getattr(ChangeDirection, 'acquire', ChangeDirection)
+_new_change_speed = getattr(ChangeSpeed, 'acquire', ChangeSpeed)
+
+# Storage type of the structure-of-arrays turtle state
+STATE_DTYPE = np.float32
+
+# Initial number of (turtle, neighbour) pairs of the neighbour buffers
+NEIGHBOR_BUFFER_SIZE = 1 << 14
+
+# Shared empty perception arrays for turtles without neighbours
+_NO_POSITIONS = np.empty((0, 2))
+_NO_DISTANCES = np.empty(0)
+_NO_FIELD = np.zeros((0, 0), dtype=np.float32)
+
+
+def sleep_decision(turtle, decided):
+    """
+    Influences of a decide() result returned as (influences, wake_step),
+    which also puts the turtle to sleep until step ``wake_step``; any
+    other result is returned as it is.
+    
+    Any integer, NumPy ones included, is a wake step, but a bool is not.
+    """
+    if len(decided) == 2:
+        wake_step = decided[1]
+        if (isinstance(wake_step, numbers.Integral) and
+                not isinstance(wake_step, bool)):
+            turtle.next_wake_step = int(wake_step)
+            return decided[0]
+    return decided
+
 
 class Turtle:
     """
@@ -48,8 +89,46 @@ class Turtle:
         ...         influences.append(self.influence_move_forward(1.0))
         ...         influences.append(self.influence_turn(0.1))
         ...         return influences
+    
+    A class whose decide() can be computed for all its turtles at once
+    sets ``VECTORIZED_DECIDE = True`` and provides that computation as
+    ``decide_kernel``, or as ``decide_compiled`` working on a range of
+    turtles so that threads can share the population (see
+    LogoSimulation.step_vectorized()). The random walk is available as
+    ``random_walk_kernel`` and ``random_walk_compiled``:
+    
+        >>> class Walker(Turtle):
+        ...     VECTORIZED_DECIDE = True
+        ...     decide_compiled = Turtle.random_walk_compiled
+        ...     def decide(self, perception):
+        ...         return self.random_walk_influences()
+    
+    A turtle with nothing to do for a while returns
+    ``(influences, wake_step)`` from decide(): it is then neither
+    perceived for nor asked to decide until step ``wake_step``, though
+    the other turtles still perceive it.
     """
     
+    # Vectorized decision, see LogoSimulation.step_vectorized()
+    VECTORIZED_DECIDE = False
+    decide_kernel = None
+    decide_compiled = None
+    # Name of the pheromone field passed to decide_kernel
+    VECTORIZED_PHEROMONE = None
+    # random_walk_influences() for a whole population, or for a range of it
+    random_walk_kernel = staticmethod(random_walk)
+    random_walk_compiled = staticmethod(random_walk_range)
+    # Subclasses without __slots__ get a __dict__ for their own attributes
+    __slots__ = (
+        '_position', '_heading', '_color', '_speed', '_pen_down',
+        'acceleration', '_environment', '_idx', '_pls',
+        # (heading, sin, cos) of the last heading used by _trig()
+        '_trig_cache',
+        # First step at which the turtle decides again, see decide()
+        'next_wake_step',
+        '__weakref__',
+    )
+    
     def __init__(self, position=None, heading=0.0, color="black", **kwargs):
         if position is None:
             self._position = Point2D(0, 0)
@@ -63,7 +142,9 @@ class Turtle:
         self._pen_down = False
         self.acceleration = 0.0
         self._environment = None
-        self._id = id(self)  # Unique identifier
+        self._idx = -1  # Index in the simulation's turtle list, -1 if none
+        self._trig_cache = None
+        self.next_wake_step = 0
         
         if HAS_CPP_CORE:
             from ._core import Point2D as CppPoint2D
@@ -104,6 +185,21 @@ class Turtle:
         if HAS_CPP_CORE and hasattr(self, '_pls'):
             self._pls.set_heading(value)
         self._heading = value
+        self._trig_cache = None
+    
+    def _trig(self):
+        """
+        Sine and cosine of the current heading, computed once per heading.
+        
+        The cache is dropped by the heading setter and also checked
+        against the heading, which the C++ core may change on its own.
+        """
+        heading = self.heading
+        cache = self._trig_cache
+        if cache is None or cache[0] != heading:
+            cache = (heading, math.sin(heading), math.cos(heading))
+            self._trig_cache = cache
+        return cache[1], cache[2]
 
     @property
     def speed(self):
@@ -158,13 +254,18 @@ class Turtle:
                 - 'marks': Marks at current location
         
         Returns:
-            List of IInfluence objects representing intended actions
+            List of IInfluence objects representing intended actions, or
+            a tuple (influences, wake_step) to skip the turtle's perception
+            and decision until step wake_step
         """
         return []
     
     # ========================================================================
     # Influence Creation Methods
     # ========================================================================
+    # These build Python influences. When the C++ core is available they
+    # are replaced at import time by the C++ variants defined after the
+    # class, so no call checks the backend.
     
     def influence_move_forward(self, distance: float):
         """
@@ -176,15 +277,14 @@ class Turtle:
         Returns:
             ChangePosition influence
         """
-        if HAS_CPP_CORE and hasattr(self, '_pls'):
-            dx = math.sin(self.heading) * distance
-            dy = -math.cos(self.heading) * distance
-            t = SimulationTimeStamp(0)
-            return CppChangePosition(t, t, dx, dy, self._pls)
-            
-        dx = math.sin(self.heading) * distance
-        dy = -math.cos(self.heading) * distance
-        return ChangePosition(self, dx=dx, dy=dy)
+        # Inlined _trig(): the method call would cost more than it saves
+        heading = self.heading
+        cache = self._trig_cache
+        if cache is None or cache[0] != heading:
+            cache = (heading, math.sin(heading), math.cos(heading))
+            self._trig_cache = cache
+        return _new_change_position(self, dx=cache[1] * distance,
+                                    dy=-cache[2] * distance)
     
     def influence_move_to(self, target: Point2D):
         """
@@ -196,13 +296,7 @@ class Turtle:
         Returns:
             ChangePosition influence
         """
-        if HAS_CPP_CORE and hasattr(self, '_pls'):
-            dx = target.x - self.position.x
-            dy = target.y - self.position.y
-            t = SimulationTimeStamp(0)
-            return CppChangePosition(t, t, dx, dy, self._pls)
-            
-        return ChangePosition(self, target_position=target)
+        return _new_change_position(self, target_position=target)
     
     def influence_turn(self, angle: float):
         """
@@ -214,11 +308,7 @@ class Turtle:
         Returns:
             ChangeDirection influence
         """
-        if HAS_CPP_CORE and hasattr(self, '_pls'):
-            t = SimulationTimeStamp(0)
-            return CppChangeDirection(t, t, angle, self._pls)
-            
-        return ChangeDirection(self, delta_heading=angle)
+        return _new_change_direction(self, delta_heading=angle)
     
     def influence_turn_towards(self, target_heading: float):
         """
@@ -230,12 +320,7 @@ class Turtle:
         Returns:
             ChangeDirection influence
         """
-        if HAS_CPP_CORE and hasattr(self, '_pls'):
-            dd = MathUtil.normalize_angle(target_heading - self.heading)
-            t = SimulationTimeStamp(0)
-            return CppChangeDirection(t, t, dd, self._pls)
-            
-        return ChangeDirection(self, target_heading=target_heading)
+        return _new_change_direction(self, target_heading=target_heading)
     
     def influence_set_speed(self, speed: float):
         """
@@ -247,12 +332,7 @@ class Turtle:
         Returns:
             ChangeSpeed influence
         """
-        if HAS_CPP_CORE and hasattr(self, '_pls'):
-            ds = speed - self.speed
-            t = SimulationTimeStamp(0)
-            return CppChangeSpeed(t, t, ds, self._pls)
-            
-        return ChangeSpeed(self, target_speed=speed)
+        return _new_change_speed(self, target_speed=speed)
     
     def influence_change_speed(self, delta_speed: float):
         """
@@ -264,11 +344,7 @@ class Turtle:
         Returns:
             ChangeSpeed influence
         """
-        if HAS_CPP_CORE and hasattr(self, '_pls'):
-            t = SimulationTimeStamp(0)
-            return CppChangeSpeed(t, t, delta_speed, self._pls)
-            
-        return ChangeSpeed(self, delta_speed=delta_speed)
+        return _new_change_speed(self, delta_speed=delta_speed)
     
     def influence_stop(self):
         """
@@ -277,10 +353,6 @@ class Turtle:
         Returns:
             Stop influence
         """
-        if HAS_CPP_CORE and hasattr(self, '_pls'):
-            t = SimulationTimeStamp(0)
-            return CppStop(t, t, self._pls)
-            
         return Stop(self)
     
     def influence_emit_pheromone(self, pheromone_id: str, 
@@ -295,10 +367,6 @@ class Turtle:
         Returns:
             EmitPheromone influence
         """
-        if HAS_CPP_CORE and hasattr(self, '_pls'):
-            t = SimulationTimeStamp(0)
-            return CppEmitPheromone(t, t, self._pls.get_location(), pheromone_id, amount)
-            
         return EmitPheromone(self, self.position, pheromone_id, amount)
     
     def influence_drop_mark(self, content, category: str = "default") -> DropMark:
@@ -355,6 +423,289 @@ class Turtle:
         return f"Turtle(pos={self.position.to_tuple()}, heading={self.heading:.2f})"
 
 
+if HAS_CPP_CORE:
+    # Time stamp of every influence created for the C++ core; time stamps
+    # are immutable values, so one instance is shared
+    _ZERO_TS = SimulationTimeStamp(0)
+    
+    # Python variants, used by turtles without a C++ state (subclasses
+    # that do not call Turtle.__init__)
+    _PY_INFLUENCES = {
+        name: vars(Turtle)[name] for name in (
+            'influence_move_forward', 'influence_move_to', 'influence_turn',
+            'influence_turn_towards', 'influence_set_speed',
+            'influence_change_speed', 'influence_stop',
+            'influence_emit_pheromone',
+        )
+    }
+    
+    def _cpp_move_forward(self, distance):
+        try:
+            pls = self._pls
+        except AttributeError:
+            return _PY_INFLUENCES['influence_move_forward'](self, distance)
+        sin_h, cos_h = self._trig()
+        return CppChangePosition(_ZERO_TS, _ZERO_TS, sin_h * distance,
+                                 -cos_h * distance, pls)
+    
+    def _cpp_move_to(self, target):
+        try:
+            pls = self._pls
+        except AttributeError:
+            return _PY_INFLUENCES['influence_move_to'](self, target)
+        position = self.position
+        return CppChangePosition(_ZERO_TS, _ZERO_TS, target.x - position.x,
+                                 target.y - position.y, pls)
+    
+    def _cpp_turn(self, angle):
+        try:
+            pls = self._pls
+        except AttributeError:
+            return _PY_INFLUENCES['influence_turn'](self, angle)
+        return CppChangeDirection(_ZERO_TS, _ZERO_TS, angle, pls)
+    
+    def _cpp_turn_towards(self, target_heading):
+        try:
+            pls = self._pls
+        except AttributeError:
+            return _PY_INFLUENCES['influence_turn_towards'](self, target_heading)
+        dd = MathUtil.normalize_angle(target_heading - self.heading)
+        return CppChangeDirection(_ZERO_TS, _ZERO_TS, dd, pls)
+    
+    def _cpp_set_speed(self, speed):
+        try:
+            pls = self._pls
+        except AttributeError:
+            return _PY_INFLUENCES['influence_set_speed'](self, speed)
+        return CppChangeSpeed(_ZERO_TS, _ZERO_TS, speed - self.speed, pls)
+    
+    def _cpp_change_speed(self, delta_speed):
+        try:
+            pls = self._pls
+        except AttributeError:
+            return _PY_INFLUENCES['influence_change_speed'](self, delta_speed)
+        return CppChangeSpeed(_ZERO_TS, _ZERO_TS, delta_speed, pls)
+    
+    def _cpp_stop(self):
+        try:
+            pls = self._pls
+        except AttributeError:
+            return _PY_INFLUENCES['influence_stop'](self)
+        return CppStop(_ZERO_TS, _ZERO_TS, pls)
+    
+    def _cpp_emit_pheromone(self, pheromone_id, amount):
+        try:
+            pls = self._pls
+        except AttributeError:
+            return _PY_INFLUENCES['influence_emit_pheromone'](
+                self, pheromone_id, amount
+            )
+        return CppEmitPheromone(_ZERO_TS, _ZERO_TS, pls.get_location(),
+                                pheromone_id, amount)
+    
+    for _name, _method in (
+            ('influence_move_forward', _cpp_move_forward),
+            ('influence_move_to', _cpp_move_to),
+            ('influence_turn', _cpp_turn),
+            ('influence_turn_towards', _cpp_turn_towards),
+            ('influence_set_speed', _cpp_set_speed),
+            ('influence_change_speed', _cpp_change_speed),
+            ('influence_stop', _cpp_stop),
+            ('influence_emit_pheromone', _cpp_emit_pheromone)):
+        _method.__name__ = _name
+        _method.__qualname__ = 'Turtle.' + _name
+        _method.__doc__ = _PY_INFLUENCES[_name].__doc__
+        setattr(Turtle, _name, _method)
+    del _name, _method
+
+
+class Perception(MutableMapping):
+    """
+    What one turtle perceives at one step.
+
+    Keeps the dictionary interface of earlier versions, so
+    ``perception['heading']``, ``perception.get('marks')`` and
+    ``'pheromones' in perception`` still work and decide() may add its own
+    keys. The fixed fields are slots, and the neighbours are stored as the
+    parallel ``nearby_agents`` list and ``nearby_distances_sq`` /
+    ``nearby_distances`` sequences. The ``nearby_turtles`` list of
+    dictionaries and the ``nearby_positions`` array are only built when
+    first read.
+
+    LogoSimulation refills the same Perception for a turtle at every step,
+    dropping the keys decide() added, so a turtle must not keep its
+    perception beyond decide().
+    """
+
+    __slots__ = (
+        'environment', 'position', 'heading', 'speed', 'time', 'pheromones',
+        'marks', 'nearby_agents', 'nearby_distances_sq', 'nearby_objects',
+        'influence_buffer', 'agent_index',
+        '_nearby_turtles', '_nearby_positions', '_nearby_distances',
+        '__dict__'
+    )
+
+    # Keys answered by slots or properties, in iteration order
+    FIELDS = (
+        'environment', 'position', 'heading', 'speed', 'time', 'pheromones',
+        'nearby_turtles', 'nearby_positions', 'nearby_distances', 'marks',
+        'nearby_agents', 'nearby_distances_sq', 'nearby_objects',
+        'influence_buffer', 'agent_index'
+    )
+    _FIELD_SET = frozenset(FIELDS)
+
+    # Keys built from nearby_agents on first read, with their cache slot
+    _LAZY_FIELDS = {
+        'nearby_turtles': '_nearby_turtles',
+        'nearby_positions': '_nearby_positions',
+        'nearby_distances': '_nearby_distances',
+    }
+
+    def __init__(self, **fields):
+        self.nearby_agents = None
+        self._nearby_turtles = None
+        self._nearby_positions = None
+        self._nearby_distances = None
+        for key, value in fields.items():
+            self[key] = value
+
+    def set_neighbors(self, agents, distances_sq):
+        """
+        Store the perceived turtles and their squared distances, dropping
+        the views built from the previous neighbours.
+
+        Args:
+            agents: Perceived turtles
+            distances_sq: Squared distance to each of them, as a sequence
+                or a float64 array
+        """
+        self.nearby_agents = agents
+        self.nearby_distances_sq = distances_sq
+        self.nearby_objects = None
+        self._nearby_turtles = None
+        self._nearby_positions = None
+        self._nearby_distances = None
+
+    @property
+    def nearby_turtles(self):
+        """Perceived turtles as dictionaries with distance, position and heading."""
+        nearby = self._nearby_turtles
+        if nearby is None:
+            agents = self.nearby_agents
+            if agents is None:
+                raise AttributeError('nearby_turtles')
+            nearby = [
+                {
+                    'turtle': other,
+                    'distance': distance,
+                    'distance_sq': dist_sq,
+                    'position': other.position,
+                    'heading': other.heading
+                }
+                for other, dist_sq, distance in zip(
+                    agents, np.asarray(self.nearby_distances_sq).tolist(),
+                    self.nearby_distances.tolist()
+                )
+            ]
+            self._nearby_turtles = nearby
+        return nearby
+
+    @nearby_turtles.setter
+    def nearby_turtles(self, value):
+        self._nearby_turtles = value
+
+    @property
+    def nearby_positions(self):
+        """Positions of the perceived turtles as an (n, 2) array."""
+        positions = self._nearby_positions
+        if positions is None:
+            agents = self.nearby_agents
+            if agents is None:
+                raise AttributeError('nearby_positions')
+            if agents:
+                positions = np.array(
+                    [(other.position.x, other.position.y) for other in agents]
+                )
+            else:
+                positions = _NO_POSITIONS
+            self._nearby_positions = positions
+        return positions
+
+    @nearby_positions.setter
+    def nearby_positions(self, value):
+        self._nearby_positions = value
+
+    @property
+    def nearby_distances(self):
+        """Distances to the perceived turtles, square-rooted on first read."""
+        distances = self._nearby_distances
+        if distances is None:
+            agents = self.nearby_agents
+            if agents is None:
+                raise AttributeError('nearby_distances')
+            if len(agents):
+                distances = np.sqrt(self.nearby_distances_sq)
+            else:
+                distances = _NO_DISTANCES
+            self._nearby_distances = distances
+        return distances
+
+    @nearby_distances.setter
+    def nearby_distances(self, value):
+        self._nearby_distances = value
+
+    def _has(self, key):
+        if key in self._FIELD_SET:
+            cache = self._LAZY_FIELDS.get(key)
+            if cache is not None:
+                return (getattr(self, cache) is not None or
+                        self.nearby_agents is not None)
+            return hasattr(self, key)
+        return key in self.__dict__
+
+    def __contains__(self, key):
+        return isinstance(key, str) and self._has(key)
+
+    def __getitem__(self, key):
+        if not self.__contains__(key):
+            raise KeyError(key)
+        if key in self._FIELD_SET:
+            return getattr(self, key)
+        return self.__dict__[key]
+
+    def get(self, key, default=None):
+        if not self.__contains__(key):
+            return default
+        return self[key]
+
+    def __setitem__(self, key, value):
+        if key in self._FIELD_SET:
+            setattr(self, key, value)
+        else:
+            self.__dict__[key] = value
+
+    def __delitem__(self, key):
+        if not self.__contains__(key):
+            raise KeyError(key)
+        if key in self._LAZY_FIELDS:
+            setattr(self, self._LAZY_FIELDS[key], None)
+            self.nearby_agents = None
+        elif key in self._FIELD_SET:
+            delattr(self, key)
+        else:
+            del self.__dict__[key]
+
+    def __iter__(self):
+        for key in self.FIELDS:
+            if self._has(key):
+                yield key
+        yield from self.__dict__
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"Perception(position={getattr(self, 'position', None)})"
 
 
 class LogoSimulation:
@@ -367,6 +718,7 @@ class LogoSimulation:
         turtle_class: Turtle class to instantiate (default: Turtle)
         parallel_backend: 'thread', 'process', or None (default: 'thread')
         num_workers: Number of parallel workers (None = auto-detect)
+        perception_radius: Radius within which turtles perceive each other
     
     Examples:
         >>> env = Environment(100, 100)
@@ -375,8 +727,10 @@ class LogoSimulation:
     """
     
     def __init__(self, environment, num_turtles=0, turtle_class=None, 
-                 parallel_backend='thread', num_workers=None, **turtle_kwargs):
+                 parallel_backend='thread', num_workers=None,
+                 perception_radius=10.0, **turtle_kwargs):
         self.environment = environment
+        self.perception_radius = perception_radius
         self.turtles = []
         self.current_step = 0
         self.reaction_model = LogoReactionModel()
@@ -395,14 +749,42 @@ class LogoSimulation:
         self._turtle_kwargs = turtle_kwargs
         
         # Spatial indexing for efficient neighbor queries
-        # Cell size should be >= typical perception radius
+        # A cell size equal to the perception radius keeps each query
+        # to the 3x3 block of cells around the turtle
         from .spatial import SpatialHashGrid
         self.spatial_index = SpatialHashGrid(
-            cell_size=20.0,  # Adjust based on typical perception radius
+            cell_size=perception_radius,
             width=environment.width,
             height=environment.height
         )
         
+        # Structure-of-arrays mirror of the turtle state, refreshed at the
+        # start of every step for vectorized perception and user kernels
+        self.xs = np.empty(0, STATE_DTYPE)
+        self.ys = np.empty(0, STATE_DTYPE)
+        self.headings = np.empty(0, STATE_DTYPE)
+        self.speeds = np.empty(0, STATE_DTYPE)
+        self._heading_trig = None
+        # Full-precision turtle positions read by _sync_state_arrays(),
+        # shared with the spatial index and the pheromone sampling
+        self._positions = (np.empty(0), np.empty(0))
+        
+        # Columnar buffer for relative moves, turns and speed changes.
+        # Decisions running in worker processes cannot write to it.
+        self.influence_buffer = InfluenceBuffer(self.turtles)
+        self._share_influence_buffer = parallel_backend != 'process'
+        
+        # Per-step containers, cleared and reused by every step
+        self._influences_map = InfluencesMap(self.influence_buffer)
+        self._perceptions = []  # Perceptions of the awake turtles, in order
+        self._perception_objects = {}
+        # Neighbours of every turtle in CSR form, see _query_all_neighbors()
+        self._neighbor_offsets = None
+        self._neighbor_idx = np.empty(NEIGHBOR_BUFFER_SIZE, dtype=np.int32)
+        self._neighbor_d2 = np.empty(NEIGHBOR_BUFFER_SIZE)
+        # Pheromone values under every turtle, see _sample_pheromones()
+        self._pheromone_samples = None
+        
         # Probe system for observation and timing control
         from .probes import ProbeManager
         self.probe_manager = ProbeManager()
@@ -417,18 +799,54 @@ class LogoSimulation:
         final_kwargs = self._turtle_kwargs.copy()
         final_kwargs.update(kwargs)
         
-        for _ in range(count):
-            # Extract position/heading if present to avoid duplicates, otherwise generate random
-            pos = final_kwargs.pop('position', self.environment.random_position())
-            head = final_kwargs.pop('heading', self.environment.random_heading())
+        # Extract position/heading if present to avoid duplicates; they
+        # apply to the first turtle, the others are placed at random
+        pos = final_kwargs.pop('position', None)
+        head = final_kwargs.pop('heading', None)
+        positions = self.environment.random_positions(count).tolist()
+        headings = self.environment.random_headings(count).tolist()
+        if count > 0:
+            if pos is not None:
+                positions[0] = pos
+            if head is not None:
+                headings[0] = head
+        
+        self.add_agents_bulk(positions, headings, turtle_class, **final_kwargs)
+    
+    def add_agents_bulk(self, positions, headings, turtle_class=None, **kwargs):
+        """
+        Add one turtle per row of pre-generated positions and headings.
+        
+        Generating the placements as arrays up front, e.g. with
+        Environment.random_positions() and random_headings(), avoids one
+        random draw per turtle and attribute.
+        
+        Args:
+            positions: (n, 2) array or sequence of positions
+            headings: (n,) array or sequence of headings in radians
+            turtle_class: Turtle class to instantiate (default: simulation's)
+            **kwargs: Additional arguments for the turtle constructor
             
-            turtle = turtle_class(
-                position=pos,
-                heading=head,
-                **final_kwargs
-            )
-            turtle._environment = self.environment
-            self.turtles.append(turtle)
+        Returns:
+            list: The created turtles
+        """
+        turtle_class = turtle_class or self._turtle_class
+        if hasattr(positions, 'tolist'):
+            positions = positions.tolist()
+        if hasattr(headings, 'tolist'):
+            headings = headings.tolist()
+        
+        environment = self.environment
+        # Turtle converts [x, y] pairs to Point2D itself
+        turtles = [
+            turtle_class(position=pos, heading=head, **kwargs)
+            for pos, head in zip(positions, headings)
+        ]
+        for idx, turtle in enumerate(turtles, len(self.turtles)):
+            turtle._environment = environment
+            turtle._idx = idx
+        self.turtles.extend(turtles)
+        return turtles
 
     def step(self):
         """
@@ -441,33 +859,65 @@ class LogoSimulation:
         4. Process influences through reaction model
         5. Update environment state
         """
-        # Phase 0: Rebuild spatial index for this step
-        self.spatial_index.rebuild(self.turtles)
+        # Phase 0: Rebuild state arrays and spatial index for this step,
+        # reading the turtle positions once for both
+        self._index_turtles()
+        self._sync_state_arrays()
+        rebuild_soa = getattr(self.spatial_index, 'rebuild_soa', None)
+        if rebuild_soa is not None:
+            rebuild_soa(*self._positions, list(self.turtles))
+        else:
+            self.spatial_index.rebuild(self.turtles)
         
         # Notify probes before step
-        self.probe_manager.notify_step(self.current_step, self)
+        if self.probe_manager.probes:
+            self.probe_manager.notify_step(
+                self.current_step, ProbeContext(self.current_step, self)
+            )
         
-        # Phase 1: Perception - Build perceptions for all turtles
-        perceptions = {}
-        for turtle in self.turtles:
-            perceptions[turtle] = self._build_perception(turtle)
+        # Phase 1: Perception - Build perceptions for the awake turtles
+        buffer = self.influence_buffer
+        buffer.clear(self.turtles)
+        perceptions = self._perceptions
+        perceptions.clear()
+        bulk = self._query_all_neighbors()
+        if bulk:
+            self._sample_pheromones()
+        indices, awake = self._awake_turtles()
+        for index, turtle in zip(indices, awake):
+            if bulk:
+                perception = self._build_perception(turtle, index)
+            else:
+                perception = self._build_perception(turtle)
+            if self._share_influence_buffer:
+                # Lets decide() push rows with buffer.push_turn(index, ...)
+                perception['influence_buffer'] = buffer
+                perception['agent_index'] = index
+            perceptions.append(perception)
         
         # Phase 2: Decision - Collect influences from all turtles
         # We parallelize this phase as decisions should be independent
-        influences_map = InfluencesMap()
+        influences_map = self._influences_map
+        influences_map.clear()
         
-        if self._executor and self.turtles:
+        if self._executor and awake:
             # Use parallel executor
-            all_results = self._executor.map_decisions(self.turtles, perceptions)
+            all_results = self._executor.map_decisions(awake, perceptions)
             for turtle_influences in all_results:
                 if turtle_influences:
                     influences_map.add_all(turtle_influences)
         else:
-            # Sequential fallback
-            for turtle in self.turtles:
-                turtle_influences = turtle.decide(perceptions[turtle])
+            # Sequential fallback; the decisions are gathered in one list
+            # and classified by a single add_all() call
+            decided = []
+            collect = decided.extend
+            for turtle, perception in zip(awake, perceptions):
+                turtle_influences = turtle.decide(perception)
+                if type(turtle_influences) is tuple:
+                    turtle_influences = sleep_decision(turtle, turtle_influences)
                 if turtle_influences:
-                    influences_map.add_all(turtle_influences)
+                    collect(turtle_influences)
+            influences_map.add_all(decided)
         
         # Phase 3: Reaction - Process influences
 
@@ -480,7 +930,184 @@ class LogoSimulation:
         )
 
         # 3b. Natural Reactions (Physics, Agent Position Updates)
-        # Generate AgentPositionUpdate influences for physics simulation
+        if (type(self.reaction_model).make_natural_reaction is
+                LogoReactionModel.make_natural_reaction):
+            # The default natural reaction only applies the position
+            # updates, so all turtles are advanced in one kernel call
+            self._advance_turtles()
+        else:
+            self._natural_reaction()
+
+        # 3c. System Reactions (Add/Remove Agents)
+        # Extract system influences
+        system_influences = influences_map.get_all_system()
+
+        if system_influences:
+            self.reaction_model.make_system_reaction(
+                self.current_step,
+                self.current_step + 1,
+                self.environment,
+                system_influences,
+                self.turtles
+            )
+        
+        self._influence_epoch_reset(influences_map)
+        self.current_step += 1
+    
+    def _vectorized_decide_kernel(self):
+        """
+        The decide_kernel shared by all turtles, or None when the step
+        cannot be vectorized: the turtles are of several classes, their
+        class does not declare VECTORIZED_DECIDE, or it overrides decide()
+        without providing a matching kernel. The reaction model must not
+        override the reactions the fused kernel stands for.
+        """
+        if type(self.reaction_model) is not LogoReactionModel:
+            return None
+        classes = {type(turtle) for turtle in self.turtles}
+        if len(classes) != 1:
+            return None
+        cls = classes.pop()
+        if not cls.VECTORIZED_DECIDE or HAS_CPP_CORE:
+            return None
+        # The kernel must come from the class that defines the decide()
+        # actually used
+        for klass in cls.__mro__:
+            defined = vars(klass)
+            if defined.get('decide_compiled') is not None:
+                return self._compiled_decide_kernel(cls.decide_compiled)
+            if ('decide_kernel' in defined or 'decide' in defined or
+                    'random_walk_influences' in defined):
+                return cls.decide_kernel if 'decide_kernel' in defined else None
+        return None
+    
+    def _compiled_decide_kernel(self, compiled):
+        """
+        A decide_kernel running a range-based ``decide_compiled`` over the
+        whole population, split across the worker threads of the thread
+        backend. Each range draws from its own seed, derived from the
+        step's seed and the range start.
+        """
+        executor = self._executor
+        map_ranges = getattr(executor, 'map_ranges', None)
+        
+        def kernel(xs, ys, headings, speeds, pheromone, seed,
+                   out_dh, out_ds, out_dx, out_dy):
+            def decide_range(start, stop):
+                compiled(start, stop, xs, ys, headings, speeds, pheromone,
+                         (seed + start) & 0xFFFFFFFF, out_dh, out_ds,
+                         out_dx, out_dy)
+            
+            if map_ranges is None:
+                decide_range(0, xs.shape[0])
+            else:
+                map_ranges(decide_range, xs.shape[0])
+        
+        return kernel
+    
+    def step_vectorized(self):
+        """
+        Execute one step with the perception, decision and reaction phases
+        fused over the state arrays.
+        
+        When every turtle is of the same class declaring
+        ``VECTORIZED_DECIDE = True``, the class's ``decide_kernel`` is
+        called once for the whole population with the signature
+        ``decide_kernel(xs, ys, headings, speeds, pheromone, seed, out_dh,
+        out_ds, out_dx, out_dy)``; it fills the ``out_*`` arrays with the
+        heading, speed and position change of each turtle, and
+        ``pheromone`` is the field named by ``VECTORIZED_PHEROMONE``. A
+        second kernel then applies the changes and the natural reaction,
+        and pheromones diffuse and evaporate as in step().
+        
+        A class may instead provide ``decide_compiled(start, stop, xs,
+        ..., out_dy)``, deciding only for the turtles of index ``start``
+        to ``stop - 1``. With the thread backend the population is then
+        split into ranges decided in the worker threads, which run in
+        parallel when the function is compiled with ``nogil=True``.
+        
+        Random draws are seeded from the ``random`` module, so a seeded
+        simulation stays reproducible, though not draw-for-draw identical
+        to step(). The spatial index is not rebuilt, since decide_kernel
+        does not perceive neighbours. Any other simulation falls back to
+        step().
+        """
+        kernel = self._vectorized_decide_kernel()
+        if kernel is None or not self.turtles:
+            self.step()
+            return
+        
+        turtles = self.turtles
+        environment = self.environment
+        cls = type(turtles[0])
+        n = len(turtles)
+        positions = [t.position for t in turtles]
+        xs = np.array([p.x for p in positions], dtype=np.float64)
+        ys = np.array([p.y for p in positions], dtype=np.float64)
+        headings = np.array([t.heading for t in turtles], dtype=np.float64)
+        speeds = np.array([t.speed for t in turtles], dtype=np.float64)
+        self.xs = xs.astype(STATE_DTYPE)
+        self.ys = ys.astype(STATE_DTYPE)
+        self.headings = headings.astype(STATE_DTYPE)
+        self.speeds = speeds.astype(STATE_DTYPE)
+        self._heading_trig = None
+        if self.probe_manager.probes:
+            self.probe_manager.notify_step(
+                self.current_step, ProbeContext(self.current_step, self)
+            )
+        
+        deltas = np.empty((4, n))
+        dh, ds, dx, dy = deltas
+        
+        grids = getattr(environment, 'pheromone_grids', {})
+        pheromone = grids.get(cls.VECTORIZED_PHEROMONE)
+        if pheromone is None:
+            pheromone = _NO_FIELD
+        kernel(xs, ys, headings, speeds, pheromone, random.getrandbits(32),
+               dh, ds, dx, dy)
+        
+        apply_deltas(xs, ys, headings, speeds, dx, dy, dh, ds,
+                     environment.width, environment.height,
+                     environment.toroidal)
+        for turtle, x, y, heading, speed in zip(
+                turtles, xs.tolist(), ys.tolist(), headings.tolist(),
+                speeds.tolist()):
+            turtle.position = Point2D(x, y)
+            turtle.heading = heading
+            turtle.speed = speed
+        
+        if grids:
+            if hasattr(environment, 'diffuse_and_evaporate'):
+                environment.diffuse_and_evaporate(1)
+            else:
+                self.reaction_model._pheromone_diffusion(environment, 1)
+                self.reaction_model._pheromone_evaporation(environment, 1)
+        
+        self.current_step += 1
+    
+    def _advance_turtles(self):
+        """Move every turtle by its speed along its heading."""
+        turtles = self.turtles
+        if not turtles:
+            return
+        environment = self.environment
+        positions = [t.position for t in turtles]
+        xs = np.array([p.x for p in positions], dtype=np.float64)
+        ys = np.array([p.y for p in positions], dtype=np.float64)
+        headings = np.array([t.heading for t in turtles], dtype=np.float64)
+        speeds = np.array([t.speed for t in turtles], dtype=np.float64)
+        
+        advance(xs, ys, headings, speeds, environment.width,
+                environment.height, environment.toroidal)
+        
+        for turtle, x, y in zip(turtles, xs.tolist(), ys.tolist()):
+            turtle.position = Point2D(x, y)
+    
+    def _natural_reaction(self):
+        """
+        Send one AgentPositionUpdate per turtle through the reaction
+        model's natural reaction.
+        """
         natural_influences = []
         for turtle in self.turtles:
             # Calculate new position based on current speed and heading
@@ -509,21 +1136,110 @@ class LogoSimulation:
             self.environment,
             natural_influences
         )
+    
+    def _awake_turtles(self):
+        """
+        Turtles that perceive and decide this step, i.e. whose
+        ``next_wake_step`` has been reached, with their indices.
 
-        # 3c. System Reactions (Add/Remove Agents)
-        # Extract system influences
-        system_influences = influences_map.get_all_system()
+        Returns:
+            tuple: (indices in self.turtles, turtles)
+        """
+        turtles = self.turtles
+        step = self.current_step
+        indices = [
+            index for index, turtle in enumerate(turtles)
+            if getattr(turtle, 'next_wake_step', 0) <= step
+        ]
+        if len(indices) == len(turtles):
+            return range(len(turtles)), turtles
+        return indices, [turtles[index] for index in indices]
 
-        if system_influences:
-            self.reaction_model.make_system_reaction(
-                self.current_step,
-                self.current_step + 1,
-                self.environment,
-                system_influences,
-                self.turtles
-            )
+    def _index_turtles(self):
+        """
+        Set each turtle's ``_idx`` to its position in self.turtles, which
+        is also its row in the state arrays and its perception's index.
+        Turtles appended to the list directly get theirs here.
+        """
+        for idx, turtle in enumerate(self.turtles):
+            turtle._idx = idx
+
+    def _sync_state_arrays(self):
+        """Copy the turtle positions, headings and speeds into the SoA arrays."""
+        turtles = self.turtles
+        n = len(turtles)
+        if len(self.xs) != n:
+            self.xs = np.empty(n, STATE_DTYPE)
+            self.ys = np.empty(n, STATE_DTYPE)
+            self.headings = np.empty(n, STATE_DTYPE)
+            self.speeds = np.empty(n, STATE_DTYPE)
+        positions = [t.position for t in turtles]
+        xs = np.fromiter((p.x for p in positions), float, n)
+        ys = np.fromiter((p.y for p in positions), float, n)
+        self._positions = (xs, ys)
+        self.xs[:] = xs
+        self.ys[:] = ys
+        self.headings[:] = [t.heading for t in turtles]
+        self.speeds[:] = [t.speed for t in turtles]
+        self._heading_trig = None
+    
+    def state_arrays(self, refresh=False):
+        """
+        Turtle state as parallel arrays, index i describing self.turtles[i].
         
-        self.current_step += 1
+        The arrays are refreshed at the start of every step, so inside
+        decide() they hold the state the step started from. They are
+        copies: writing to them does not move the turtles.
+        
+        Args:
+            refresh: Copy the current turtle state first, e.g. between steps
+        
+        Returns:
+            dict: 'x', 'y', 'heading' and 'speed' float32 arrays
+        """
+        if refresh or len(self.xs) != len(self.turtles):
+            self._sync_state_arrays()
+        return {
+            'x': self.xs,
+            'y': self.ys,
+            'heading': self.headings,
+            'speed': self.speeds,
+        }
+    
+    def heading_trig(self, refresh=False):
+        """
+        Sine and cosine of the headings of state_arrays(), computed once
+        per step for decide() code that moves many turtles along their
+        headings.
+        
+        Args:
+            refresh: Copy the current turtle state first, e.g. between steps
+        
+        Returns:
+            tuple: (sin, cos) float32 arrays, index i describing
+            self.turtles[i]
+        """
+        if refresh or len(self.xs) != len(self.turtles):
+            self._sync_state_arrays()
+        if self._heading_trig is None:
+            self._heading_trig = (np.sin(self.headings), np.cos(self.headings))
+        return self._heading_trig
+    
+    def _influence_epoch_reset(self, influences_map):
+        """
+        Return the step's regular influences to their pools once all
+        reactions are done, keeping at most 4 free instances per turtle,
+        and drop the step's perceptions. The Perception objects of turtles
+        that left the simulation are forgotten.
+        """
+        influences_map.clear(pool_limit=4 * len(self.turtles))
+        self._perceptions.clear()
+        if len(self._perception_objects) > len(self.turtles):
+            objects = self._perception_objects
+            self._perception_objects = {
+                turtle: objects[turtle] for turtle in self.turtles
+                if turtle in objects
+            }
     
     def run(self, steps, callback=None):
         """
@@ -544,95 +1260,217 @@ class LogoSimulation:
         # Notify probes of simulation end
         self.probe_manager.notify_final_time(self.current_step, self)
     
-    def _build_perception(self, turtle):
-        """Build perception dictionary for a turtle."""
+    def _query_all_neighbors(self):
+        """
+        Find the neighbours of all turtles in one bulk query of the spatial
+        index, into the reused CSR buffers read by _build_perception().
+
+        Skipped when _build_perception() is replaced, since the replacement
+        may not take a turtle index.
+
+        Returns:
+            bool: Whether the neighbours were found
+        """
+        self._neighbor_offsets = None
+        self._pheromone_samples = None
+        build = getattr(self._build_perception, '__func__', None)
+        if build is not LogoSimulation._build_perception:
+            return False
+        if not hasattr(self.spatial_index, 'neighbors'):
+            return False
+        (self._neighbor_offsets, self._neighbor_idx,
+         self._neighbor_d2) = self.spatial_index.neighbors(
+            self.perception_radius, self._neighbor_idx, self._neighbor_d2
+        )
+        return True
+
+    def _sample_pheromones(self):
+        """
+        Read the pheromone values under all turtles with one fancy-indexing
+        pass per pheromone grid, for _build_perception() to pick up by
+        turtle index.
+
+        Left to _build_perception() when a pheromone has no NumPy grid,
+        e.g. on the C++ environment.
+        """
+        self._pheromone_samples = None
+        env = self.environment
+        grids = getattr(env, 'pheromone_grids', None)
+        if not env.pheromones or grids is None:
+            return
+        if any(pid not in grids for pid in env.pheromones):
+            return
+        xs, ys = self._positions
+        if len(xs) != len(self.turtles):
+            self._sync_state_arrays()
+            xs, ys = self._positions
+        # Truncated like int(), then wrapped or clamped like _grid_cell()
+        xi = xs.astype(np.int64)
+        yi = ys.astype(np.int64)
+        if env.toroidal:
+            xi %= env.width
+            yi %= env.height
+        else:
+            np.clip(xi, 0, env.width - 1, out=xi)
+            np.clip(yi, 0, env.height - 1, out=yi)
+        self._pheromone_samples = [
+            (pid, grids[pid][yi, xi].tolist()) for pid in env.pheromones
+        ]
+
+    def _build_perception(self, turtle, index=None):
+        """
+        Build the perception of a turtle.
+
+        The turtle's Perception from the previous step is refilled rather
+        than a new one allocated. When ``index`` is the turtle's position
+        in ``self.turtles`` and the neighbours of all turtles were found
+        by _query_all_neighbors(), they are read from there.
+        """
+        perception = self._perception_objects.get(turtle)
+        if perception is None:
+            perception = Perception()
+            self._perception_objects[turtle] = perception
+        else:
+            # Keys decide() added at the previous step do not carry over
+            perception.__dict__.clear()
+        
         # Get pheromone values at current location
-        pheromones = {}
-        x, y = int(turtle.position.x), int(turtle.position.y)
-        for pheromone_id in self.environment.pheromones:
-            pheromones[pheromone_id] = self.environment.get_pheromone_value(x, y, pheromone_id)
+        pheromones = perception.pheromones if 'pheromones' in perception else {}
+        pheromones.clear()
+        samples = self._pheromone_samples
+        if index is not None and samples is not None:
+            for pheromone_id, values in samples:
+                pheromones[pheromone_id] = values[index]
+        else:
+            x, y = int(turtle.position.x), int(turtle.position.y)
+            for pheromone_id in self.environment.pheromones:
+                pheromones[pheromone_id] = self.environment.get_pheromone_value(x, y, pheromone_id)
         
-        # Get marks at current position (exact location)
+        # Get marks at current position (within 1 unit), from the marks
+        # of the neighbouring unit cells only
         marks = []
-        if hasattr(self.environment, 'marks'):
-            for mark_id, mark in self.environment.marks.items():
-                # Check if mark is at the exact turtle position (within 1 unit)
-                if (abs(turtle.position.x - mark['position'].x) < 1.0 and
-                    abs(turtle.position.y - mark['position'].y) < 1.0):
-                    marks.append(mark)
-        
-        # Get nearby turtles using spatial index (O(1) instead of O(N))
-        nearby_turtles = []
-        perception_radius = 10.0
-        
-        # Query spatial index for neighbors
-        neighbors = self.spatial_index.query_radius(
-            turtle.position.x,
-            turtle.position.y,
-            perception_radius,
-            exclude=turtle
-        )
+        if self.environment.marks:
+            marks = [
+                mark for _, mark in MarkGrid.of(self.environment).near(
+                    turtle.position.x, turtle.position.y
+                )
+            ]
         
-        for other, distance in neighbors:
-            nearby_turtles.append({
-                'turtle': other,
-                'distance': distance,
-                'position': other.position,
-                'heading': other.heading
-            })
+        # Get nearby turtles using spatial index (O(1) instead of O(N)).
+        # Only squared distances are computed; the perception takes the
+        # square roots if they are read.
+        offsets = self._neighbor_offsets
+        if index is not None and offsets is not None:
+            start, end = offsets[index], offsets[index + 1]
+            turtles = self.turtles
+            agents = [turtles[j] for j in self._neighbor_idx[start:end].tolist()]
+            distances_sq = self._neighbor_d2[start:end]
+        elif hasattr(self.spatial_index, 'query_radius_arrays'):
+            agents, distances_sq = self.spatial_index.query_radius_arrays(
+                turtle.position.x,
+                turtle.position.y,
+                self.perception_radius,
+                exclude=turtle,
+                squared=True
+            )
+            # The distances live in a buffer the next query overwrites
+            distances_sq = distances_sq.copy()
+        else:
+            neighbors = self.spatial_index.query_radius(
+                turtle.position.x,
+                turtle.position.y,
+                self.perception_radius,
+                exclude=turtle,
+                squared=True
+            )
+            if neighbors:
+                agents, distances_sq = map(list, zip(*neighbors))
+            else:
+                agents, distances_sq = [], []
+        perception.set_neighbors(agents, distances_sq)
         
-        return {
-            'environment': self.environment,
-            'position': turtle.position,
-            'heading': turtle.heading,
-            'speed': turtle.speed,
-            'time': self.current_step,
-            'pheromones': pheromones,
-            'nearby_turtles': nearby_turtles,
-            'marks': marks
-        }
+        perception.environment = self.environment
+        perception.position = turtle.position
+        perception.heading = turtle.heading
+        perception.speed = turtle.speed
+        perception.time = self.current_step
+        perception.pheromones = pheromones
+        perception.marks = marks
+        return perception
 
-    def get_state(self):
-        """Get current simulation state as a dictionary."""
-        # Extract pheromone grids
-        pheromones = {}
-        if hasattr(self.environment, 'pheromone_grids'):
-            for pid, grid in self.environment.pheromone_grids.items():
-                # Convert grid to simple list of lists or similar for JSON
-                # To save bandwidth, we could only send non-zero values, but for local dev full grid is fine
-                pheromones[pid] = grid
-
-        # Extract marks
+    def get_state_arrays(self):
+        """
+        Get current simulation state with the turtle data as NumPy arrays.
+        
+        The turtles are gathered in a single pass, and the pheromone grids
+        are handed out as they are rather than converted to nested lists,
+        so building the state costs no Python object per turtle or cell.
+        
+        Returns:
+            dict: Step, turtle count, positions (N, 2), headings (N,) and
+            speeds (N,) float64 arrays, turtle colors, environment size,
+            pheromone grids by id (live arrays, not copies) and marks
+        """
+        turtles = self.turtles
+        n = len(turtles)
+        positions = [t.position for t in turtles]
+        xy = np.empty((n, 2))
+        xy[:, 0] = [p.x for p in positions]
+        xy[:, 1] = [p.y for p in positions]
+
+        # Marks are few and carry arbitrary content, so they stay dicts
         marks = []
-        if hasattr(self.environment, 'marks'):
-            for mark_id, mark in self.environment.marks.items():
-                marks.append({
-                    'id': mark_id,
-                    'position': [mark['position'].x, mark['position'].y],
-                    'content': mark['content'],
-                    'category': mark['category'],
-                    'color': 'gray'  # Default color for marks
-                })
+        for mark_id, mark in self.environment.marks.items():
+            marks.append({
+                'id': mark_id,
+                'position': [mark['position'].x, mark['position'].y],
+                'content': mark['content'],
+                'category': mark['category'],
+                'color': 'gray'  # Default color for marks
+            })
 
         return {
             'step': self.current_step,
-            'num_turtles': len(self.turtles),
-            'turtles': [
-                {
-                    'position': [t.position.x, t.position.y],
-                    'heading': t.heading,
-                    'color': t.color,
-                    'speed': t.speed
-                }
-                for t in self.turtles
-            ],
+            'num_turtles': n,
+            'positions': xy,
+            'headings': np.fromiter((t.heading for t in turtles), float, n),
+            'speeds': np.fromiter((t.speed for t in turtles), float, n),
+            'colors': [t.color for t in turtles],
             'environment': {
                 'width': self.environment.width,
                 'height': self.environment.height
             },
-            'pheromones': pheromones,
+            'pheromones': dict(getattr(self.environment, 'pheromone_grids', {})),
             'marks': marks
         }
+
+    def get_state(self):
+        """
+        Get current simulation state as a JSON-serializable dictionary.
+        
+        Built from get_state_arrays(), converting each array with a single
+        tolist() call.
+        """
+        state = self.get_state_arrays()
+        state['turtles'] = [
+            {
+                'position': position,
+                'heading': heading,
+                'color': color,
+                'speed': speed
+            }
+            for position, heading, color, speed in zip(
+                state.pop('positions').tolist(),
+                state.pop('headings').tolist(),
+                state.pop('colors'),
+                state.pop('speeds').tolist()
+            )
+        ]
+        state['pheromones'] = {
+            pid: grid.tolist() if hasattr(grid, 'tolist') else grid
+            for pid, grid in state['pheromones'].items()
+        }
+        return state
     
     def reset(self):
         """Reset the simulation."""
@@ -648,16 +1486,16 @@ class LogoSimulation:
             
             fig, ax = plt.subplots(figsize=(10, 10))
             
-            # Plot turtles
-            for turtle in self.turtles:
-                ax.plot(turtle.position.x, turtle.position.y, 'o', 
-                       color=turtle.color, markersize=5)
+            state = self.get_state_arrays()
+            
+            # One scatter call for all turtles and one for all marks
+            positions = state['positions']
+            ax.scatter(positions[:, 0], positions[:, 1], c=state['colors'],
+                       s=25, marker='o')
             
-            # Plot marks if any
-            if hasattr(self.environment, 'marks'):
-                for mark in self.environment.marks.values():
-                    ax.plot(mark['position'].x, mark['position'].y, 'x',
-                           color='gray', markersize=3)
+            if state['marks']:
+                marks = np.array([mark['position'] for mark in state['marks']])
+                ax.scatter(marks[:, 0], marks[:, 1], c='gray', s=9, marker='x')
             
             ax.set_xlim(0, self.environment.width)
             ax.set_ylim(0, self.environment.height)
@@ -8,57 +8,284 @@ This provides both threading and process-based parallel executors:
 For maximum performance with no GIL limitations, use the C++ MultiThreadedSimulationEngine.
 """
 
+from collections.abc import Mapping
 from typing import List, Callable, Any
+import atexit
+import inspect
 import multiprocessing
+import os
+import pickle
+import threading
+import weakref
 from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
+import numpy as np
+
+from .model import sleep_decision
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    shared_memory = None
+
+# Below this number of turtles, decisions run in the calling thread: the
+# cost of dispatching tasks would exceed the decisions themselves
+PARALLEL_THRESHOLD = 64
+
+# Number of chunks handed to each worker per step, so that a slow chunk
+# does not leave the other workers idle
+CHUNKS_PER_WORKER = 4
+
+# Alignment of the arrays placed in the shared memory block of
+# ProcessDecisionExecutor
+SHARED_ALIGNMENT = 64
+
+# Default number of tasks a decision worker process runs before it is
+# replaced, so that memory it accumulates is given back
+MAX_TASKS_PER_CHILD = 10000
+
+# Start method of the decision worker processes. Forking a process in
+# which Numba's parallel kernels have started their TBB threads leaves
+# the child, and then the parent at exit, blocked on the thread pool's
+# locks; spawned workers start from a fresh interpreter.
+WORKER_START_METHOD = 'spawn'
+
+
+def _chunk_bounds(n, num_workers, threshold):
+    """
+    (start, stop) bounds splitting n items into about CHUNKS_PER_WORKER
+    chunks per worker of at least ``threshold`` items.
+    """
+    size = max(threshold, -(-n // (num_workers * CHUNKS_PER_WORKER)), 1)
+    return [(start, min(start + size, n)) for start in range(0, n, size)]
+
+
+def _chunk_tasks(turtles, perceptions, num_workers, threshold):
+    """
+    Chunks of turtles, each paired with its perceptions, given either as
+    a list aligned with the turtles or as a dict keyed by turtle.
+    """
+    tasks = []
+    by_turtle = isinstance(perceptions, Mapping)
+    for start, stop in _chunk_bounds(len(turtles), num_workers, threshold):
+        chunk = turtles[start:stop]
+        if by_turtle:
+            tasks.append((chunk, [perceptions[turtle] for turtle in chunk]))
+        else:
+            tasks.append((chunk, perceptions[start:stop]))
+    return tasks
+
+
+_python_decide_cache = {}
+
+
+def _decides_in_python(turtles):
+    """
+    Whether some turtle's decide() is a Python function, which holds the
+    GIL for its whole run, rather than native code that may release it.
+    """
+    cache = _python_decide_cache
+    for cls in set(map(type, turtles)):
+        python = cache.get(cls)
+        if python is None:
+            python = inspect.isfunction(getattr(cls, 'decide', None))
+            cache[cls] = python
+        if python:
+            return True
+    return False
+
+
+# Module-level function for pickling compatibility
+def _decide_chunk(task):
+    """Decisions of a chunk of turtles, as one list of influences."""
+    turtles, perceptions = task
+    influences = []
+    for turtle, perception in zip(turtles, perceptions):
+        decided = turtle.decide(perception)
+        if type(decided) is tuple:
+            decided = sleep_decision(turtle, decided)
+        if decided:
+            influences.extend(decided)
+    return influences
+
+
+# Influence attributes that may refer to the deciding turtle
+_AGENT_FIELDS = ('source_agent', 'agent')
+
+
+def _decide_chunk_detached(task):
+    """
+    Worker side of ProcessDecisionExecutor: decisions of a chunk, with
+    every reference to a turtle of the chunk replaced by its position in
+    the chunk, so that turtle copies and their environment are not
+    pickled back to the parent process.
+    
+    Returns:
+        tuple: (influences, [(influence position, attribute, turtle
+        position)], [(turtle position, wake step)] of the turtles put
+        to sleep)
+    """
+    turtles = task[0]
+    wake_steps = [getattr(turtle, 'next_wake_step', 0) for turtle in turtles]
+    influences = _decide_chunk(task)
+    
+    local = {id(turtle): i for i, turtle in enumerate(turtles)}
+    refs = []
+    for k, influence in enumerate(influences):
+        for field in _AGENT_FIELDS:
+            i = local.get(id(getattr(influence, field, None)))
+            if i is not None:
+                setattr(influence, field, None)
+                refs.append((k, field, i))
+    slept = [(i, turtle.next_wake_step) for i, turtle in enumerate(turtles)
+             if getattr(turtle, 'next_wake_step', 0) != wake_steps[i]]
+    return influences, refs, slept
+
+
+def _attach_chunk(turtles, result):
+    """Parent side of _decide_chunk_detached(), for the same turtles."""
+    influences, refs, slept = result
+    for k, field, i in refs:
+        setattr(influences[k], field, turtles[i])
+    for i, wake_step in slept:
+        turtles[i].next_wake_step = wake_step
+    return influences
+
+
+def _open_shared(name):
+    """Attach to a shared memory block created by the parent process."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching registers the block again with the
+        # resource tracker, which workers share with their parent, so the
+        # registration has no effect
+        return shared_memory.SharedMemory(name=name)
+
+
+def _unlink_shared(shm):
+    """Free a shared memory block created by this process."""
+    shm.close()
+    shm.unlink()
+
+
+# Shared memory block a worker process is attached to, by name
+_worker_shared = {}
+
+
+def _decide_chunk_shared(packed):
+    """
+    Worker side of ProcessDecisionExecutor when the arrays of the task
+    were placed in shared memory: they are rebuilt as read-only views of
+    the block instead of being copied out of the pickle.
+    """
+    data, name, spans = packed
+    if not spans:
+        return _decide_chunk_detached(pickle.loads(data))
+    shm = _worker_shared.get(name)
+    if shm is None:
+        # The parent moved to a larger block; the old one is not used again
+        for old in _worker_shared.values():
+            try:
+                old.close()
+            except BufferError:
+                pass
+        _worker_shared.clear()
+        shm = _worker_shared[name] = _open_shared(name)
+    view = shm.buf.toreadonly()
+    buffers = [view[start:start + size] for start, size in spans]
+    return _decide_chunk_detached(pickle.loads(data, buffers=buffers))
+
 
 class ThreadedDecisionExecutor:
     """
     Threaded executor for agent decision-making.
     
-    Note: Due to Python's GIL, this won't provide true parallelism for
-    CPU-bound tasks. However, it provides the correct architecture and
-    can benefit I/O-bound operations.
+    Due to Python's GIL, threads give no parallelism to decide() methods
+    written in Python: they would only add task and context switch
+    overhead, so such decisions run in the calling thread unless the
+    executor is created with ``io_bound=True``, for decide() methods
+    that spend their time waiting. Native decide() methods, and the
+    compiled kernels run through map_ranges(), can release the GIL and
+    do run in parallel.
     
-    For true parallelism, use ProcessDecisionExecutor or the C++ engine.
+    For true parallelism of Python decisions, use
+    ProcessDecisionExecutor or the C++ engine.
     """
     
-    def __init__(self, num_workers=None):
+    def __init__(self, num_workers=None, parallel_threshold=PARALLEL_THRESHOLD,
+                 io_bound=False):
         """
         Initialize the threaded executor.
         
         Args:
             num_workers: Number of worker threads (None = CPU count * 2)
+            parallel_threshold: Smallest number of turtles, and of turtles
+                per task, worth dispatching to the threads
+            io_bound: Dispatch Python decide() methods to the threads too
         """
         if num_workers is None:
             num_workers = multiprocessing.cpu_count() * 2
         self.executor = ThreadPoolExecutor(max_workers=num_workers)
         self.num_workers = num_workers
+        self.parallel_threshold = parallel_threshold
+        self.io_bound = io_bound
     
     def map_decisions(self, turtles, perceptions):
         """
         Execute decisions for all turtles using threads.
         
+        The turtles are handed to the threads in chunks, each task
+        returning the influences of its whole chunk. Decisions written
+        in Python run as a single chunk in the calling thread, see the
+        class documentation.
+        
         Args:
             turtles: List of turtle agents
-            perceptions: Dictionary mapping turtles to their perceptions
+            perceptions: Perceptions aligned with turtles, or a dictionary
+                mapping turtles to their perceptions
             
         Returns:
-            List of influences from all turtles
+            List of influence lists, one per chunk that emitted any
         """
-        def get_decision(turtle):
-            return turtle.decide(perceptions[turtle])
+        if not self.io_bound and _decides_in_python(turtles):
+            tasks = _chunk_tasks(turtles, perceptions, 1, len(turtles))
+        else:
+            tasks = _chunk_tasks(turtles, perceptions, self.num_workers,
+                                 self.parallel_threshold)
+        if len(tasks) <= 1:
+            results = map(_decide_chunk, tasks)
+        else:
+            results = self.executor.map(_decide_chunk, tasks)
+        return [influences for influences in results if influences]
+    
+    def map_ranges(self, func, n):
+        """
+        Call ``func(start, stop)`` on disjoint chunks of ``range(n)`` in
+        the worker threads, returning once all calls are done.
         
-        results = []
-        for turtle_influences in self.executor.map(get_decision, turtles):
-            if turtle_influences:
-                results.append(turtle_influences)
+        This is how compiled decisions run in parallel: a Numba function
+        compiled with ``nogil=True`` releases the GIL, so the threads run
+        on separate cores, each writing its own index range of the
+        output arrays.
         
-        return results
+        Args:
+            func: Callable taking (start, stop)
+            n: Number of items
+        """
+        bounds = _chunk_bounds(n, self.num_workers, self.parallel_threshold)
+        if len(bounds) <= 1:
+            for start, stop in bounds:
+                func(start, stop)
+            return
+        futures = [self.executor.submit(func, start, stop)
+                   for start, stop in bounds]
+        for future in futures:
+            future.result()
     
     def shutdown(self):
         """Shutdown the executor."""
+        _uncache(self)
         self.executor.shutdown(wait=True)
 
 
@@ -70,65 +297,222 @@ class ProcessDecisionExecutor:
     bypassing the GIL. Higher overhead than threading but much
     faster for CPU-bound agent logic.
     
-    Note: Agents and perceptions must be picklable.
+    The NumPy arrays reachable from the tasks of a step, such as the
+    pheromone grids of the environment, are copied once into a shared
+    memory block kept across steps rather than pickled into every task.
+    Workers see them as read-only arrays. That block is reused by every
+    step, so steps sent from several threads, e.g. by simulations
+    sharing an executor made by create_executor(), take turns.
+    
+    Note: Agents and perceptions must be picklable. The workers are
+    spawned, so turtle classes must be importable by them: defined in a
+    module, or in a script whose simulation runs under
+    ``if __name__ == '__main__':``.
     """
     
-    def __init__(self, num_workers=None):
+    def __init__(self, num_workers=None, parallel_threshold=PARALLEL_THRESHOLD,
+                 max_tasks_per_child=MAX_TASKS_PER_CHILD):
         """
         Initialize the process executor.
         
         Args:
             num_workers: Number of worker processes (None = CPU count)
+            parallel_threshold: Smallest number of turtles, and of turtles
+                per task, worth sending to the worker processes
+            max_tasks_per_child: Average number of tasks each worker runs
+                before the workers are replaced (None = never)
         """
         if num_workers is None:
             num_workers = multiprocessing.cpu_count()
-        self.executor = ProcessPoolExecutor(max_workers=num_workers)
+        self.executor = self._new_pool(num_workers)
         self.num_workers = num_workers
+        self.parallel_threshold = parallel_threshold
+        self.max_tasks_per_child = max_tasks_per_child
+        self._tasks_sent = 0
+        self._shared = None
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _new_pool(num_workers):
+        """Start a pool of worker processes, see WORKER_START_METHOD."""
+        return ProcessPoolExecutor(
+            max_workers=num_workers,
+            mp_context=multiprocessing.get_context(WORKER_START_METHOD)
+        )
+    
+    def _maybe_recycle(self, n_tasks):
+        """
+        Replace the worker processes before sending ``n_tasks`` more
+        tasks if that would exceed max_tasks_per_child tasks per worker.
+        
+        ProcessPoolExecutor only supports max_tasks_per_child from Python
+        3.11, so the whole pool is recycled instead.
+        """
+        limit = self.max_tasks_per_child
+        if limit and self._tasks_sent + n_tasks > limit * self.num_workers:
+            if os.environ.get('SIMILAR_VERBOSE', '').lower() in ('1', 'true', 'yes'):
+                self._report_memory()
+            self.executor.shutdown(wait=True)
+            self.executor = self._new_pool(self.num_workers)
+            self._tasks_sent = 0
+        self._tasks_sent += n_tasks
+    
+    def _report_memory(self):
+        """Print the resident memory of the worker processes, if psutil is installed."""
+        try:
+            import psutil
+        except ImportError:
+            return
+        for pid in list(getattr(self.executor, '_processes', None) or ()):
+            try:
+                rss = psutil.Process(pid).memory_info().rss
+            except psutil.Error:
+                continue
+            print(f"Recycling decision worker {pid}: RSS {rss / 2**20:.1f} MiB")
+    
+    def _pack_tasks(self, tasks):
+        """
+        Pickle tasks with their arrays out of band, placing each distinct
+        array once in the shared memory block.
+        
+        Returns:
+            list: (pickle, block name, [(offset, size)]) per task
+        """
+        payloads = []
+        offsets = {}
+        segments = []
+        end = 0
+        for task in tasks:
+            buffers = []
+            data = pickle.dumps(task, protocol=5,
+                                buffer_callback=buffers.append)
+            spans = []
+            for buffer in buffers:
+                raw = buffer.raw()
+                key = (np.frombuffer(raw, np.uint8).ctypes.data, raw.nbytes)
+                start = offsets.get(key)
+                if start is None:
+                    start = offsets[key] = end
+                    segments.append((start, raw))
+                    end += -(-raw.nbytes // SHARED_ALIGNMENT) * SHARED_ALIGNMENT
+                spans.append((start, raw.nbytes))
+            payloads.append((data, spans))
+        
+        name = None
+        if segments:
+            shm = self._shared
+            if shm is None or shm.size < end:
+                self._release_shared()
+                shm = self._shared = shared_memory.SharedMemory(
+                    create=True, size=max(end, 2 * shm.size if shm else 0)
+                )
+                # Also freed if the executor is dropped without shutdown()
+                self._shared_release = weakref.finalize(self, _unlink_shared,
+                                                        shm)
+            for start, raw in segments:
+                shm.buf[start:start + raw.nbytes] = raw
+            name = shm.name
+        return [(data, name, spans) for data, spans in payloads]
+    
+    def _release_shared(self):
+        """Free the shared memory block."""
+        if self._shared is not None:
+            self._shared_release()
+            self._shared = None
     
     def map_decisions(self, turtles, perceptions):
         """
         Execute decisions for all turtles using processes.
         
+        Each task pickles a chunk of turtles with their perceptions and
+        returns the influences of the whole chunk, pointing back to the
+        turtles of this process. Turtles put to sleep by their decision
+        are put to sleep here too. A population below
+        ``parallel_threshold`` decides in the calling process.
+        
         Args:
             turtles: List of turtle agents (must be picklable)
-            perceptions: Dictionary mapping turtles to their perceptions
+            perceptions: Perceptions aligned with turtles, or a dictionary
+                mapping turtles to their perceptions
             
         Returns:
-            List of influences from all turtles
+            List of influence lists, one per chunk that emitted any
         """
-        # Create list of (turtle, perception) tuples for mapping
-        tasks = [(turtle, perceptions[turtle]) for turtle in turtles]
-        
-        results = []
-        for turtle_influences in self.executor.map(_process_decision_worker, tasks):
-            if turtle_influences:
-                results.append(turtle_influences)
-        
-        return results
+        tasks = _chunk_tasks(turtles, perceptions, self.num_workers,
+                             self.parallel_threshold)
+        if len(tasks) <= 1:
+            results = map(_decide_chunk, tasks)
+        else:
+            with self._lock:
+                self._maybe_recycle(len(tasks))
+                if shared_memory is None:
+                    worker, packed = _decide_chunk_detached, tasks
+                else:
+                    worker = _decide_chunk_shared
+                    packed = self._pack_tasks(tasks)
+                results = [
+                    _attach_chunk(task[0], result) for task, result in
+                    zip(tasks, self.executor.map(worker, packed))
+                ]
+        return [influences for influences in results if influences]
     
     def shutdown(self):
         """Shutdown the executor."""
-        self.executor.shutdown(wait=True)
+        _uncache(self)
+        with self._lock:
+            self.executor.shutdown(wait=True)
+            self._release_shared()
 
 
-# Module-level function for pickling compatibility
-def _process_decision_worker(task):
-    """Worker function for process-based decision execution."""
-    turtle, perception = task
-    return turtle.decide(perception)
+# Executors made by create_executor, by (backend, num_workers,
+# parallel_threshold), so that simulations created one after the other
+# reuse the running worker threads or processes
+_executor_cache = {}
+
+
+def _uncache(executor):
+    """Forget a cached executor that is being shut down."""
+    for key, cached in list(_executor_cache.items()):
+        if cached is executor:
+            del _executor_cache[key]
+
+
+def reset_executors():
+    """Shut down every executor cached by create_executor."""
+    executors = list(_executor_cache.values())
+    _executor_cache.clear()
+    for executor in executors:
+        executor.shutdown()
 
 
+atexit.register(reset_executors)
 
-def create_executor(backend='thread', num_workers=None):
+
+def create_executor(backend='thread', num_workers=None,
+                    parallel_threshold=PARALLEL_THRESHOLD):
     """
     Factory function to create an appropriate executor.
     
+    Executors are cached by their arguments: starting worker processes
+    costs a Python interpreter start-up each, so later calls with the
+    same arguments, e.g. one per simulation run, return the executor
+    already running. It lives until reset_executors() is called or the
+    interpreter exits.
+    
+    The returned executor is therefore shared with every other caller
+    that passed the same arguments, including simulations still running:
+    callers must not shut it down themselves, and should use
+    reset_executors() once no simulation needs the workers any more.
+    
     Args:
         backend: 'thread', 'process', or None
-                - 'thread': Uses threading (limited by GIL for CPU-bound tasks)
+                - 'thread': Uses threading for native decisions; Python
+                  decide() methods run in the calling thread (GIL)
                 - 'process': Uses multiprocessing (true parallelism, higher overhead)
                 - None: Sequential execution (no parallelism)
         num_workers: Number of workers (None = auto-detect)
+        parallel_threshold: Smallest number of turtles worth dispatching
+            to the workers; smaller populations decide sequentially
         
     Returns:
         Executor instance or None
@@ -147,14 +531,20 @@ def create_executor(backend='thread', num_workers=None):
         # Sequential (no parallelism)
         executor = create_executor(None)
     """
+    if backend is None:
+        return None
+    key = (backend, num_workers, parallel_threshold)
+    executor = _executor_cache.get(key)
+    if executor is not None:
+        return executor
     if backend == 'thread':
-        return ThreadedDecisionExecutor(num_workers)
+        executor = ThreadedDecisionExecutor(num_workers, parallel_threshold)
     elif backend == 'process':
-        return ProcessDecisionExecutor(num_workers)
-    elif backend is None:
-        return None
+        executor = ProcessDecisionExecutor(num_workers, parallel_threshold)
     else:
         raise ValueError(
             f"Unknown backend: {backend}. "
             f"Supported: 'thread', 'process', or None"
         )
+    _executor_cache[key] = executor
+    return executor
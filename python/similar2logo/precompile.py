@@ -0,0 +1,54 @@
+"""
+Ahead-of-time warm-up of the compiled kernels.
+
+Numba compiles each kernel the first time it is called, which can take
+several seconds. Running this module once after installing the package
+compiles every kernel and stores the result in Numba's on-disk cache, so
+simulations start without a compilation pause:
+
+    python -m similar2logo.precompile
+
+Without Numba the pure Python kernels are used and there is nothing to do.
+"""
+
+import time
+from importlib import import_module
+
+# Modules holding compiled kernels, each exposing a warmup() function
+KERNEL_MODULES = (
+    'similar2logo._kernels',
+    'similar2logo._boids_kernel',
+    'similar2logo._spatial_kernel',
+)
+
+
+def precompile(verbose=False):
+    """
+    Compile and cache every Numba kernel of the package.
+
+    Args:
+        verbose: Print each compiled module and its compile time
+
+    Returns:
+        list: Names of the compiled kernels
+    """
+    compiled = []
+    for module_name in KERNEL_MODULES:
+        start = time.perf_counter()
+        names = import_module(module_name).warmup()
+        if verbose and names:
+            elapsed = time.perf_counter() - start
+            print(f"  {module_name}: {', '.join(names)} ({elapsed:.2f}s)")
+        compiled.extend(names)
+    return compiled
+
+
+if __name__ == "__main__":
+    from similar2logo._kernels import HAS_NUMBA
+
+    if not HAS_NUMBA:
+        print("⚠️  Numba not available, using the pure Python kernels")
+    else:
+        print("Compiling Numba kernels...")
+        kernels = precompile(verbose=True)
+        print(f"✅ {len(kernels)} kernel(s) compiled and cached")
@@ -79,12 +79,19 @@ class RealTimeMatcherProbe(IProbe):
     
     NANOSECONDS_IN_SECOND = 1_000_000_000
     MILLISECONDS_IN_SECOND = 1_000
+    # Waits shorter than this are spun rather than slept, as sleep() can
+    # overshoot by a scheduler tick (about 1 ms on Linux, 15 on Windows)
+    SPIN_THRESHOLD = 2e-3
+    # Lag behind the schedule, in real seconds, after which the schedule
+    # is restarted from now instead of catching up with faster steps
+    MAX_LAG = 1.0
     
     def __init__(self, acceleration_factor: float = 1.0):
         if acceleration_factor <= 0:
             raise ValueError(f"Acceleration factor must be positive, got {acceleration_factor}")
         
         self.acceleration_factor = acceleration_factor
+        # Simulation and real time the schedule is measured from
         self.previous_measure_sim_time: Optional[int] = None
         self.previous_measure_real_time: Optional[float] = None
     
@@ -97,35 +104,67 @@ class RealTimeMatcherProbe(IProbe):
         """
         Slow down the simulation if it's running too fast.
         
-        Compares simulation time elapsed vs real time elapsed and sleeps
-        if the simulation is ahead of schedule.
+        Each step waits until the real time at which its simulation time
+        falls due, measured from a fixed starting point, so that early
+        wake-ups and oversleeping are made up for by the next steps
+        instead of accumulating.
         """
         if self.previous_measure_sim_time is None:
             self.observe_at_initial_time(current_time, simulation)
             return
         
-        # Calculate simulation time elapsed (in seconds)
-        sim_time_elapsed = current_time - self.previous_measure_sim_time
+        deadline = (self.previous_measure_real_time +
+                    (current_time - self.previous_measure_sim_time) /
+                    self.acceleration_factor)
+        delay = deadline - time.perf_counter()
         
-        # Calculate real time elapsed (in seconds)
-        current_real_time = time.perf_counter()
-        real_time_elapsed = current_real_time - self.previous_measure_real_time
-        
-        # Calculate how much time should have elapsed in real time
-        # for the simulation time that passed
-        target_real_time = sim_time_elapsed / self.acceleration_factor
-        
-        # If simulation is ahead of real time, sleep
-        difference = target_real_time - real_time_elapsed
-        
-        if difference > 0:
-            time.sleep(difference)
+        if delay < -self.MAX_LAG:
+            # Too far behind: start a new schedule from this step
+            self.observe_at_initial_time(current_time, simulation)
+            return
         
-        # Update measurements every second of simulation time
-        # This prevents accumulation of small timing errors
-        if sim_time_elapsed >= 1.0:
-            self.previous_measure_sim_time = current_time
-            self.previous_measure_real_time = time.perf_counter()
+        if delay > self.SPIN_THRESHOLD:
+            time.sleep(delay - self.SPIN_THRESHOLD)
+        while time.perf_counter() < deadline:
+            pass
+
+
+class ProbeContext:
+    """
+    What a probe sees at a simulation step.
+    
+    The turtle state is given as the simulation's state arrays, index i
+    describing simulation.turtles[i], so statistics probes can reduce
+    them in one NumPy call, e.g. ``np.mean(context.turtles_speed)``,
+    instead of looping over the turtles. The arrays are views of the
+    simulation's own arrays and are only valid during the call.
+    
+    Any other attribute is read from the simulation, so probes written
+    against the LogoSimulation keep working with a context.
+    
+    Attributes:
+        step: Current simulation step
+        simulation: The LogoSimulation instance
+        environment: The simulation's environment
+        turtles_x, turtles_y: Turtle positions
+        turtles_heading: Turtle headings in radians
+        turtles_speed: Turtle speeds
+    """
+    
+    __slots__ = ('step', 'simulation', 'environment', 'turtles_x',
+                 'turtles_y', 'turtles_heading', 'turtles_speed')
+    
+    def __init__(self, step: int, simulation):
+        self.step = step
+        self.simulation = simulation
+        self.environment = simulation.environment
+        self.turtles_x = simulation.xs
+        self.turtles_y = simulation.ys
+        self.turtles_heading = simulation.headings
+        self.turtles_speed = simulation.speeds
+    
+    def __getattr__(self, name):
+        return getattr(self.simulation, name)
 
 
 class ProbeManager:
@@ -141,27 +180,51 @@ class ProbeManager:
     
     def __init__(self):
         self.probes = {}
+        # Bound observer methods of the probes, rebuilt when probes are
+        # added or removed so that notifying is a plain loop of calls
+        self._initial_callbacks = ()
+        self._step_callbacks = ()
+        self._final_callbacks = ()
+    
+    def _rebuild_callbacks(self):
+        probes = tuple(self.probes.values())
+        self._initial_callbacks = tuple(
+            probe.observe_at_initial_time for probe in probes
+        )
+        self._step_callbacks = tuple(
+            probe.observe_at_partial_consistent_time for probe in probes
+        )
+        self._final_callbacks = tuple(
+            probe.observe_at_final_time for probe in probes
+        )
     
     def add_probe(self, name: str, probe: IProbe):
         """Add a probe with a given name."""
         self.probes[name] = probe
+        self._rebuild_callbacks()
     
     def remove_probe(self, name: str):
         """Remove a probe by name."""
         if name in self.probes:
             del self.probes[name]
+            self._rebuild_callbacks()
     
     def notify_initial_time(self, initial_time: int, simulation):
         """Notify all probes of simulation start."""
-        for probe in self.probes.values():
-            probe.observe_at_initial_time(initial_time, simulation)
+        for callback in self._initial_callbacks:
+            callback(initial_time, simulation)
     
     def notify_step(self, current_time: int, simulation):
-        """Notify all probes of a simulation step."""
-        for probe in self.probes.values():
-            probe.observe_at_partial_consistent_time(current_time, simulation)
+        """
+        Notify all probes of a simulation step.
+        
+        ``simulation`` is usually a ProbeContext built once for all the
+        probes of the step.
+        """
+        for callback in self._step_callbacks:
+            callback(current_time, simulation)
     
     def notify_final_time(self, final_time: int, simulation):
         """Notify all probes of simulation end."""
-        for probe in self.probes.values():
-            probe.observe_at_final_time(final_time, simulation)
+        for callback in self._final_callbacks:
+            callback(final_time, simulation)
@@ -10,9 +10,11 @@ The reaction model is responsible for:
 
 import math
 from typing import List
+import numpy as np
 from .influences import *
 from .environment import Environment
 from .tools import MathUtil, Point2D
+from .spatial import MarkGrid
 
 try:
     from ._core.reaction import Reaction as CppReaction
@@ -21,6 +23,22 @@ except ImportError:
     HAS_CPP_REACTION = False
 
 
+def _turtle_index(turtles, agent):
+    """
+    Position of an agent in the turtle list, or -1 if it is not there.
+
+    Read from the agent's ``_idx`` when it is up to date, so that only
+    agents added without one cost a scan of the list.
+    """
+    idx = getattr(agent, '_idx', -1)
+    if 0 <= idx < len(turtles) and turtles[idx] is agent:
+        return idx
+    for idx, turtle in enumerate(turtles):
+        if turtle is agent:
+            return idx
+    return -1
+
+
 class LogoReactionModel:
     """
     Default reaction model for Logo simulations.
@@ -29,6 +47,20 @@ class LogoReactionModel:
     to the SIMILAR influence/reaction architecture.
     """
     
+    # Regular influence processors in application order: the influence
+    # classes each one handles, whether it also applies the rows of an
+    # InfluenceBuffer, and the name of the method (so subclasses can
+    # override it). A processor with nothing to apply is not called.
+    _DISPATCH = (
+        ((ChangePosition,), True, '_process_change_position_influences'),
+        ((ChangeDirection,), True, '_process_change_direction_influences'),
+        ((ChangeSpeed,), True, '_process_change_speed_influences'),
+        ((Stop,), True, '_process_stop_influences'),
+        ((DropMark,), False, '_process_drop_mark_influences'),
+        ((RemoveMark, RemoveMarks), False, '_process_remove_mark_influences'),
+        ((EmitPheromone,), False, '_process_emit_pheromone_influences'),
+    )
+    
     def __init__(self):
         self.marks_counter = 0  # For generating unique mark IDs
         self._cpp_fallback_warned = False  # Track if we've warned about Python fallback
@@ -53,6 +85,7 @@ class LogoReactionModel:
         # (Environment inherits from CppEnvironment when available)
         cpp_used = False
         has_cpp_candidates = False
+        handled = ()  # Influence classes applied by the C++ reaction
         if HAS_CPP_REACTION:
             try:
                 from ._core.environment import Environment as CppEnvironment
@@ -74,6 +107,9 @@ class LogoReactionModel:
                     # Pass environment directly - it already IS a C++ environment
                     self._cpp_reaction.apply(cpp_influences, environment, dt)
                     cpp_used = True
+                    # Every influence of these classes went to C++, so
+                    # their buckets are left out of the Python pass
+                    handled = {type(influence) for influence in cpp_influences}
                     
                     # Show success message once (if verbose mode enabled)
                     if not self._cpp_success_shown:
@@ -107,20 +143,22 @@ class LogoReactionModel:
             self._cpp_fallback_warned = True
 
         # Process each type of influence (Python legacy or non-C++ types)
-        self._process_change_position_influences(influences, environment)
-        self._process_change_direction_influences(influences, environment)
-        self._process_change_speed_influences(influences, environment)
-        self._process_stop_influences(influences, environment)
-        self._process_drop_mark_influences(influences, environment)
-        self._process_remove_mark_influences(influences, environment)
-        self._process_emit_pheromone_influences(influences, environment)
+        buffer = influences.buffer
+        buffered = buffer is not None and buffer.n > 0
+        get_by_type = influences.get_by_type
+        for types, uses_buffer, process in self._DISPATCH:
+            if (uses_buffer and buffered) or any(
+                    get_by_type(t) for t in types if t not in handled):
+                getattr(self, process)(influences, environment)
         
         # Update pheromone dynamics (only for Python environment)
-        # C++ environment handles this internally or doesn't support it yet
+        # The C++ reaction already diffused and evaporated the fields
         dt = time_max - time_min
-        if dt > 0 and hasattr(environment, 'pheromone_grids') and environment.pheromone_grids:
-            self._pheromone_diffusion(environment, dt)
-            self._pheromone_evaporation(environment, dt)
+        if (not cpp_used and dt > 0 and
+                hasattr(environment, 'pheromone_grids') and
+                environment.pheromone_grids):
+            # Single pass over each field
+            environment.diffuse_and_evaporate(dt)
 
     def make_natural_reaction(self, time_min: int, time_max: int,
                              environment: Environment,
@@ -154,13 +192,21 @@ class LogoReactionModel:
             turtles: List of turtles in simulation
         """
         for influence in influences:
+            agent = influence.agent
             if isinstance(influence, SystemInfluenceAddAgent):
-                if influence.agent not in turtles:
-                    turtles.append(influence.agent)
+                if _turtle_index(turtles, agent) < 0:
+                    agent._idx = len(turtles)
+                    turtles.append(agent)
 
             elif isinstance(influence, SystemInfluenceRemoveAgent):
-                if influence.agent in turtles:
-                    turtles.remove(influence.agent)
+                idx = _turtle_index(turtles, agent)
+                if idx >= 0:
+                    # Swap-remove: the last turtle takes the freed slot
+                    last = turtles.pop()
+                    if last is not agent:
+                        turtles[idx] = last
+                        last._idx = idx
+                    agent._idx = -1
     
     # ========================================================================
     # Regular Influence Processing
@@ -169,57 +215,153 @@ class LogoReactionModel:
     def _process_change_position_influences(self, influences: InfluencesMap,
                                            environment: Environment):
         """Process ChangePosition influences."""
-        for influence in influences.get_by_type(ChangePosition):
-            agent = influence.agent
-            
-            if influence.target_position:
-                # Absolute position
-                new_x = influence.target_position.x
-                new_y = influence.target_position.y
-            else:
-                # Relative position
-                new_x = agent.position.x + influence.dx
-                new_y = agent.position.y + influence.dy
-            
-            # Apply toroidal topology if enabled
-            if environment.toroidal:
-                new_x = new_x % environment.width
-                new_y = new_y % environment.height
-            else:
-                # Clamp to boundaries
-                new_x = max(0, min(new_x, environment.width - 1))
-                new_y = max(0, min(new_y, environment.height - 1))
-            
+        bucket = influences.get_by_type(ChangePosition)
+        if bucket:
             # Check for obstacles/conflicts here if needed
             # For now, accept all position changes
-            agent.position.x = new_x
-            agent.position.y = new_y
+            if environment.toroidal:
+                self._apply_moves_toroidal(bucket, environment.width,
+                                           environment.height)
+            else:
+                self._apply_moves_bounded(bucket, environment.width - 1,
+                                          environment.height - 1)
+        
+        buffer = influences.buffer
+        if buffer is not None and buffer.n:
+            self._apply_buffered_moves(buffer, environment)
     
     def _process_change_direction_influences(self, influences: InfluencesMap,
                                             environment: Environment):
         """Process ChangeDirection influences."""
+        pi = math.pi
+        normalize = MathUtil.normalize_angle
         for influence in influences.get_by_type(ChangeDirection):
             agent = influence.agent
-            
-            if influence.target_heading is not None:
-                # Absolute heading
-                agent.heading = MathUtil.normalize_angle(influence.target_heading)
-            else:
+            heading = influence.target_heading
+            if heading is None:
                 # Relative heading
-                agent.heading = MathUtil.normalize_angle(
-                    agent.heading + influence.delta_heading
-                )
+                heading = agent.heading + influence.delta_heading
+            # Headings already in [-pi, pi] skip the normalization call
+            if heading > pi or heading < -pi:
+                heading = normalize(heading)
+            agent.heading = heading
+        
+        buffer = influences.buffer
+        if buffer is not None and buffer.n:
+            self._apply_buffered_turns(buffer)
     
     def _process_change_speed_influences(self, influences: InfluencesMap,
                                         environment: Environment):
         """Process ChangeSpeed influences."""
         for influence in influences.get_by_type(ChangeSpeed):
             agent = influence.agent
-            
-            if influence.target_speed is not None:
-                agent.speed = max(0, influence.target_speed)
+            speed = influence.target_speed
+            if speed is None:
+                speed = agent.speed + influence.delta_speed
+            # max(0, speed) without the call
+            agent.speed = speed if speed > 0 else 0
+        
+        buffer = influences.buffer
+        if buffer is not None and buffer.n:
+            self._apply_buffered_speeds(buffer)
+    
+    @staticmethod
+    def _apply_moves_toroidal(bucket, width, height):
+        """Apply a bucket of ChangePosition influences, wrapping positions."""
+        for influence in bucket:
+            position = influence.agent.position
+            target = influence.target_position
+            if target:
+                # Absolute position
+                position.x = target.x % width
+                position.y = target.y % height
+            else:
+                # Relative position
+                position.x = (position.x + influence.dx) % width
+                position.y = (position.y + influence.dy) % height
+
+    @staticmethod
+    def _apply_moves_bounded(bucket, max_x, max_y):
+        """Apply a bucket of ChangePosition influences, clamping positions."""
+        for influence in bucket:
+            position = influence.agent.position
+            target = influence.target_position
+            if target:
+                x = target.x
+                y = target.y
             else:
-                agent.speed = max(0, agent.speed + influence.delta_speed)
+                x = position.x + influence.dx
+                y = position.y + influence.dy
+            # max(0, min(v, max_v)) without the calls
+            position.x = 0 if x < 0 else (max_x if x > max_x else x)
+            position.y = 0 if y < 0 else (max_y if y > max_y else y)
+
+    def _buffered_totals(self, buffer: InfluenceBuffer, kind: int):
+        """
+        Sum the buffered values of one kind per agent.
+        
+        Returns:
+            tuple: (agent indices, per-agent totals) of the agents that
+            received at least one influence of that kind
+        """
+        idx, values = buffer.select(kind)
+        if not len(idx):
+            return idx, values
+        n_agents = len(buffer.agents)
+        touched = np.flatnonzero(np.bincount(idx, minlength=n_agents))
+        if values.ndim == 2:
+            totals = np.stack([
+                np.bincount(idx, weights=values[:, 0], minlength=n_agents),
+                np.bincount(idx, weights=values[:, 1], minlength=n_agents),
+            ], axis=1)
+        else:
+            totals = np.bincount(idx, weights=values, minlength=n_agents)
+        return touched, totals[touched]
+    
+    def _apply_buffered_moves(self, buffer: InfluenceBuffer,
+                              environment: Environment):
+        """Apply the KIND_MOVE rows of an influence buffer."""
+        touched, totals = self._buffered_totals(buffer, KIND_MOVE)
+        if not len(touched):
+            return
+        agents = buffer.agents
+        # Each agent's position is looked up once, then read and written
+        points = [agents[i].position for i in touched.tolist()]
+        positions = np.array([(p.x, p.y) for p in points]) + totals
+        if environment.toroidal:
+            np.mod(positions, (environment.width, environment.height), out=positions)
+        else:
+            # Moves of one agent are summed before clamping
+            np.clip(positions, 0, (environment.width - 1, environment.height - 1),
+                    out=positions)
+        for point, (x, y) in zip(points, positions.tolist()):
+            point.x = x
+            point.y = y
+    
+    def _apply_buffered_turns(self, buffer: InfluenceBuffer):
+        """Apply the KIND_TURN rows of an influence buffer."""
+        touched, totals = self._buffered_totals(buffer, KIND_TURN)
+        if not len(touched):
+            return
+        agents = buffer.agents
+        turned = [agents[i] for i in touched.tolist()]
+        headings = np.array([agent.heading for agent in turned]) + totals
+        # Wrap to [-pi, pi) like MathUtil.normalize_angle
+        headings = np.mod(headings + math.pi, 2 * math.pi) - math.pi
+        for agent, heading in zip(turned, headings.tolist()):
+            agent.heading = heading
+    
+    def _apply_buffered_speeds(self, buffer: InfluenceBuffer):
+        """Apply the KIND_SPEED rows of an influence buffer."""
+        touched, totals = self._buffered_totals(buffer, KIND_SPEED)
+        if not len(touched):
+            return
+        agents = buffer.agents
+        changed = [agents[i] for i in touched.tolist()]
+        speeds = np.array([agent.speed for agent in changed]) + totals
+        np.maximum(speeds, 0.0, out=speeds)
+        for agent, speed in zip(changed, speeds.tolist()):
+            agent.speed = speed
     
     def _process_stop_influences(self, influences: InfluencesMap,
                                 environment: Environment):
@@ -229,23 +371,36 @@ class LogoReactionModel:
             agent.speed = 0.0
             if hasattr(agent, 'acceleration'):
                 agent.acceleration = 0.0
+        
+        buffer = influences.buffer
+        if buffer is not None and buffer.n:
+            self._apply_buffered_stops(buffer)
+    
+    def _apply_buffered_stops(self, buffer: InfluenceBuffer):
+        """Apply the KIND_STOP rows of an influence buffer."""
+        idx, _ = buffer.select(KIND_STOP)
+        if not len(idx):
+            return
+        agents = buffer.agents
+        # Each agent is stopped once however many rows it has
+        for i in np.unique(idx).tolist():
+            agent = agents[i]
+            agent.speed = 0.0
+            if hasattr(agent, 'acceleration'):
+                agent.acceleration = 0.0
     
     def _process_drop_mark_influences(self, influences: InfluencesMap,
                                      environment: Environment):
         """Process DropMark influences."""
-        if not hasattr(environment, 'marks'):
-            environment.marks = {}
+        index = MarkGrid.of(environment)
 
         for influence in influences.get_by_type(DropMark):
             # Special case: if content is "remove", remove all marks at current position
             if influence.content == "remove":
-                marks_to_remove = []
-                for mark_id, mark in environment.marks.items():
-                    if (abs(mark['position'].x - influence.position.x) < 1.0 and
-                        abs(mark['position'].y - influence.position.y) < 1.0):
-                        marks_to_remove.append(mark_id)
-                for mark_id in marks_to_remove:
+                for mark_id, _ in index.near(influence.position.x,
+                                             influence.position.y):
                     del environment.marks[mark_id]
+                    index.remove(mark_id)
             else:
                 # Normal mark dropping
                 mark_id = f"mark_{self.marks_counter}"
@@ -260,53 +415,66 @@ class LogoReactionModel:
                 }
 
                 environment.marks[mark_id] = mark
+                index.add(mark_id, mark)
     
     def _process_remove_mark_influences(self, influences: InfluencesMap,
                                        environment: Environment):
         """Process RemoveMark and RemoveMarks influences."""
-        if not hasattr(environment, 'marks'):
-            return
+        index = MarkGrid.of(environment)
         
         # Process single mark removals
         for influence in influences.get_by_type(RemoveMark):
             if influence.mark_id in environment.marks:
                 del environment.marks[influence.mark_id]
+                index.remove(influence.mark_id)
         
         # Process bulk mark removals
         for influence in influences.get_by_type(RemoveMarks):
-            marks_to_remove = []
-            
-            for mark_id, mark in environment.marks.items():
-                # Check category
-                if mark['category'] != influence.category:
-                    continue
-                
-                # Check position/radius if specified
-                if influence.position and influence.radius:
-                    distance = mark['position'].distance(influence.position)
-                    if distance > influence.radius:
-                        continue
-                
-                marks_to_remove.append(mark_id)
+            # With a position and radius, only the marks of the nearby
+            # cells are candidates
+            if influence.position and influence.radius:
+                candidates = index.within(influence.position.x,
+                                          influence.position.y,
+                                          influence.radius)
+            else:
+                candidates = list(environment.marks.items())
+            marks_to_remove = [
+                mark_id for mark_id, mark in candidates
+                if mark['category'] == influence.category
+            ]
             
             for mark_id in marks_to_remove:
                 del environment.marks[mark_id]
+                index.remove(mark_id)
     
     def _process_emit_pheromone_influences(self, influences: InfluencesMap,
                                           environment: Environment):
-        """Process EmitPheromone influences."""
+        """
+        Process EmitPheromone influences.
+        
+        Emissions are grouped by pheromone and added to each grid with a
+        single np.add.at, which accumulates repeated cells in influence
+        order like one += per influence would.
+        """
+        grids = environment.pheromone_grids
+        dirty = getattr(environment, 'pheromone_dirty', None)
+        emissions = {}
         for influence in influences.get_by_type(EmitPheromone):
-            x = int(influence.position.x)
-            y = int(influence.position.y)
-            
-            # Clamp to grid
-            x = max(0, min(x, environment.width - 1))
-            y = max(0, min(y, environment.height - 1))
-            
-            # Add pheromone to grid
-            if influence.pheromone_id in environment.pheromone_grids:
-                current = environment.pheromone_grids[influence.pheromone_id][y][x]
-                environment.pheromone_grids[influence.pheromone_id][y][x] = current + influence.amount
+            if influence.pheromone_id in grids:
+                emissions.setdefault(influence.pheromone_id, []).append(influence)
+        
+        for pheromone_id, emitted in emissions.items():
+            grid = grids[pheromone_id]
+            n = len(emitted)
+            xs = np.fromiter((i.position.x for i in emitted), np.float64, n)
+            ys = np.fromiter((i.position.y for i in emitted), np.float64, n)
+            amounts = np.fromiter((i.amount for i in emitted), grid.dtype, n)
+            # Truncate like int() and clamp to the grid
+            xs = np.clip(xs.astype(np.intp), 0, environment.width - 1)
+            ys = np.clip(ys.astype(np.intp), 0, environment.height - 1)
+            np.add.at(grid, (ys, xs), amounts)
+            if dirty is not None:
+                dirty[pheromone_id] = True
     
     # ========================================================================
     # Pheromone Dynamics
@@ -316,39 +484,14 @@ class LogoReactionModel:
         """
         Apply diffusion to pheromone fields.
         
+        The environment owns its fields and their back buffers, see
+        Environment.diffuse.
+        
         Args:
             environment: The environment containing pheromone grids
             dt: Time step size
         """
-        for pheromone_id, pheromone in environment.pheromones.items():
-            if pheromone.diffusion_coef <= 0:
-                continue
-            
-            grid = environment.pheromone_grids[pheromone_id]
-            new_grid = [row[:] for row in grid]  # Deep copy
-            
-            # 8-neighbor diffusion
-            for y in range(environment.height):
-                for x in range(environment.width):
-                    current_value = grid[y][x]
-                    
-                    if current_value <= 0:
-                        continue
-                    
-                    # Get 8 neighbors
-                    neighbors = self._get_neighbors(x, y, environment)
-                    
-                    # Diffuse to each neighbor
-                    diffusion_amount = pheromone.diffusion_coef * current_value * dt
-                    amount_per_neighbor = diffusion_amount / len(neighbors)
-                    
-                    for nx, ny in neighbors:
-                        new_grid[ny][nx] += amount_per_neighbor
-                    
-                    # Reduce current cell
-                    new_grid[y][x] -= diffusion_amount
-            
-            environment.pheromone_grids[pheromone_id] = new_grid
+        environment.diffuse(dt)
     
     def _pheromone_evaporation(self, environment: Environment, dt: int):
         """
@@ -358,49 +501,4 @@ class LogoReactionModel:
             environment: The environment containing pheromone grids
             dt: Time step size
         """
-        for pheromone_id, pheromone in environment.pheromones.items():
-            if pheromone.evaporation_coef <= 0:
-                continue
-            
-            grid = environment.pheromone_grids[pheromone_id]
-            
-            for y in range(environment.height):
-                for x in range(environment.width):
-                    current_value = grid[y][x]
-                    
-                    # Evaporate
-                    evaporation = pheromone.evaporation_coef * current_value * dt
-                    new_value = current_value - evaporation
-                    
-                    # Apply minimum threshold
-                    if new_value < pheromone.min_value:
-                        new_value = 0.0
-                    
-                    grid[y][x] = new_value
-    
-    def _get_neighbors(self, x: int, y: int, environment: Environment):
-        """Get 8-connected neighbors of a cell."""
-        neighbors = []
-        
-        for dy in [-1, 0, 1]:
-            for dx in [-1, 0, 1]:
-                if dx == 0 and dy == 0:
-                    continue
-                
-                nx = x + dx
-                ny = y + dy
-                
-                # Handle toroidal topology
-                if environment.toroidal:
-                    nx = nx % environment.width
-                    ny = ny % environment.height
-                else:
-                    # Skip out-of-bounds neighbors
-                    if nx < 0 or nx >= environment.width:
-                        continue
-                    if ny < 0 or ny >= environment.height:
-                        continue
-                
-                neighbors.append((nx, ny))
-        
-        return neighbors
+        environment.evaporate(dt)
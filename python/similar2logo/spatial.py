@@ -2,107 +2,625 @@
 Spatial indexing structures for efficient neighbor queries.
 """
 
-from collections import defaultdict
-from typing import List, Set
+from typing import List
 import math
 
+import numpy as np
+
+from . import _spatial_kernel
+
 
 class SpatialHashGrid:
     """
-    Spatial hash grid for efficient neighbor queries.
-    
-    Divides space into cells and indexes objects by their cell location.
-    Allows O(1) average-case neighbor queries instead of O(N).
-    
+    Fixed-radius cell list for efficient neighbor queries.
+
+    Divides space into a dense grid of cells and stores each object
+    in the cell containing it. With a cell size equal to the query radius,
+    a query only inspects the 3x3 block of cells around the query point,
+    giving O(1) expected neighbor queries instead of O(N). Rebuilding the
+    grid is a single pass over the objects, with no tree to balance.
+
     Args:
         cell_size: Size of each grid cell (should be >= typical perception radius)
         width: Width of the space
         height: Height of the space
+        toroidal: Whether queries wrap around the edges of the space
     """
-    
-    def __init__(self, cell_size: float, width: float, height: float):
+
+    # Expected number of candidate objects above which query_radius()
+    # runs vectorized over the flat arrays when numba is missing
+    VECTOR_THRESHOLD = 200
+
+    def __init__(self, cell_size: float, width: float, height: float,
+                 toroidal: bool = False):
         self.cell_size = cell_size
         self.width = width
         self.height = height
-        self.grid = defaultdict(list)
-        self.object_cells = {}  # Track which cell each object is in
-        
+        self.toroidal = toroidal
+        # Cells are stretched so that a whole number of them tiles the
+        # space, which keeps wrapped neighbour cells adjacent
+        self.cols = max(1, int(width // cell_size))
+        self.rows = max(1, int(height // cell_size))
+        self._cell_width = width / self.cols
+        self._cell_height = height / self.rows
+        # Positions are binned by multiplying with the inverse cell sizes
+        self._inv_cell_width = 1.0 / self._cell_width
+        self._inv_cell_height = 1.0 / self._cell_height
+        self._cells = [[] for _ in range(self.cols * self.rows)]
+        self._object_cells = {}  # Track which cell each object is in
+        self._object_slots = {}  # Index of each object in its cell list
+        self._object_cell_ids = []  # Cell of each object, in rebuild order
+        self._object_xs = []  # Position of each object, in rebuild order
+        self._object_ys = []
+        self._arrays = None  # Flat arrays of the grid, see _grid_arrays()
+        # Objects of the last rebuild_soa() whose cell lists and cell map
+        # have not been built yet, see _materialize()
+        self._pending = None
+        # Objects of the last rebuild while the flat arrays still hold
+        # their positions, see query_radius()
+        self._objects = None
+        # Neighbour buffers reused by every query, see query_radius_arrays()
+        self._query_buffers = (np.empty(64, dtype=np.int32), np.empty(64))
+        # Cells around each cell, per query reach, see _block()
+        self._blocks = {}
+
+    @property
+    def cells(self):
+        """Objects of each cell, indexed by cell_y * cols + cell_x."""
+        if self._pending is not None:
+            self._materialize()
+        return self._cells
+
+    @property
+    def object_cells(self):
+        """Cell of each object, keyed by the object's id()."""
+        if self._pending is not None:
+            self._materialize()
+        return self._object_cells
+
+    def _materialize(self):
+        """
+        Build the per-cell object lists of the last rebuild_soa() from its
+        CSR arrays, for the object-based queries and updates.
+        """
+        objects = self._pending
+        self._pending = None
+        cell_ids, cell_start, cell_idx, xs, ys = self._arrays
+        in_cell_order = [objects[j] for j in cell_idx.tolist()]
+        starts = cell_start.tolist()
+        cells = [[] for _ in range(self.cols * self.rows)]
+        for cell in np.flatnonzero(np.diff(cell_start)).tolist():
+            cells[cell] = in_cell_order[starts[cell]:starts[cell + 1]]
+        self._cells = cells
+        slots = np.arange(len(cell_idx)) - cell_start[cell_ids[cell_idx]]
+        self._object_slots = dict(zip(map(id, in_cell_order), slots.tolist()))
+        cell_ids = cell_ids.tolist()
+        self._object_cells = dict(zip(map(id, objects), cell_ids))
+        self._object_cell_ids = cell_ids
+        self._object_xs = xs.tolist()
+        self._object_ys = ys.tolist()
+
     def clear(self):
         """Clear all objects from the grid."""
-        self.grid.clear()
-        self.object_cells.clear()
-    
+        self._pending = None
+        self._objects = None
+        for cell in self._cells:
+            cell.clear()
+        self._object_cells.clear()
+        self._object_slots.clear()
+        self._object_cell_ids = []
+        self._object_xs = []
+        self._object_ys = []
+        self._arrays = None
+
     def _get_cell(self, x: float, y: float) -> tuple:
         """Get the cell coordinates for a position."""
-        cell_x = int(x / self.cell_size)
-        cell_y = int(y / self.cell_size)
+        cell_x = int(x * self._inv_cell_width)
+        cell_y = int(y * self._inv_cell_height)
+        # Positions outside the space are kept in the border cells
+        cell_x = min(max(cell_x, 0), self.cols - 1)
+        cell_y = min(max(cell_y, 0), self.rows - 1)
         return (cell_x, cell_y)
-    
+
+    def _cell_id(self, x: float, y: float) -> int:
+        """Flat index of the cell of a position, cell_y * cols + cell_x."""
+        cell_x = min(max(int(x * self._inv_cell_width), 0), self.cols - 1)
+        cell_y = min(max(int(y * self._inv_cell_height), 0), self.rows - 1)
+        return cell_y * self.cols + cell_x
+
     def insert(self, obj, x: float, y: float):
         """Insert an object at the given position."""
-        cell = self._get_cell(x, y)
-        self.grid[cell].append(obj)
-        self.object_cells[id(obj)] = cell
-    
+        if self._pending is not None:
+            self._materialize()
+        cell_id = self._cell_id(x, y)
+        cell = self.cells[cell_id]
+        self._object_slots[id(obj)] = len(cell)
+        cell.append(obj)
+        self.object_cells[id(obj)] = cell_id
+        self._object_cell_ids.append(cell_id)
+        self._object_xs.append(x)
+        self._object_ys.append(y)
+        self._arrays = None
+        self._objects = None
+
     def update(self, obj, x: float, y: float):
-        """Update an object's position."""
+        """
+        Update an object's position.
+
+        Objects leaving a cell are swapped with the last object of its
+        list and popped, so an update never scans a cell.
+        """
         obj_id = id(obj)
-        
+        self._objects = None
+        cells = self.cells
+        object_cells = self.object_cells
+        slots = self._object_slots
+        cell_id = self._cell_id(x, y)
+
         # Remove from old cell if exists
-        if obj_id in self.object_cells:
-            old_cell = self.object_cells[obj_id]
-            if obj in self.grid[old_cell]:
-                self.grid[old_cell].remove(obj)
-        
+        old_cell_id = object_cells.get(obj_id)
+        if old_cell_id == cell_id:
+            return
+        if old_cell_id is not None:
+            old_cell = cells[old_cell_id]
+            last = old_cell.pop()
+            if last is not obj:
+                slot = slots[obj_id]
+                old_cell[slot] = last
+                slots[id(last)] = slot
+
         # Insert into new cell
-        self.insert(obj, x, y)
-    
-    def query_radius(self, x: float, y: float, radius: float, exclude=None) -> List:
+        cell = cells[cell_id]
+        slots[obj_id] = len(cell)
+        cell.append(obj)
+        object_cells[obj_id] = cell_id
+
+    def _cell_range(self, center: int, cell_radius: int, count: int):
+        """Cell indices along one axis within cell_radius of center."""
+        if self.toroidal:
+            if 2 * cell_radius + 1 >= count:
+                return range(count)
+            return [(center + d) % count
+                    for d in range(-cell_radius, cell_radius + 1)]
+        return range(max(center - cell_radius, 0),
+                     min(center + cell_radius, count - 1) + 1)
+
+    def _block(self, cell_id: int, reach_x: int, reach_y: int) -> tuple:
+        """
+        Flat indices of the cells within reach_x columns and reach_y rows
+        of a cell, wrapped on a toroidal grid. Blocks are computed once
+        per cell and reach, so a query is a single pass over a tuple.
+        """
+        table = self._blocks.get((reach_x, reach_y))
+        if table is None:
+            table = [None] * (self.cols * self.rows)
+            self._blocks[(reach_x, reach_y)] = table
+        block = table[cell_id]
+        if block is None:
+            cols = self.cols
+            cell_y, cell_x = divmod(cell_id, cols)
+            cell_xs = self._cell_range(cell_x, reach_x, cols)
+            block = table[cell_id] = tuple(
+                row * cols + column
+                for row in self._cell_range(cell_y, reach_y, self.rows)
+                for column in cell_xs
+            )
+        return block
+
+    def query_radius(self, x: float, y: float, radius: float, exclude=None,
+                     squared: bool = False) -> List:
         """
         Query all objects within radius of the given position.
-        
+
+        Right after a rebuild(), queries are answered from the grid's flat
+        arrays by a compiled kernel (or with NumPy for queries spanning
+        many objects when numba is missing), using the positions the
+        objects had at the rebuild; other queries read the objects'
+        current positions.
+
         Args:
             x: Query position x
             y: Query position y
             radius: Search radius
             exclude: Optional object to exclude from results
-            
+            squared: Return squared distances, skipping the square roots
+
         Returns:
             List of (object, distance) tuples
         """
+        if self._objects is not None:
+            found = self._query_arrays(x, y, radius, exclude, squared)
+            if found is not None:
+                objects, distances = found
+                return list(zip(objects, distances.tolist()))
+        return self._query_objects(x, y, radius, exclude, squared)
+
+    def query_radius_arrays(self, x: float, y: float, radius: float,
+                            exclude=None, squared: bool = False):
+        """
+        query_radius() without the (object, distance) tuples.
+
+        The distances are written into a buffer owned by the grid and
+        reused by the next query, so they must be consumed or copied
+        before querying again.
+
+        Args:
+            x: Query position x
+            y: Query position y
+            radius: Search radius
+            exclude: Optional object to exclude from results
+            squared: Return squared distances, skipping the square roots
+
+        Returns:
+            tuple: (list of objects, float64 array view of their distances)
+        """
+        if self._objects is not None:
+            found = self._query_arrays(x, y, radius, exclude, squared)
+            if found is not None:
+                return found
+        neighbors = self._query_objects(x, y, radius, exclude, squared)
+        out_d2 = self._distance_buffer(len(neighbors))
+        out_d2[:] = [distance for _, distance in neighbors]
+        return [obj for obj, _ in neighbors], out_d2
+
+    def _query_objects(self, x, y, radius, exclude, squared):
+        """query_radius() over the cell lists and current positions."""
         results = []
-        
-        # Determine which cells to check
-        cell_radius = int(math.ceil(radius / self.cell_size))
-        center_cell = self._get_cell(x, y)
-        
+        radius_sq = radius * radius
+        cells = self.cells
+        toroidal = self.toroidal
+        width = self.width
+        height = self.height
+        half_width = width / 2
+        half_height = height / 2
+
         # Check all cells within range
-        for dx in range(-cell_radius, cell_radius + 1):
-            for dy in range(-cell_radius, cell_radius + 1):
-                cell = (center_cell[0] + dx, center_cell[1] + dy)
-                
-                if cell not in self.grid:
+        block = self._block(self._cell_id(x, y), *self._reach(radius))
+        for cell_id in block:
+            for obj in cells[cell_id]:
+                if obj is exclude:
                     continue
-                
-                # Check objects in this cell
-                for obj in self.grid[cell]:
-                    if obj is exclude:
-                        continue
-                    
-                    # Calculate actual distance
-                    obj_x = obj.position.x
-                    obj_y = obj.position.y
-                    dx_actual = x - obj_x
-                    dy_actual = y - obj_y
-                    dist_sq = dx_actual * dx_actual + dy_actual * dy_actual
-                    
-                    if dist_sq <= radius * radius:
-                        results.append((obj, math.sqrt(dist_sq)))
-        
+
+                # Calculate actual distance
+                dx = x - obj.position.x
+                dy = y - obj.position.y
+                if toroidal:
+                    # Shortest distance across the wrapped edges
+                    if dx > half_width:
+                        dx -= width
+                    elif dx < -half_width:
+                        dx += width
+                    if dy > half_height:
+                        dy -= height
+                    elif dy < -half_height:
+                        dy += height
+                dist_sq = dx * dx + dy * dy
+
+                if dist_sq <= radius_sq:
+                    results.append(
+                        (obj, dist_sq if squared else math.sqrt(dist_sq))
+                    )
+
         return results
-    
+
+    def _distance_buffer(self, count):
+        """First count entries of the reused distance buffer, grown to fit."""
+        out_idx, out_d2 = self._query_buffers
+        if count > len(out_d2):
+            out_idx = np.empty(2 * count, dtype=np.int32)
+            out_d2 = np.empty(2 * count)
+            self._query_buffers = (out_idx, out_d2)
+        return out_d2[:count]
+
+    def _query_arrays(self, x, y, radius, exclude, squared):
+        """
+        query_radius_arrays() over the flat arrays of the last rebuild
+        with the compiled kernel, or with NumPy when numba is missing;
+        None when the query spans too few objects for NumPy to pay off.
+        """
+        cell_ids, cell_start, cell_idx, xs, ys = self._arrays
+        reach_x, reach_y = self._reach(radius)
+        if not _spatial_kernel.HAS_NUMBA:
+            span_x = min(2 * reach_x + 1, self.cols)
+            span_y = min(2 * reach_y + 1, self.rows)
+            expected = (len(cell_ids) * span_x * span_y
+                        / (self.cols * self.rows))
+            if expected < self.VECTOR_THRESHOLD:
+                return None
+        cell_x, cell_y = self._get_cell(x, y)
+        out_idx, out_d2 = self._query_buffers
+        while True:
+            count = _spatial_kernel.query_radius_sq(
+                x, y, cell_x, cell_y, -1, xs, ys, cell_start, cell_idx,
+                self.cols, self.rows, reach_x, reach_y, self.width,
+                self.height, radius * radius, self.toroidal, out_idx, out_d2
+            )
+            if count <= len(out_idx):
+                break
+            # Too many neighbours for the buffers: grow them and redo
+            out_idx = np.empty(2 * count, dtype=np.int32)
+            out_d2 = np.empty(2 * count)
+            self._query_buffers = (out_idx, out_d2)
+        distances = out_d2[:count]
+        if not squared:
+            np.sqrt(distances, out=distances)
+        objects = self._objects
+        found = [objects[j] for j in out_idx[:count].tolist()]
+        if exclude is not None:
+            for k, obj in enumerate(found):
+                if obj is exclude:
+                    del found[k]
+                    distances[k:-1] = distances[k + 1:]
+                    distances = distances[:-1]
+                    break
+        return found, distances
+
     def rebuild(self, objects):
         """Rebuild the entire grid from a list of objects."""
-        self.clear()
-        for obj in objects:
-            self.insert(obj, obj.position.x, obj.position.y)
+        objects = list(objects)
+        positions = [obj.position for obj in objects]
+        n = len(objects)
+        self.rebuild_soa(np.fromiter((p.x for p in positions), float, n),
+                         np.fromiter((p.y for p in positions), float, n),
+                         objects)
+
+    def rebuild_soa(self, xs, ys, objects=None):
+        """
+        Rebuild the entire grid from arrays of positions.
+
+        The cells are computed for all positions at once and the CSR
+        layout of the grid is built with one sort, without creating any
+        Python object per position. The per-cell object lists used by
+        query_radius() and update() are only built if those are called.
+
+        Args:
+            xs: x positions, one per object
+            ys: y positions, one per object
+            objects: Objects at those positions; by default the rebuild
+                indices themselves, which only suits the index-based
+                queries (query_radius_sq() and neighbors())
+        """
+        xs = np.array(xs, dtype=np.float64)
+        ys = np.array(ys, dtype=np.float64)
+        # Truncated like int(), then kept in the border cells
+        cell_x = (xs * self._inv_cell_width).astype(np.int64)
+        cell_y = (ys * self._inv_cell_height).astype(np.int64)
+        np.clip(cell_x, 0, self.cols - 1, out=cell_x)
+        np.clip(cell_y, 0, self.rows - 1, out=cell_y)
+        cell_ids = (cell_y * self.cols + cell_x).astype(np.int32)
+
+        cell_idx = np.argsort(cell_ids, kind='stable').astype(np.int32)
+        counts = np.bincount(cell_ids, minlength=self.cols * self.rows)
+        cell_start = np.zeros(self.cols * self.rows + 1, dtype=np.int32)
+        np.cumsum(counts, out=cell_start[1:])
+        self._arrays = (cell_ids, cell_start, cell_idx, xs, ys)
+        self._pending = range(len(xs)) if objects is None else objects
+        self._objects = objects
+
+    def _grid_arrays(self):
+        """
+        The grid built by the last rebuild() as flat arrays, computed once
+        per rebuild: cell of each object, CSR cell starts and object
+        indices, and object positions.
+        """
+        if self._arrays is None:
+            cell_ids = np.asarray(self._object_cell_ids, dtype=np.int32)
+            cell_idx = np.argsort(cell_ids, kind='stable').astype(np.int32)
+            counts = np.bincount(cell_ids, minlength=self.cols * self.rows)
+            cell_start = np.zeros(self.cols * self.rows + 1, dtype=np.int32)
+            np.cumsum(counts, out=cell_start[1:])
+            self._arrays = (
+                cell_ids, cell_start, cell_idx,
+                np.asarray(self._object_xs, dtype=np.float64),
+                np.asarray(self._object_ys, dtype=np.float64),
+            )
+        return self._arrays
+
+    def _reach(self, radius):
+        """Number of cells a query of the given radius spans on each side."""
+        return (int(math.ceil(radius / self._cell_width)),
+                int(math.ceil(radius / self._cell_height)))
+
+    def to_csr(self):
+        """
+        Export the grid built by the last rebuild() in CSR form.
+
+        The objects of cell ``c`` are the objects whose rebuild index is
+        ``cell_idx[cell_start[c]:cell_start[c + 1]]``, which lets compiled
+        kernels walk the grid without touching Python lists.
+
+        Returns:
+            tuple: (cell_start, cell_idx) int32 arrays of sizes
+            cols * rows + 1 and number of objects
+        """
+        _, cell_start, cell_idx, _, _ = self._grid_arrays()
+        return cell_start, cell_idx
+
+    def query_radius_sq(self, x: float, y: float, radius_sq: float,
+                        out_idx, out_d2, exclude: int = -1) -> int:
+        """
+        Query the objects of the last rebuild() within a squared radius,
+        writing their rebuild indices and squared distances into
+        preallocated buffers.
+
+        Args:
+            x: Query position x
+            y: Query position y
+            radius_sq: Squared search radius
+            out_idx: int32 buffer receiving the neighbour indices
+            out_d2: float64 buffer receiving their squared distances
+            exclude: Rebuild index of an object to exclude, or -1
+
+        Returns:
+            Number of neighbours. When it exceeds the buffer size only the
+            first ``len(out_idx)`` are written, and the query can be
+            repeated with larger buffers.
+        """
+        _, cell_start, cell_idx, xs, ys = self._grid_arrays()
+        cell_x, cell_y = self._get_cell(x, y)
+        reach_x, reach_y = self._reach(math.sqrt(radius_sq))
+        return _spatial_kernel.query_radius_sq(
+            x, y, cell_x, cell_y, exclude, xs, ys, cell_start, cell_idx,
+            self.cols, self.rows, reach_x, reach_y, self.width, self.height,
+            radius_sq, self.toroidal, out_idx, out_d2
+        )
+
+    def neighbors(self, radius: float, out_idx=None, out_d2=None):
+        """
+        Query the neighbours of every object of the last rebuild() at once.
+
+        The neighbours of the object of rebuild index ``i`` are
+        ``out_idx[offsets[i]:offsets[i + 1]]``, in the order query_radius()
+        returns them, with squared distances
+        ``out_d2[offsets[i]:offsets[i + 1]]``.
+
+        Args:
+            radius: Search radius
+            out_idx: Optional int32 buffer to reuse for the indices
+            out_d2: Optional float64 buffer to reuse for the distances
+
+        Returns:
+            tuple: (offsets, out_idx, out_d2); the buffers are replaced by
+            larger ones when they are too small
+        """
+        cell_ids, cell_start, cell_idx, xs, ys = self._grid_arrays()
+        reach_x, reach_y = self._reach(radius)
+        return _spatial_kernel.neighbors(
+            cell_ids, xs, ys, cell_start, cell_idx, self.cols, self.rows,
+            reach_x, reach_y, self.width, self.height, radius * radius,
+            self.toroidal, out_idx, out_d2
+        )
+
+
+class MarkGrid:
+    """
+    Index of an environment's marks by unit cell.
+
+    A turtle perceives the marks less than one unit away from it along
+    both axes, which all lie in the 3x3 block of unit cells around it, so
+    a lookup only inspects those cells instead of every mark. The index
+    is kept on the environment and updated by the reaction model as marks
+    are dropped and removed.
+
+    It is rebuilt from ``environment.marks`` when that dict is replaced
+    or holds a different number of marks than the index. Other direct
+    edits, such as moving a mark or storing another one under an
+    existing identifier, go unnoticed: code making them must also call
+    add() or remove() on ``MarkGrid.of(environment)``.
+    """
+
+    def __init__(self):
+        self.cells = {}  # (cell_x, cell_y) -> {mark_id: (order, mark)}
+        self.mark_cells = {}  # mark_id -> (cell_x, cell_y)
+        self._order = 0  # Insertion counter, to list marks in dict order
+        self._marks = None  # The marks dict indexed, set by of()
+
+    @classmethod
+    def of(cls, environment):
+        """
+        The mark index of an environment, built on first use.
+
+        Args:
+            environment: Environment with a ``marks`` dict, or none yet
+
+        Returns:
+            MarkGrid: Index of ``environment.marks``, rebuilt if the dict
+            was replaced or its length changed behind the index's back
+        """
+        marks = getattr(environment, 'marks', None)
+        if marks is None:
+            marks = environment.marks = {}
+        index = getattr(environment, '_marks_index', None)
+        if (index is None or index._marks is not marks or
+                len(index) != len(marks)):
+            index = environment._marks_index = cls()
+            index._marks = marks
+            for mark_id, mark in marks.items():
+                index.add(mark_id, mark)
+        return index
+
+    def __len__(self):
+        return len(self.mark_cells)
+
+    def add(self, mark_id, mark):
+        """Index a mark under its identifier."""
+        if mark_id in self.mark_cells:
+            self.remove(mark_id)
+        position = mark['position']
+        cell = (math.floor(position.x), math.floor(position.y))
+        self.cells.setdefault(cell, {})[mark_id] = (self._order, mark)
+        self.mark_cells[mark_id] = cell
+        self._order += 1
+
+    def remove(self, mark_id):
+        """Drop a mark from the index; unknown identifiers are ignored."""
+        cell = self.mark_cells.pop(mark_id, None)
+        if cell is not None:
+            bucket = self.cells[cell]
+            del bucket[mark_id]
+            if not bucket:
+                del self.cells[cell]
+
+    def near(self, x: float, y: float) -> List:
+        """
+        Marks less than one unit away from (x, y) along both axes.
+
+        Returns:
+            List of (mark_id, mark) tuples, in the order the marks were added
+        """
+        cells = self.cells
+        cell_x = math.floor(x)
+        cell_y = math.floor(y)
+        found = []
+        for cy in (cell_y - 1, cell_y, cell_y + 1):
+            for cx in (cell_x - 1, cell_x, cell_x + 1):
+                bucket = cells.get((cx, cy))
+                if bucket is None:
+                    continue
+                for mark_id, (order, mark) in bucket.items():
+                    position = mark['position']
+                    if abs(x - position.x) < 1.0 and abs(y - position.y) < 1.0:
+                        found.append((order, mark_id, mark))
+        if len(found) > 1:
+            found.sort(key=lambda item: item[0])
+        return [(mark_id, mark) for _, mark_id, mark in found]
+
+    def within(self, x: float, y: float, radius: float) -> List:
+        """
+        Marks at a Euclidean distance of at most ``radius`` from (x, y).
+
+        Only the unit cells overlapping the bounding square of the circle
+        are inspected, or every occupied cell when there are fewer of them.
+
+        Returns:
+            List of (mark_id, mark) tuples, in the order the marks were added
+        """
+        cells = self.cells
+        min_x = math.floor(x - radius)
+        max_x = math.floor(x + radius)
+        min_y = math.floor(y - radius)
+        max_y = math.floor(y + radius)
+        if (max_x - min_x + 1) * (max_y - min_y + 1) > len(cells):
+            buckets = [
+                bucket for (cx, cy), bucket in cells.items()
+                if min_x <= cx <= max_x and min_y <= cy <= max_y
+            ]
+        else:
+            buckets = [
+                cells[cell] for cell in (
+                    (cx, cy)
+                    for cy in range(min_y, max_y + 1)
+                    for cx in range(min_x, max_x + 1)
+                ) if cell in cells
+            ]
+        found = []
+        for bucket in buckets:
+            for mark_id, (order, mark) in bucket.items():
+                position = mark['position']
+                dx = position.x - x
+                dy = position.y - y
+                if math.sqrt(dx * dx + dy * dy) <= radius:
+                    found.append((order, mark_id, mark))
+        if len(found) > 1:
+            found.sort(key=lambda item: item[0])
+        return [(mark_id, mark) for _, mark_id, mark in found]
@@ -20,15 +20,17 @@ except ImportError:
         Pure Python implementation that works without C++ backend.
         """
         
+        # No per-instance __dict__: smaller points, faster .x / .y reads
+        __slots__ = ('x', 'y')
+        
         def __init__(self, x=0.0, y=0.0):
             self.x = float(x)
             self.y = float(y)
         
         def distance(self, other):
             """Calculate Euclidean distance to another point."""
-            dx = self.x - other.x
-            dy = self.y - other.y
-            return math.sqrt(dx * dx + dy * dy)
+            # hypot does not overflow or underflow on the squares
+            return math.hypot(self.x - other.x, self.y - other.y)
         
         def distance_squared(self, other):
             """
@@ -41,7 +43,7 @@ except ImportError:
         
         def magnitude(self):
             """Calculate magnitude (length) of the vector."""
-            return math.sqrt(self.x * self.x + self.y * self.y)
+            return math.hypot(self.x, self.y)
         
         def normalize(self):
             """Return a normalized (unit length) vector."""
@@ -83,18 +85,18 @@ except ImportError:
         
         @staticmethod
         def normalize_angle(angle):
-            """Normalize angle to [-PI, PI] range."""
-            while angle > math.pi:
-                angle -= 2 * math.pi
-            while angle < -math.pi:
-                angle += 2 * math.pi
-            return angle
+            """
+            Normalize angle to [-PI, PI] range.
+            
+            Uses the IEEE-754 remainder, which reduces any angle in one
+            exact operation instead of one subtraction per turn.
+            """
+            return math.remainder(angle, MathUtil.TWO_PI)
         
         @staticmethod
         def angle_difference(angle1, angle2):
             """Compute the smallest difference between two angles."""
-            diff = angle1 - angle2
-            return MathUtil.normalize_angle(diff)
+            return math.remainder(angle1 - angle2, MathUtil.TWO_PI)
         
         @staticmethod
         def to_degrees(radians):
@@ -0,0 +1,166 @@
+"""
+Binary delta encoding of simulation states for the WebSocket stream.
+
+Each frame is a single little-endian binary message:
+
+    uint32[4]          step, num_turtles, num_changed, json_length
+    uint32[changed]    indices of the turtles that moved or turned
+    float32[changed*3] x, y, heading of those turtles
+    utf-8[json_length] JSON object with the rest of the state
+    float32[...]       pheromone grids listed in the JSON object
+
+The JSON trailer carries the environment size, marks, a ``keyframe``
+flag and a ``colors`` object mapping turtle indices to their new color,
+which is only filled when a color changes. It is padded with spaces to
+a multiple of 4 bytes so that the grids after it can be read in place.
+A keyframe carries every turtle and grid; the frames in between only
+those that changed.
+
+Pheromone grids given as 2D arrays are not written as JSON: the
+trailer's ``pheromone_grids`` lists them as ``[id, rows, cols]``, in the
+order their row-major float32 values follow it, and leaves out the
+grids unchanged since they were last sent. Grids given as nested lists
+stay in the trailer's ``pheromones`` object.
+"""
+
+import json
+import struct
+
+import numpy as np
+
+HEADER = struct.Struct('<4I')
+
+
+def _json_default(value):
+    """Serialize the NumPy arrays nested in a state, e.g. pheromone grids."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+class StateDeltaEncoder:
+    """
+    Encode successive simulation states as binary deltas.
+
+    The encoder remembers what was last sent to one client, so each
+    WebSocket connection must use its own encoder.
+
+    Turtles are compared with the values last sent for them, so a turtle
+    moving less than ``epsilon`` per frame is still sent once it has
+    drifted by more than that.
+
+    Args:
+        epsilon: Smallest position or heading change worth sending
+        keyframe_interval: Number of frames after which a full keyframe
+            is sent again
+    """
+
+    def __init__(self, epsilon=1e-4, keyframe_interval=60):
+        self.epsilon = epsilon
+        self.keyframe_interval = keyframe_interval
+        self._last_values = None
+        self._last_colors = None
+        self._last_grids = {}
+        self._frames_since_keyframe = 0
+
+    def reset(self):
+        """Forget the last sent state so the next frame is a keyframe."""
+        self._last_values = None
+        self._last_colors = None
+        self._last_grids = {}
+
+    def encode(self, state):
+        """
+        Encode a state dictionary as returned by LogoSimulation.get_state(),
+        or an array-backed state with ``positions`` and ``headings`` arrays
+        as returned by LogoSimulation.get_state_arrays() and
+        CppLogoSimulation.get_state().
+
+        Args:
+            state: Simulation state dictionary
+
+        Returns:
+            bytes: Binary frame
+        """
+        if 'turtles' in state:
+            turtles = state['turtles']
+            values = np.array(
+                [(t['position'][0], t['position'][1], t['heading']) for t in turtles],
+                dtype='<f4'
+            ).reshape(-1, 3)
+            colors = [t['color'] for t in turtles]
+        else:
+            # Array-backed state: positions (N, 2) and headings (N,)
+            values = np.empty((len(state['headings']), 3), dtype='<f4')
+            values[:, 0:2] = state['positions']
+            values[:, 2] = state['headings']
+            colors = list(state.get('colors', ()))
+            if len(colors) != len(values):
+                colors = [None] * len(values)
+
+        keyframe = (self._last_values is None or
+                    self._last_values.shape != values.shape or
+                    self._frames_since_keyframe >= self.keyframe_interval)
+
+        if keyframe:
+            changed = np.arange(len(values), dtype='<u4')
+            color_changes = {
+                i: color for i, color in enumerate(colors) if color is not None
+            }
+            self._last_values = values
+            self._last_grids = {}
+            self._frames_since_keyframe = 1
+        else:
+            delta = np.abs(values - self._last_values).max(axis=1)
+            changed = np.flatnonzero(delta > self.epsilon).astype('<u4')
+            color_changes = {
+                i: color
+                for i, (color, last) in enumerate(zip(colors, self._last_colors))
+                if color != last
+            }
+            self._last_values[changed] = values[changed]
+            self._frames_since_keyframe += 1
+        self._last_colors = colors
+
+        meta = {
+            key: value for key, value in state.items()
+            if key != 'turtles' and not isinstance(value, np.ndarray)
+        }
+        meta['keyframe'] = keyframe
+        meta['colors'] = color_changes
+
+        # 2D pheromone grids are sent as raw float32 blocks, when they
+        # changed since they were last sent
+        grids = []
+        pheromones = meta.get('pheromones')
+        if pheromones:
+            listed = {}
+            layout = []
+            for pid, grid in pheromones.items():
+                if not (isinstance(grid, np.ndarray) and grid.ndim == 2):
+                    listed[pid] = grid
+                    continue
+                last = self._last_grids.get(pid)
+                if last is not None and np.array_equal(grid, last):
+                    continue
+                # A copy, since the live grid keeps changing
+                grid = np.array(grid, dtype='<f4', order='C')
+                self._last_grids[pid] = grid
+                grids.append(grid)
+                layout.append([pid, grid.shape[0], grid.shape[1]])
+            if len(listed) < len(pheromones):
+                meta['pheromones'] = listed
+                meta['pheromone_grids'] = layout
+
+        trailer = json.dumps(
+            meta, separators=(',', ':'), default=_json_default
+        ).encode('utf-8')
+        trailer += b' ' * (-len(trailer) % 4)
+
+        return b''.join((
+            HEADER.pack(state['step'], len(values), len(changed), len(trailer)),
+            changed.tobytes(),
+            values[changed].tobytes(),
+            trailer,
+            *(grid.tobytes() for grid in grids),
+        ))
@@ -4,137 +4,193 @@ Registry of available SIMILAR2Logo example models.
 
 import os
 import glob
+import json
+from functools import lru_cache
+from types import MappingProxyType
+from typing import NamedTuple
+
+_EXAMPLES_DIR = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'examples', 'python')
+
+
+class ModelInfo(NamedTuple):
+    """Description of an example model."""
+    name: str
+    description: str
+    category: str
+    filename: str
+    filepath: str
+
+
+# Known models with descriptions, keyed by file name
+_KNOWN_MODELS = MappingProxyType({
+    'simple_random_walk.py': {
+        'name': 'Simple Random Walk',
+        'description': 'Single turtle performing random walk',
+        'category': 'Basic'
+    },
+    'randomwalk_1d.py': {
+        'name': 'Random Walk 1D',
+        'description': 'Turtle constrained to 1D movement',
+        'category': 'Basic'
+    },
+    'passive_turtle.py': {
+        'name': 'Passive Turtle',
+        'description': 'Physics-based movement without decisions',
+        'category': 'Basic'
+    },
+    'boids_dsl.py': {
+        'name': 'Boids (Flocking)',
+        'description': 'Classic flocking behavior',
+        'category': 'Collective Behavior'
+    },
+    'boids_obstacles.py': {
+        'name': 'Boids with Obstacles',
+        'description': 'Flocking with obstacle avoidance',
+        'category': 'Collective Behavior'
+    },
+    'circle.py': {
+        'name': 'Circle Formation',
+        'description': 'Agents forming circular patterns',
+        'category': 'Collective Behavior'
+    },
+    'ant_foraging_dsl.py': {
+        'name': 'Ant Foraging',
+        'description': 'Ants finding food using pheromones',
+        'category': 'Swarm Intelligence'
+    },
+    'pheromone_following.py': {
+        'name': 'Pheromone Following',
+        'description': 'Agents following chemical trails',
+        'category': 'Swarm Intelligence'
+    },
+    'slime_mold.py': {
+        'name': 'Slime Mold',
+        'description': 'Network formation simulation',
+        'category': 'Swarm Intelligence'
+    },
+    'predator_prey.py': {
+        'name': 'Predator-Prey',
+        'description': 'Lotka-Volterra population dynamics',
+        'category': 'Ecology'
+    },
+    'virus_spread.py': {
+        'name': 'Virus Spread',
+        'description': 'SIR epidemiology model',
+        'category': 'Ecology'
+    },
+    'forest_fire.py': {
+        'name': 'Forest Fire',
+        'description': 'Fire spreading through forest',
+        'category': 'Ecology'
+    },
+    'heatbugs.py': {
+        'name': 'Heatbugs',
+        'description': 'Temperature-seeking agents',
+        'category': 'Self-Organization'
+    },
+    'segregation_model.py': {
+        'name': 'Segregation',
+        'description': "Schelling's segregation model",
+        'category': 'Social Dynamics'
+    },
+    'turmite.py': {
+        'name': 'Turmite',
+        'description': "Langton's Ant",
+        'category': 'Cellular Automata'
+    },
+    'multiturmite.py': {
+        'name': 'Multi-Turmite',
+        'description': 'Multiple Langton\'s Ants',
+        'category': 'Cellular Automata'
+    },
+    'firework.py': {
+        'name': 'Firework',
+        'description': 'Particle system with physics',
+        'category': 'Visual Effects'
+    },
+    'transport.py': {
+        'name': 'Transport',
+        'description': 'Traffic simulation',
+        'category': 'Urban Systems'
+    },
+})
+
 
 def get_available_models():
     """
     Get list of available example models.
     
+    The examples directory is only listed again when its modification
+    time changes, i.e. when a file was added, removed or renamed.
+    
     Returns:
         List of dicts with model information
     """
-    examples_dir = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'examples', 'python')
+    return [info._asdict() for info in _scan_models(*_examples_key())]
+
+
+def get_models_json():
+    """
+    Get the list of available example models as the JSON body of the
+    /api/models response, encoded once per listing of the directory.
     
-    models = []
+    Returns:
+        UTF-8 encoded JSON object with a ``models`` list
+    """
+    return _models_json(*_examples_key())
+
+
+def _examples_key():
+    """(directory, mtime) of the examples directory, keying the caches."""
+    try:
+        mtime = os.stat(_EXAMPLES_DIR).st_mtime_ns
+    except OSError:
+        mtime = None
+    return _EXAMPLES_DIR, mtime
+
+
+@lru_cache(maxsize=4)
+def _models_json(examples_dir, mtime):
+    """Encode a listing of _scan_models(), cached per (directory, mtime)."""
+    models = [info._asdict() for info in _scan_models(examples_dir, mtime)]
+    return json.dumps({'models': models}).encode('utf-8')
+
+
+@lru_cache(maxsize=4)
+def _scan_models(examples_dir, mtime):
+    """
+    List the models of a directory, cached per (directory, mtime).
     
-    # Define known models with descriptions
-    known_models = {
-        'simple_random_walk.py': {
-            'name': 'Simple Random Walk',
-            'description': 'Single turtle performing random walk',
-            'category': 'Basic'
-        },
-        'randomwalk_1d.py': {
-            'name': 'Random Walk 1D',
-            'description': 'Turtle constrained to 1D movement',
-            'category': 'Basic'
-        },
-        'passive_turtle.py': {
-            'name': 'Passive Turtle',
-            'description': 'Physics-based movement without decisions',
-            'category': 'Basic'
-        },
-        'boids_dsl.py': {
-            'name': 'Boids (Flocking)',
-            'description': 'Classic flocking behavior',
-            'category': 'Collective Behavior'
-        },
-        'boids_obstacles.py': {
-            'name': 'Boids with Obstacles',
-            'description': 'Flocking with obstacle avoidance',
-            'category': 'Collective Behavior'
-        },
-        'circle.py': {
-            'name': 'Circle Formation',
-            'description': 'Agents forming circular patterns',
-            'category': 'Collective Behavior'
-        },
-        'ant_foraging_dsl.py': {
-            'name': 'Ant Foraging',
-            'description': 'Ants finding food using pheromones',
-            'category': 'Swarm Intelligence'
-        },
-        'pheromone_following.py': {
-            'name': 'Pheromone Following',
-            'description': 'Agents following chemical trails',
-            'category': 'Swarm Intelligence'
-        },
-        'slime_mold.py': {
-            'name': 'Slime Mold',
-            'description': 'Network formation simulation',
-            'category': 'Swarm Intelligence'
-        },
-        'predator_prey.py': {
-            'name': 'Predator-Prey',
-            'description': 'Lotka-Volterra population dynamics',
-            'category': 'Ecology'
-        },
-        'virus_spread.py': {
-            'name': 'Virus Spread',
-            'description': 'SIR epidemiology model',
-            'category': 'Ecology'
-        },
-        'forest_fire.py': {
-            'name': 'Forest Fire',
-            'description': 'Fire spreading through forest',
-            'category': 'Ecology'
-        },
-        'heatbugs.py': {
-            'name': 'Heatbugs',
-            'description': 'Temperature-seeking agents',
-            'category': 'Self-Organization'
-        },
-        'segregation_model.py': {
-            'name': 'Segregation',
-            'description': "Schelling's segregation model",
-            'category': 'Social Dynamics'
-        },
-        'turmite.py': {
-            'name': 'Turmite',
-            'description': "Langton's Ant",
-            'category': 'Cellular Automata'
-        },
-        'multiturmite.py': {
-            'name': 'Multi-Turmite',
-            'description': 'Multiple Langton\'s Ants',
-            'category': 'Cellular Automata'
-        },
-        'firework.py': {
-            'name': 'Firework',
-            'description': 'Particle system with physics',
-            'category': 'Visual Effects'
-        },
-        'transport.py': {
-            'name': 'Transport',
-            'description': 'Traffic simulation',
-            'category': 'Urban Systems'
-        },
-    }
+    Returns:
+        Tuple of ModelInfo
+    """
+    models = []
     
     # Scan for Python files
-    if os.path.exists(examples_dir):
-        for filename in os.listdir(examples_dir):
-            if filename.endswith('.py') and not filename.startswith('_') and not filename.startswith('run_'):
-                filepath = os.path.join(examples_dir, filename)
-                
-                # Get model info
-                if filename in known_models:
-                    info = known_models[filename].copy()
-                else:
-                    # Unknown model - use filename
-                    info = {
-                        'name': filename.replace('_', ' ').replace('.py', '').title(),
-                        'description': 'Custom simulation',
-                        'category': 'Other'
-                    }
-                
-                info['filename'] = filename
-                info['filepath'] = filepath
-                models.append(info)
+    try:
+        with os.scandir(examples_dir) as scan:
+            entries = list(scan)
+    except OSError:
+        entries = []
+    for entry in entries:
+        filename = entry.name
+        if filename.endswith('.py') and not filename.startswith('_') and not filename.startswith('run_'):
+            # Get model info
+            info = _KNOWN_MODELS.get(filename)
+            if info is None:
+                # Unknown model - use filename
+                info = {
+                    'name': filename.replace('_', ' ').replace('.py', '').title(),
+                    'description': 'Custom simulation',
+                    'category': 'Other'
+                }
+            models.append(ModelInfo(filename=filename, filepath=entry.path,
+                                    **info))
     
     # Sort by category then name
-    models.sort(key=lambda x: (x['category'], x['name']))
+    models.sort(key=lambda x: (x.category, x.name))
     
-    return models
+    return tuple(models)
 
 
 def get_model_code(filename):
@@ -147,11 +203,16 @@ def get_model_code(filename):
     Returns:
         Source code as string, or None if not found
     """
-    examples_dir = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'examples', 'python')
-    filepath = os.path.join(examples_dir, filename)
-    
-    if os.path.exists(filepath):
-        with open(filepath, 'r') as f:
-            return f.read()
-    
-    return None
+    filepath = os.path.join(_EXAMPLES_DIR, filename)
+    try:
+        mtime = os.stat(filepath).st_mtime_ns
+    except OSError:
+        return None
+    return _read_model_code(filepath, mtime)
+
+
+@lru_cache(maxsize=32)
+def _read_model_code(filepath, mtime):
+    """Read a model's source, cached per (path, mtime)."""
+    with open(filepath, 'r') as f:
+        return f.read()
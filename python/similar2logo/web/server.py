@@ -4,13 +4,17 @@ FastAPI web server for real-time Logo simulation visualization and control.
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response
 import asyncio
 import time
 import json
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from typing import Optional
 import threading
 
+from .encoding import StateDeltaEncoder
+
 
 class WebSimulation:
     """
@@ -35,8 +39,13 @@ class WebSimulation:
         self.update_rate = update_rate
         self.running = False
         self.paused = False
-        self.sim_thread = None
+        self.sim_task = None
+        # Steps run in a single worker thread, off the event loop
+        self._step_pool = ThreadPoolExecutor(max_workers=1)
         self.connected_clients = []
+        # One task encodes each frame once and sends it to every client
+        self.broadcast_task = None
+        self._encoder = StateDeltaEncoder()
         self.speed_factor = initial_speed
         
         # Add RealTimeMatcherProbe for speed control
@@ -45,7 +54,8 @@ class WebSimulation:
         self.simulation.probe_manager.add_probe("web_speed_control", self.speed_probe)
         
         # Create FastAPI app
-        self.app = FastAPI(title="SIMILAR2Logo Web Interface")
+        self.app = FastAPI(title="SIMILAR2Logo Web Interface",
+                           lifespan=self._lifespan)
         self._setup_routes()
     
     def _setup_routes(self):
@@ -101,41 +111,12 @@ class WebSimulation:
         async def set_parameters(data: dict):
             """Update simulation parameters."""
             new_params = data.get("parameters", {})
-            updated = {}
             
             print(f"Received parameter update request: {new_params}")
             
-            count = 0
-            for turtle in self.simulation.turtles:
-                count += 1
-                # Update direct attributes
-                for key, value in new_params.items():
-                    # Try setting on turtle directly
-                    if hasattr(turtle, key):
-                         try:
-                             setattr(turtle, key, value)
-                             updated[key] = value
-                         except Exception:
-                             pass
-                    
-                    # Try setting on turtle.params
-                    if hasattr(turtle, 'params') and hasattr(turtle.params, key):
-                        try:
-                            setattr(turtle.params, key, value)
-                            updated[key] = value
-                        except Exception:
-                            pass
-            
-            # Also update environment params if they exist
-            if hasattr(self.simulation.environment, 'params'):
-                for key, value in new_params.items():
-                    if hasattr(self.simulation.environment.params, key):
-                        try:
-                            setattr(self.simulation.environment.params, key, value)
-                            updated[key] = value
-                        except Exception:
-                            pass
+            updated = self.set_parameters(new_params)
             
+            count = len(self.simulation.turtles)
             print(f"Updated parameters for {count} agents: {updated}")
             return {"status": "parameters_updated", "updated": updated}
         
@@ -164,8 +145,8 @@ class WebSimulation:
                             params[key] = val
 
             # 2. Check for direct attributes on turtle, but avoid system ones
-            system_attrs = {'position', 'heading', 'color', 'id', '_environment', '_id', 'acceleration', 'pen_down'}
-            for key, val in turtle.__dict__.items():
+            system_attrs = {'position', 'heading', 'color', 'id', '_environment', '_idx', 'acceleration', 'pen_down'}
+            for key, val in getattr(turtle, '__dict__', {}).items():
                 if key.startswith('_') or key in system_attrs:
                     continue
                 if isinstance(val, (int, float)):
@@ -276,9 +257,8 @@ class WebSimulation:
         @self.app.get("/api/models")
         async def get_models():
             """Get list of available example models."""
-            from .models import get_available_models
-            models = get_available_models()
-            return {"models": models}
+            from .models import get_models_json
+            return Response(get_models_json(), media_type="application/json")
         
         @self.app.post("/api/load_model")
         async def load_model(data: dict):
@@ -313,33 +293,161 @@ class WebSimulation:
         @self.app.websocket("/ws")
         async def websocket_endpoint(websocket: WebSocket):
             await websocket.accept()
+            # Make the next frame a keyframe, for the new client to start
+            # from a full state
+            self._encoder.reset()
             self.connected_clients.append(websocket)
+            if self.broadcast_task is None or self.broadcast_task.done():
+                self.broadcast_task = asyncio.get_running_loop().create_task(
+                    self._broadcast_loop()
+                )
             
             try:
-                while True:
-                    # Send state updates
-                    if not self.paused:
-                        state = self.simulation.get_state()
-                        await websocket.send_json(state)
-                    
-                    await asyncio.sleep(1.0 / self.update_rate)
+                # Frames are sent by the broadcast task; wait for the end
+                while (await websocket.receive())['type'] != 'websocket.disconnect':
+                    pass
             except WebSocketDisconnect:
-                self.connected_clients.remove(websocket)
+                pass
+            finally:
+                self._drop_client(websocket)
     
-    def _simulation_loop(self):
-        """Run simulation in background thread."""
+    async def _broadcast_loop(self):
+        """
+        Send the state to the connected clients as binary deltas, until
+        none is left. Each frame is read and encoded once whatever the
+        number of clients, and sent to all of them before the next one,
+        so that no client misses a delta. Clients whose send fails are
+        dropped.
+        """
+        # The encoder reads array-backed states without per-turtle dicts
+        get_state = getattr(self.simulation, 'get_state_arrays',
+                            self.simulation.get_state)
+        deadline = time.monotonic()
+        while self.connected_clients:
+            if not self.paused:
+                payload = self._encoder.encode(get_state())
+                clients = list(self.connected_clients)
+                results = await asyncio.gather(
+                    *(client.send_bytes(payload) for client in clients),
+                    return_exceptions=True
+                )
+                for client, result in zip(clients, results):
+                    if isinstance(result, Exception):
+                        self._drop_client(client)
+            deadline = await self._tick(deadline)
+    
+    def _drop_client(self, websocket):
+        """Stop sending frames to a client."""
+        if websocket in self.connected_clients:
+            self.connected_clients.remove(websocket)
+    
+    async def _async_sim_loop(self):
+        """
+        Run the simulation in the event loop. Each step runs in the step
+        worker thread, so the WebSocket handlers keep encoding and sending
+        frames while it runs.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = time.monotonic()
         while self.running:
             if not self.paused:
-                self.simulation.step()
-            time.sleep(1.0 / self.update_rate)
+                await loop.run_in_executor(self._step_pool, self.simulation.step)
+            deadline = await self._tick(deadline)
+    
+    async def _tick(self, deadline):
+        """
+        Sleep until one update period after ``deadline``, so that the time
+        spent stepping or sending counts towards the period, and return
+        the new deadline. A deadline already missed is dropped rather
+        than caught up.
+        """
+        deadline += 1.0 / self.update_rate
+        delay = deadline - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+            return deadline
+        return time.monotonic()
+    
+    @asynccontextmanager
+    async def _lifespan(self, app):
+        """Start the loop of a simulation started before the server."""
+        if self.running:
+            self._start_loop()
+        yield
+    
+    def _start_loop(self):
+        """Start the simulation loop task unless it is still running."""
+        if self.sim_task is None or self.sim_task.done():
+            self.sim_task = asyncio.get_running_loop().create_task(
+                self._async_sim_loop()
+            )
+    
+    def set_parameters(self, new_params):
+        """
+        Set parameters on the turtles, on their params objects and on the
+        environment's params, wherever an attribute of that name exists.
+        
+        Where each key goes is resolved once per turtle class, so the
+        turtles themselves are only written to.
+        
+        Args:
+            new_params: Dict of parameter names and values
+        
+        Returns:
+            Dict of the parameters that were set somewhere
+        """
+        updated = {}
+        plans = {}
+        for turtle in self.simulation.turtles:
+            plan = plans.get(type(turtle))
+            if plan is None:
+                plan = plans[type(turtle)] = self._parameter_plan(
+                    turtle, new_params
+                )
+            for on_params, key, value in plan:
+                try:
+                    setattr(turtle.params if on_params else turtle, key, value)
+                    updated[key] = value
+                except Exception:
+                    pass
+        
+        # Also update environment params if they exist
+        if hasattr(self.simulation.environment, 'params'):
+            for key, value in new_params.items():
+                if hasattr(self.simulation.environment.params, key):
+                    try:
+                        setattr(self.simulation.environment.params, key, value)
+                        updated[key] = value
+                    except Exception:
+                        pass
+        return updated
+    
+    @staticmethod
+    def _parameter_plan(turtle, new_params):
+        """
+        Writes of set_parameters() for the turtles of one class, as
+        (on_params, key, value) tuples: on the turtle itself and/or on
+        its params object.
+        """
+        params = getattr(turtle, 'params', None)
+        plan = []
+        for key, value in new_params.items():
+            if hasattr(turtle, key):
+                plan.append((False, key, value))
+            if params is not None and hasattr(params, key):
+                plan.append((True, key, value))
+        return plan
     
     def start(self):
         """Start the simulation."""
         if not self.running:
             self.running = True
             self.paused = False
-            self.sim_thread = threading.Thread(target=self._simulation_loop, daemon=True)
-            self.sim_thread.start()
+            try:
+                self._start_loop()
+            except RuntimeError:
+                # No event loop yet: the server starts the loop in _lifespan
+                pass
     
     def pause(self):
         """Pause the simulation."""
@@ -350,10 +458,8 @@ class WebSimulation:
         self.paused = False
     
     def stop(self):
-        """Stop the simulation."""
+        """Stop the simulation. The loop ends after its current step."""
         self.running = False
-        if self.sim_thread:
-            self.sim_thread.join(timeout=1.0)
     
     def start_server(self, host="0.0.0.0", port=8080):
         """
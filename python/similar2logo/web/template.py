@@ -437,12 +437,65 @@ HTML_TEMPLATE = """
         let frameCount = 0;
         let fps = 0;
         let parameters = {};
+        let turtles = [];
+        let pheromoneGrids = {};  // Binary grids, kept until resent
+        const textDecoder = new TextDecoder();
+        
+        // Apply a binary delta frame (see similar2logo.web.encoding)
+        function decodeFrame(buffer) {
+            const header = new Uint32Array(buffer, 0, 4);
+            const [step, numTurtles, numChanged, jsonLength] = header;
+            const indices = new Uint32Array(buffer, 16, numChanged);
+            const values = new Float32Array(buffer, 16 + 4 * numChanged, 3 * numChanged);
+            const jsonOffset = 16 + 16 * numChanged;
+            const state = JSON.parse(textDecoder.decode(
+                new Uint8Array(buffer, jsonOffset, jsonLength)));
+            
+            if (state.keyframe || turtles.length !== numTurtles) {
+                turtles = new Array(numTurtles);
+                for (let i = 0; i < numTurtles; i++) {
+                    turtles[i] = {position: [0, 0], heading: 0, color: 'black'};
+                }
+            }
+            for (let k = 0; k < numChanged; k++) {
+                const turtle = turtles[indices[k]];
+                turtle.position[0] = values[3 * k];
+                turtle.position[1] = values[3 * k + 1];
+                turtle.heading = values[3 * k + 2];
+            }
+            for (const [i, color] of Object.entries(state.colors)) {
+                turtles[i].color = color;
+            }
+            // Binary pheromone grids, read in place as one view per row.
+            // Grids left out of a frame did not change.
+            if (state.keyframe) {
+                pheromoneGrids = {};
+            }
+            let gridOffset = jsonOffset + jsonLength;
+            for (const [pid, rows, cols] of state.pheromone_grids || []) {
+                const grid = new Array(rows);
+                for (let r = 0; r < rows; r++) {
+                    grid[r] = new Float32Array(buffer, gridOffset + 4 * r * cols, cols);
+                }
+                pheromoneGrids[pid] = grid;
+                gridOffset += 4 * rows * cols;
+            }
+            if (state.pheromone_grids) {
+                state.pheromones = Object.assign(state.pheromones || {}, pheromoneGrids);
+            }
+            
+            state.step = step;
+            state.num_turtles = numTurtles;
+            state.turtles = turtles;
+            return state;
+        }
         
         function connectWebSocket() {
             ws = new WebSocket('ws://' + window.location.host + '/ws');
+            ws.binaryType = 'arraybuffer';
             ws.onmessage = function(event) {
                 try {
-                    const state = JSON.parse(event.data);
+                    const state = decodeFrame(event.data);
                     console.log('Received state with', state.marks ? state.marks.length : 0, 'marks');
                     render(state);
                     updateStats(state);
@@ -32,7 +32,7 @@ from similar2logo.influences import (
 from similar2logo.reaction import LogoReactionModel, HAS_CPP_REACTION
 from similar2logo.fastmath import sin, cos, atan2, PI
 from similar2logo.dsl import Simulation
-# from similar2logo.spatial import SpatialIndex  # Not used in tests
+from similar2logo.spatial import SpatialHashGrid, MarkGrid
 from similar2logo.probes import RealTimeMatcherProbe
 
 
@@ -51,6 +51,27 @@ class TestTools(unittest.TestCase):
         self.assertEqual(p2.x, 3.0)
         self.assertEqual(p2.y, 4.0)
 
+    @unittest.skipIf(HAS_CPP_CORE, "Python fallback only")
+    def test_point2d_slots(self):
+        """Test that fallback points carry no __dict__ and still pickle"""
+        import pickle
+        point = Point2D(1.5, -2.0)
+        self.assertFalse(hasattr(point, '__dict__'))
+        with self.assertRaises(AttributeError):
+            point.z = 1.0
+        copy = pickle.loads(pickle.dumps(point))
+        self.assertEqual((copy.x, copy.y), (1.5, -2.0))
+
+    @unittest.skipIf(HAS_CPP_CORE, "Python fallback only")
+    def test_point2d_distance_range(self):
+        """Test distances whose squares overflow or underflow"""
+        far = Point2D(3e200, 4e200)
+        self.assertAlmostEqual(far.magnitude() / 5e200, 1.0)
+        self.assertAlmostEqual(far.distance(Point2D(0.0, 0.0)) / 5e200, 1.0)
+        near = Point2D(3e-200, 4e-200)
+        self.assertAlmostEqual(near.distance(Point2D(0.0, 0.0)) / 5e-200, 1.0)
+        self.assertEqual(Point2D(1.0, 2.0).distance(Point2D(4.0, 6.0)), 5.0)
+
     def test_point2d_arithmetic(self):
         """Test Point2D arithmetic operations"""
         p1 = Point2D(1.0, 2.0)
@@ -135,6 +156,33 @@ class TestTools(unittest.TestCase):
         # Lerp
         self.assertAlmostEqual(MathUtil.lerp(0.0, 10.0, 0.5), 5.0, places=7)
 
+    def test_normalize_angle(self):
+        """Test angle wrapping for small and very large angles"""
+        import numpy as np
+        from similar2logo import _kernels
+
+        for angle in (0.5, -3.5, 7.0, 1e3, 1e9, -1e12):
+            wrapped = MathUtil.normalize_angle(angle)
+            self.assertLessEqual(abs(wrapped), math.pi)
+            if abs(angle) < 1e6:
+                self.assertAlmostEqual(math.cos(wrapped), math.cos(angle))
+        self.assertEqual(MathUtil.normalize_angle(-3.0), -3.0)
+        self.assertAlmostEqual(MathUtil.angle_difference(3.0, -3.0),
+                               6.0 - 2 * math.pi)
+
+        dh = np.array([0.5, 4.0, -10.0, 1e6])
+        for use_numba in {False, _kernels.HAS_NUMBA}:
+            with patch.object(_kernels, 'HAS_NUMBA', use_numba):
+                headings = np.zeros(4)
+                zeros = np.zeros(4)
+                _kernels.apply_deltas(zeros.copy(), zeros.copy(), headings,
+                                      zeros.copy(), zeros, zeros, dh, zeros,
+                                      10, 10, True, natural=False)
+                np.testing.assert_allclose(
+                    headings, [MathUtil.normalize_angle(a) for a in dh],
+                    atol=1e-9
+                )
+
 
 class TestInfluences(unittest.TestCase):
     """Test all influence classes"""
@@ -214,6 +262,71 @@ class TestInfluences(unittest.TestCase):
         influence = PheromoneFieldUpdate()
         self.assertEqual(influence.getCategory(), "pheromone field update")
 
+    def test_influences_map(self):
+        """Test the class-keyed influence buckets"""
+        from similar2logo.influences import (
+            InfluencesMap, SystemInfluenceAddAgent
+        )
+        influences = InfluencesMap()
+        move = ChangePosition(self.turtle, dx=1.0, dy=0.0)
+        update = SystemInfluenceAddAgent(self.turtle)
+        influences.add_all([move, update])
+        influences.add_all_same_type(
+            ChangeDirection, [ChangeDirection(self.turtle, delta_heading=0.1)] * 2
+        )
+
+        self.assertEqual(influences.get_by_type(ChangePosition), [move])
+        self.assertEqual(len(influences.get_by_type(ChangeDirection)), 2)
+        self.assertEqual(influences.get_by_type(type(move).__name__), [move])
+        self.assertEqual(influences.get_by_type("Unknown"), [])
+        self.assertEqual(influences.get_by_type(Stop), [])
+        self.assertEqual(influences.get_all_system(), [update])
+        self.assertEqual(len(influences.get_all_regular()), 3)
+
+        influences.clear()
+        self.assertEqual(len(influences), 0)
+        self.assertEqual(influences.get_by_type(ChangePosition), [])
+
+    def test_influences_map_pool_release(self):
+        """Test that clearing the map returns pooled influences by bucket"""
+        from similar2logo.influences import InfluencesMap, _PyChangePosition
+        pool = _PyChangePosition._pool
+        saved = pool[:]
+        pool.clear()
+        try:
+            influences = InfluencesMap()
+            moves = [_PyChangePosition.acquire(self.turtle, dx=1.0)
+                     for _ in range(5)]
+            influences.add_all(moves)
+            influences.clear(pool_limit=3)
+            self.assertEqual(pool, moves[:3])
+            self.assertTrue(all(move.agent is None for move in pool))
+            self.assertEqual(influences.get_by_type(_PyChangePosition), [])
+        finally:
+            pool[:] = saved
+
+    def test_influence_double_release(self):
+        """Test that releasing a pooled influence twice pools it once"""
+        from similar2logo.influences import _PyChangePosition
+        pool = _PyChangePosition._pool
+        saved = pool[:]
+        pool.clear()
+        try:
+            move = _PyChangePosition.acquire(self.turtle, dx=1.0)
+            move.release()
+            move.release()
+            self.assertEqual(pool, [move])
+            first = _PyChangePosition.acquire(self.turtle, dx=1.0)
+            second = _PyChangePosition.acquire(self.turtle, dx=2.0)
+            self.assertIsNot(first, second)
+
+            _PyChangePosition.release_all([first, first, second])
+            self.assertEqual(pool, [first, second])
+            first.release()
+            self.assertEqual(len(pool), 2)
+        finally:
+            pool[:] = saved
+
 
 class TestTurtle(unittest.TestCase):
     """Test Turtle classes"""
@@ -248,6 +361,28 @@ class TestTurtle(unittest.TestCase):
         stop_inf = turtle.influence_stop()
         self.assertIsInstance(stop_inf, Stop)
 
+    def test_turtle_slots(self):
+        """Test that turtles and influences carry no instance dict"""
+        import pickle
+        from similar2logo.influences import SystemInfluenceAddAgent
+
+        turtle = Turtle(position=Point2D(1.0, 2.0), heading=0.5)
+        self.assertFalse(hasattr(turtle, '__dict__'))
+        for influence in (turtle.influence_move_forward(1.0),
+                          turtle.influence_drop_mark("x"),
+                          SystemInfluenceAddAgent(turtle)):
+            self.assertFalse(hasattr(influence, '__dict__'))
+
+        copy = pickle.loads(pickle.dumps(turtle))
+        self.assertEqual((copy.position.x, copy.heading), (1.0, 0.5))
+
+        # Subclasses keep a __dict__ for their own attributes
+        class Custom(Turtle):
+            pass
+        custom = Custom()
+        custom.energy = 3
+        self.assertEqual(custom.energy, 3)
+
 
 
 class TestEnvironment(unittest.TestCase):
@@ -265,6 +400,17 @@ class TestEnvironment(unittest.TestCase):
         if HAS_CPP_CORE:
             self.assertTrue(hasattr(env, '_cpp_env'))
 
+    def test_environment_marks(self):
+        """Test environments start with an empty marks dict"""
+        from similar2logo.influences import InfluencesMap
+        env = Environment(10, 10)
+        self.assertEqual(env.marks, {})
+
+        influences = InfluencesMap()
+        influences.add(RemoveMarks(Turtle(), category="food"))
+        LogoReactionModel().make_regular_reaction(0, 1, env, influences)
+        self.assertEqual(env.marks, {})
+
     def test_pheromone_operations(self):
         """Test pheromone grid operations"""
         env = Environment(10, 10)
@@ -284,6 +430,435 @@ class TestEnvironment(unittest.TestCase):
         new_value = env.get_pheromone_value(5, 5, "food")
         self.assertLess(new_value, 50.0)
 
+    def test_bulk_agent_placement(self):
+        """Test random placement arrays and bulk turtle creation"""
+        env = Environment(30, 20)
+        positions = env.random_positions(50)
+        headings = env.random_headings(50)
+        self.assertEqual(positions.shape, (50, 2))
+        self.assertTrue(((positions >= 0) & (positions <= [30, 20])).all())
+        self.assertEqual(headings.shape, (50,))
+
+        sim = LogoSimulation(env, parallel_backend=None)
+        turtles = sim.add_agents_bulk(positions, headings)
+        self.assertEqual(len(sim.turtles), 50)
+        self.assertAlmostEqual(turtles[3].position.x, positions[3, 0])
+        self.assertAlmostEqual(turtles[3].heading, headings[3])
+
+    def test_vectorized_distances(self):
+        """Test that get_distances wraps like get_distance"""
+        env = Environment(100, 100, toroidal=True)
+        origin = Point2D(1.0, 1.0)
+        distances = env.get_distances(origin, [99.0, 50.0], [1.0, 1.0])
+        self.assertAlmostEqual(distances[0], 2.0)
+        self.assertAlmostEqual(distances[1], 49.0)
+
+    def test_fused_diffusion_and_evaporation(self):
+        """Test that the fused kernel matches diffusion then evaporation"""
+        import numpy as np
+        from similar2logo._kernels import diffuse, diffuse_evaporate, evaporate
+
+        grid = np.zeros((6, 7), dtype=np.float32)
+        grid[0, 0] = 40.0
+        grid[3, 4] = 10.0
+        for toroidal in (True, False):
+            expected = diffuse(grid, np.empty_like(grid), 0.5, toroidal)
+            evaporate(expected, 0.9, 0.5)
+            fused = diffuse_evaporate(grid, np.empty_like(grid), 0.5, 0.9, 0.5,
+                                      toroidal)
+            np.testing.assert_allclose(fused, expected, rtol=1e-6)
+
+    def test_diffusion_ping_pong(self):
+        """Test diffusing fields alternate between two preallocated grids"""
+        env = Environment(6, 5)
+        env.add_pheromone("trail", diffusion_coef=0.5)
+        env.add_pheromone("scent", evaporation_coef=0.1)
+        self.assertNotIn("scent", env._pheromone_scratch)
+        env.set_pheromone(2, 2, "trail", 10.0)
+
+        front = env.pheromone_grids["trail"]
+        back = env._pheromone_scratch["trail"]
+        env.diffuse_and_evaporate()
+        self.assertIs(env.pheromone_grids["trail"], back)
+        env.diffuse_and_evaporate()
+        self.assertIs(env.pheromone_grids["trail"], front)
+
+    def test_idle_pheromone_skipped(self):
+        """Test that fields found all zero skip the dynamics until a deposit"""
+        env = Environment(6, 5, toroidal=True)
+        env.add_pheromone("trail", diffusion_coef=0.5, evaporation_coef=0.5,
+                          min_value=1.0)
+        env.set_pheromone(2, 2, "trail", 8.0)
+        steps = 0
+        while env.pheromone_dirty["trail"]:
+            env.diffuse_and_evaporate()
+            steps += 1
+        self.assertEqual(steps, 2)
+        self.assertFalse(env.pheromone_grids["trail"].any())
+
+        # An idle field is not swapped with its back buffer
+        grid = env.pheromone_grids["trail"]
+        env.diffuse_and_evaporate()
+        self.assertIs(env.pheromone_grids["trail"], grid)
+
+        env.set_pheromone(2, 2, "trail", 8.0)
+        self.assertTrue(env.pheromone_dirty["trail"])
+        env.diffuse_and_evaporate()
+        self.assertAlmostEqual(float(env.pheromone_grids["trail"][2, 2]), 2.0)
+
+    def test_numpy_diffusion(self):
+        """Test the NumPy diffusion fallback conserves mass in place"""
+        import numpy as np
+        from similar2logo._kernels import _diffuse_numpy
+
+        grid = np.zeros((6, 7), dtype=np.float32)
+        grid[0, 0] = 40.0
+        grid[3, 4] = 16.0
+        for toroidal in (True, False):
+            out = np.full_like(grid, np.nan)
+            self.assertIs(_diffuse_numpy(grid, out, 0.5, toroidal), out)
+            self.assertAlmostEqual(float(out.sum()), 56.0, places=4)
+            self.assertAlmostEqual(float(out[3, 4]), 8.0)
+            self.assertAlmostEqual(float(out[2, 3]), 1.0)
+        # In a corner the outflow is shared between 3 neighbours
+        self.assertAlmostEqual(float(out[0, 1]), 20.0 / 3, places=5)
+
+    def test_tiled_diffusion(self):
+        """Test diffusion across tile boundaries matches the NumPy stencil"""
+        import numpy as np
+        from similar2logo._kernels import (TILE_ROWS, _diffuse_numpy,
+                                           diffuse_evaporate, evaporate)
+
+        rng = np.random.default_rng(3)
+        for shape in ((2 * TILE_ROWS + 5, 9), (3, 1), (1, 4)):
+            grid = rng.random(shape).astype(np.float32) - 0.1
+            for toroidal in (True, False):
+                expected = evaporate(
+                    _diffuse_numpy(grid, np.empty_like(grid), 0.4, toroidal),
+                    0.9, 0.05
+                )
+                np.testing.assert_allclose(
+                    diffuse_evaporate(grid, np.empty_like(grid), 0.4, 0.9,
+                                      0.05, toroidal),
+                    expected, rtol=1e-6, atol=1e-7
+                )
+
+    def test_double_precision_fields(self):
+        """Test SIMILAR_F64_PHEROMONE switches pheromone grids to float64"""
+        import subprocess
+        code = (
+            "from similar2logo.environment import Environment\n"
+            "env = Environment(4, 3)\n"
+            "env.add_pheromone('trail', diffusion_coef=0.5)\n"
+            "env.diffuse_and_evaporate()\n"
+            "print(env.pheromone_grids['trail'].dtype)\n"
+        )
+        python_dir = os.path.join(os.path.dirname(__file__), '..', '..',
+                                  'python')
+        for flag, expected in (('1', 'float64'), ('', 'float32')):
+            env = dict(os.environ, SIMILAR_F64_PHEROMONE=flag,
+                       PYTHONPATH=python_dir)
+            result = subprocess.run([sys.executable, '-c', code], env=env,
+                                    capture_output=True, text=True, timeout=120)
+            self.assertEqual(result.stdout.strip(), expected, result.stderr)
+
+    def test_diffusion_halo_reuse(self):
+        """Test diffusion ignores whatever a reused halo grid holds"""
+        import numpy as np
+        from similar2logo._kernels import diffuse, diffuse_evaporate, halo_for
+
+        grid = np.zeros((5, 6), dtype=np.float32)
+        grid[0, 0] = 40.0
+        grid[2, 3] = 16.0
+        halo = halo_for(grid)
+        halo.fill(123.0)
+        self.assertIs(halo_for(grid, halo), halo)
+        self.assertIsNot(halo_for(grid.astype(np.float64), halo), halo)
+        for toroidal in (True, False, True):
+            expected = diffuse(grid, np.empty_like(grid), 0.5, toroidal)
+            np.testing.assert_array_equal(
+                diffuse(grid, np.empty_like(grid), 0.5, toroidal, halo),
+                expected
+            )
+            np.testing.assert_array_equal(
+                diffuse_evaporate(grid, np.empty_like(grid), 0.5, 0.9, 0.0,
+                                  toroidal, halo),
+                diffuse_evaporate(grid, np.empty_like(grid), 0.5, 0.9, 0.0,
+                                  toroidal)
+            )
+
+        env = Environment(6, 5)
+        env.add_pheromone("trail", diffusion_coef=0.5, evaporation_coef=0.1)
+        env.diffuse_and_evaporate()
+        halo = env._pheromone_halo
+        self.assertEqual(halo.shape, halo_for(grid).shape)
+        env.diffuse_and_evaporate()
+        self.assertIs(env._pheromone_halo, halo)
+
+
+class TestSpatialHashGrid(unittest.TestCase):
+    """Test the fixed-radius cell list"""
+
+    def test_toroidal_query(self):
+        """Test that queries find neighbours across wrapped edges"""
+        a = Turtle(position=Point2D(1.0, 50.0))
+        b = Turtle(position=Point2D(98.0, 50.0))
+        c = Turtle(position=Point2D(50.0, 50.0))
+
+        grid = SpatialHashGrid(10.0, 100, 100, toroidal=True)
+        grid.rebuild([a, b, c])
+        neighbors = grid.query_radius(1.0, 50.0, 10.0, exclude=a)
+        self.assertEqual([obj for obj, _ in neighbors], [b])
+        self.assertAlmostEqual(neighbors[0][1], 3.0)
+
+        cell_start, cell_idx = grid.to_csr()
+        self.assertEqual(len(cell_start), grid.cols * grid.rows + 1)
+        self.assertEqual(sorted(cell_idx), [0, 1, 2])
+
+    def test_bulk_neighbors(self):
+        """Test the CSR neighbour queries against query_radius"""
+        import numpy as np
+        from similar2logo import _spatial_kernel
+
+        rng = np.random.default_rng(3)
+        turtles = [Turtle(position=Point2D(x, y))
+                   for x, y in rng.uniform(0, 40, size=(150, 2))]
+        for toroidal in (False, True):
+            grid = SpatialHashGrid(4.0, 40, 40, toroidal=toroidal)
+            grid.rebuild(turtles)
+            for use_numba in {False, _spatial_kernel.HAS_NUMBA}:
+                with patch.object(_spatial_kernel, 'HAS_NUMBA', use_numba):
+                    offsets, idx, d2 = grid.neighbors(4.0)
+                    out_idx = np.empty(2, dtype=np.int32)
+                    out_d2 = np.empty(2)
+                    for i, turtle in enumerate(turtles):
+                        expected = grid.query_radius(
+                            turtle.position.x, turtle.position.y, 4.0,
+                            exclude=turtle, squared=True
+                        )
+                        rows = slice(offsets[i], offsets[i + 1])
+                        self.assertEqual([turtles[j] for j in idx[rows]],
+                                         [obj for obj, _ in expected])
+                        np.testing.assert_allclose(
+                            d2[rows], [dist_sq for _, dist_sq in expected]
+                        )
+                        count = grid.query_radius_sq(
+                            turtle.position.x, turtle.position.y, 16.0,
+                            out_idx, out_d2, exclude=i
+                        )
+                        self.assertEqual(count, len(expected))
+                        self.assertEqual(list(out_idx[:min(count, 2)]),
+                                         list(idx[rows][:2]))
+
+    def test_vectorized_query(self):
+        """Test the array query_radius against the object loop"""
+        import numpy as np
+        from similar2logo import _spatial_kernel
+
+        rng = np.random.default_rng(7)
+        turtles = [Turtle(position=Point2D(x, y))
+                   for x, y in rng.uniform(0, 40, size=(300, 2))]
+        for toroidal in (False, True):
+            grid = SpatialHashGrid(4.0, 40, 40, toroidal=toroidal)
+            grid.rebuild(turtles)
+            # Inserted objects are always queried with the object loop
+            reference = SpatialHashGrid(4.0, 40, 40, toroidal=toroidal)
+            for turtle in turtles:
+                reference.insert(turtle, turtle.position.x, turtle.position.y)
+            for turtle in turtles[:30]:
+                p = turtle.position
+                # The 9.0 radius outgrows the initial buffers
+                for radius, squared in ((3.0, False), (9.0, True)):
+                    expected = reference.query_radius(
+                        p.x, p.y, radius, exclude=turtle, squared=squared
+                    )
+                    for use_numba in {False, _spatial_kernel.HAS_NUMBA}:
+                        with patch.object(SpatialHashGrid,
+                                          'VECTOR_THRESHOLD', 0), \
+                                patch.object(_spatial_kernel, 'HAS_NUMBA',
+                                             use_numba):
+                            found = grid.query_radius(
+                                p.x, p.y, radius, exclude=turtle,
+                                squared=squared
+                            )
+                        self.assertEqual([obj for obj, _ in found],
+                                         [obj for obj, _ in expected])
+                        np.testing.assert_allclose(
+                            [d for _, d in found], [d for _, d in expected]
+                        )
+
+            # Moved objects are queried at their current position
+            turtles[0].position = Point2D(20.0, 20.0)
+            grid.update(turtles[0], 20.0, 20.0)
+            self.assertIn((turtles[0], 0.0), grid.query_radius(20.0, 20.0, 0.5))
+
+    def test_query_radius_arrays(self):
+        """Test the tuple-free queries against query_radius"""
+        import numpy as np
+        rng = np.random.default_rng(13)
+        turtles = [Turtle(position=Point2D(x, y))
+                   for x, y in rng.uniform(0, 30, size=(200, 2))]
+        grid = SpatialHashGrid(5.0, 30, 30, toroidal=True)
+        grid.rebuild(turtles)
+        for moved in (False, True):
+            if moved:
+                # Updates switch both queries to the cell lists
+                grid.update(turtles[1], 15.0, 15.0)
+            for turtle in turtles[:20]:
+                p = turtle.position
+                expected = grid.query_radius(p.x, p.y, 6.0, exclude=turtle)
+                objects, distances = grid.query_radius_arrays(
+                    p.x, p.y, 6.0, exclude=turtle
+                )
+                self.assertEqual(objects, [obj for obj, _ in expected])
+                self.assertEqual(distances.tolist(),
+                                 [dist for _, dist in expected])
+
+        # The distances are a view of a buffer reused by the next query
+        _, first = grid.query_radius_arrays(1.0, 1.0, 6.0)
+        _, second = grid.query_radius_arrays(20.0, 20.0, 6.0)
+        self.assertTrue(np.shares_memory(first, second))
+
+    def test_cell_id(self):
+        """Test that flat cell ids match the cell coordinates"""
+        grid = SpatialHashGrid(3.0, 20, 10)
+        for x, y in ((0.0, 0.0), (19.99, 9.99), (-4.0, 12.0), (7.5, 3.0)):
+            cell_x, cell_y = grid._get_cell(x, y)
+            self.assertEqual(grid._cell_id(x, y), cell_y * grid.cols + cell_x)
+
+    def test_query_blocks(self):
+        """Test the cached blocks of neighbour cells"""
+        grid = SpatialHashGrid(2.0, 10, 8)  # 5 x 4 cells
+        self.assertEqual(grid._block(0, 1, 1), (0, 1, 5, 6))
+        self.assertEqual(grid._block(7, 1, 1),
+                         (1, 2, 3, 6, 7, 8, 11, 12, 13))
+        self.assertIs(grid._block(7, 1, 1), grid._block(7, 1, 1))
+
+        torus = SpatialHashGrid(2.0, 10, 8, toroidal=True)
+        self.assertEqual(sorted(torus._block(0, 1, 1)),
+                         [0, 1, 4, 5, 6, 9, 15, 16, 19])
+        # A reach covering a whole axis lists each cell once
+        self.assertEqual(sorted(torus._block(0, 1, 2)), sorted(
+            row * 5 + col for row in range(4) for col in (4, 0, 1)))
+
+    def test_toroidal_neighbors(self):
+        """Test that neighbour queries wrap across every edge and corner"""
+        import numpy as np
+        rng = np.random.default_rng(19)
+        # Objects packed along the edges of a 6 x 4 cell torus
+        xs = np.concatenate([rng.uniform(0, 3, 80), rng.uniform(27, 30, 80)])
+        ys = np.concatenate([rng.uniform(0, 20, 80), rng.uniform(0, 20, 80)])
+        ys[::4] = rng.uniform(18, 20, 40)
+        grid = SpatialHashGrid(5.0, 30, 20, toroidal=True)
+        grid.rebuild_soa(xs, ys)
+        offsets, idx, d2 = grid.neighbors(5.0)
+
+        dx = np.abs(xs[:, None] - xs[None, :])
+        dy = np.abs(ys[:, None] - ys[None, :])
+        dx = np.minimum(dx, 30 - dx)
+        dy = np.minimum(dy, 20 - dy)
+        within = dx * dx + dy * dy <= 25.0
+        np.fill_diagonal(within, False)
+        for i in range(len(xs)):
+            found = idx[offsets[i]:offsets[i + 1]]
+            self.assertEqual(sorted(found.tolist()),
+                             np.flatnonzero(within[i]).tolist())
+
+    def test_update_swap_pop(self):
+        """Test that updates keep the cell lists and their slots in sync"""
+        import numpy as np
+        rng = np.random.default_rng(11)
+        turtles = [Turtle(position=Point2D(x, y))
+                   for x, y in rng.uniform(0, 20, size=(60, 2))]
+        grid = SpatialHashGrid(4.0, 20, 20)
+        grid.rebuild(turtles)
+        for i in rng.integers(0, len(turtles), size=200):
+            x, y = rng.uniform(0, 20, size=2)
+            turtles[i].position = Point2D(x, y)
+            grid.update(turtles[i], x, y)
+
+        for cell_id, cell in enumerate(grid.cells):
+            for slot, turtle in enumerate(cell):
+                self.assertEqual(grid.object_cells[id(turtle)], cell_id)
+                self.assertEqual(grid._object_slots[id(turtle)], slot)
+        self.assertEqual(sum(map(len, grid.cells)), len(turtles))
+        found = grid.query_radius(10.0, 10.0, 5.0)
+        self.assertEqual(
+            {id(obj) for obj, _ in found},
+            {id(t) for t in turtles
+             if t.position.distance(Point2D(10.0, 10.0)) <= 5.0}
+        )
+
+    def test_rebuild_soa(self):
+        """Test that array rebuilds bin objects like inserts do"""
+        import numpy as np
+        rng = np.random.default_rng(5)
+        xy = rng.uniform(-5, 45, size=(100, 2))
+        turtles = [Turtle(position=Point2D(x, y)) for x, y in xy]
+
+        grid = SpatialHashGrid(4.0, 40, 40)
+        grid.rebuild(turtles)
+        expected = SpatialHashGrid(4.0, 40, 40)
+        for turtle in turtles:
+            expected.insert(turtle, turtle.position.x, turtle.position.y)
+        self.assertEqual(grid.cells, expected.cells)
+        self.assertEqual(grid.object_cells, expected.object_cells)
+
+        # Without objects, the index-based queries return rebuild indices
+        soa = SpatialHashGrid(4.0, 40, 40)
+        soa.rebuild_soa(xy[:, 0], xy[:, 1])
+        offsets, idx, d2 = soa.neighbors(4.0)
+        expected_offsets, expected_idx, _ = grid.neighbors(4.0)
+        np.testing.assert_array_equal(offsets, expected_offsets)
+        np.testing.assert_array_equal(idx[:offsets[-1]],
+                                      expected_idx[:offsets[-1]])
+
+    def test_mark_grid(self):
+        """Test that the mark index finds the marks within one unit"""
+        env = Environment(20, 20)
+        env.marks = {
+            f'mark_{i}': {'position': Point2D(x, y)}
+            for i, (x, y) in enumerate([(5.5, 5.5), (4.6, 6.9), (6.4, 5.1),
+                                        (7.0, 5.5), (5.5, 3.0)])
+        }
+        index = MarkGrid.of(env)
+        self.assertIs(MarkGrid.of(env), index)
+        self.assertEqual([mark_id for mark_id, _ in index.near(5.5, 6.0)],
+                         ['mark_0', 'mark_1', 'mark_2'])
+
+        index.remove('mark_0')
+        del env.marks['mark_0']
+        self.assertEqual([mark_id for mark_id, _ in index.near(5.5, 6.0)],
+                         ['mark_1', 'mark_2'])
+
+        # Marks added or removed behind the index's back trigger a rebuild
+        env.marks['mark_5'] = {'position': Point2D(5.0, 6.0)}
+        near = MarkGrid.of(env).near(5.5, 6.0)
+        self.assertEqual([mark_id for mark_id, _ in near],
+                         ['mark_1', 'mark_2', 'mark_5'])
+
+        # So does replacing the dict, even with as many marks
+        env.marks = {f'mark_{i}': {'position': Point2D(15.0, 15.0)}
+                     for i in range(4)}
+        self.assertEqual(MarkGrid.of(env).near(5.5, 6.0), [])
+
+    def test_mark_grid_within(self):
+        """Test radius lookups in the mark index against a full scan"""
+        import numpy as np
+        env = Environment(20, 20)
+        rng = np.random.default_rng(3)
+        env.marks = {
+            f'mark_{i}': {'position': Point2D(float(x), float(y))}
+            for i, (x, y) in enumerate(rng.uniform(0, 20, (200, 2)))
+        }
+        index = MarkGrid.of(env)
+        center = Point2D(8.3, 11.7)
+        for radius in (0.5, 2.0, 4.5, 40.0):
+            expected = [mark_id for mark_id, mark in env.marks.items()
+                        if mark['position'].distance(center) <= radius]
+            found = [mark_id for mark_id, _ in index.within(8.3, 11.7, radius)]
+            self.assertEqual(found, expected)
+
 
 class TestReaction(unittest.TestCase):
     """Test reaction model functionality"""
@@ -314,6 +889,160 @@ class TestReaction(unittest.TestCase):
             # This might fail without proper setup, which is expected
             print(f"Reaction processing test: {e}")
 
+    def test_change_reactions(self):
+        """Test the bounds applied by the movement reactions"""
+        from similar2logo.influences import InfluencesMap
+        for toroidal, expected in ((False, (9, 0)), (True, (2.0, 8.0))):
+            turtle = Turtle(position=Point2D(8.0, 1.0), heading=3.0)
+            turtle.speed = 1.0
+            influences = InfluencesMap()
+            influences.add_all([
+                ChangePosition(turtle, dx=4.0, dy=-3.0),
+                ChangeDirection(turtle, delta_heading=1.0),
+                ChangeSpeed(turtle, delta_speed=-2.0),
+            ])
+            LogoReactionModel().make_regular_reaction(
+                0, 1, Environment(10, 10, toroidal=toroidal), influences
+            )
+            self.assertEqual((turtle.position.x, turtle.position.y), expected)
+            self.assertAlmostEqual(turtle.heading, 4.0 - 2 * math.pi)
+            self.assertEqual(turtle.speed, 0)
+
+    def test_reaction_dispatch(self):
+        """Test that only processors with influences to apply are called"""
+        from similar2logo.influences import InfluencesMap
+        calls = []
+
+        class RecordingReaction(LogoReactionModel):
+            def _process_stop_influences(self, influences, environment):
+                calls.append('stop')
+                super()._process_stop_influences(influences, environment)
+
+            def _process_drop_mark_influences(self, influences, environment):
+                calls.append('drop mark')
+
+        turtle = Turtle(position=Point2D(1.0, 1.0))
+        turtle.speed = 2.0
+        influences = InfluencesMap()
+        influences.add(Stop(turtle))
+        RecordingReaction().make_regular_reaction(
+            0, 1, Environment(10, 10), influences
+        )
+        self.assertEqual(calls, ['stop'])
+        self.assertEqual(turtle.speed, 0)
+
+    def test_cpp_handled_influences_skipped(self):
+        """Test influences applied by the C++ reaction are not reapplied"""
+        import types
+        from similar2logo import reaction as reaction_module
+        from similar2logo.influences import InfluencesMap
+
+        core = types.ModuleType('similar2logo._core')
+        core.environment = types.ModuleType('similar2logo._core.environment')
+        core.environment.Environment = Environment
+        turtle = Turtle(position=Point2D(1.0, 1.0))
+        influences = InfluencesMap()
+        influences.add(ChangePosition(turtle, dx=1.0, dy=0.0))
+        env = Environment(10, 10)
+        env.add_pheromone("trail", diffusion_coef=0.5)
+        env.set_pheromone(5, 5, "trail", 8.0)
+
+        reaction = LogoReactionModel()
+        reaction._cpp_reaction = Mock()
+        # The C++ path takes the influences that expose getTarget
+        with patch.object(reaction_module, 'HAS_CPP_REACTION', True), \
+                patch.object(ChangePosition, 'getTarget',
+                             lambda self: self.agent, create=True), \
+                patch.dict(sys.modules, {
+                    'similar2logo._core': core,
+                    'similar2logo._core.environment': core.environment,
+                }):
+            reaction.make_regular_reaction(0, 1, env, influences)
+
+        reaction._cpp_reaction.apply.assert_called_once()
+        # Neither the move nor the field dynamics ran again in Python
+        self.assertEqual((turtle.position.x, turtle.position.y), (1.0, 1.0))
+        self.assertEqual(float(env.pheromone_grids["trail"][5, 5]), 8.0)
+
+
+    def test_pheromone_diffusion_conserves_mass(self):
+        """Test that vectorized diffusion spreads without losing pheromone"""
+        env = Environment(10, 10, toroidal=True)
+        env.add_pheromone("trail", diffusion_coef=0.5)
+        env.pheromone_grids["trail"][5][5] = 80.0
+
+        reaction = LogoReactionModel()
+        reaction._pheromone_diffusion(env, 1)
+
+        grid = env.pheromone_grids["trail"]
+        self.assertAlmostEqual(grid[5][5], 40.0)
+        self.assertAlmostEqual(grid[4][4], 5.0)
+        self.assertAlmostEqual(float(grid.sum()), 80.0)
+
+    def test_emit_pheromone_batch(self):
+        """Test emissions are accumulated per cell and clamped to the grid"""
+        from similar2logo.influences import EmitPheromone, InfluencesMap
+
+        env = Environment(10, 10)
+        env.add_pheromone("trail")
+        influences = InfluencesMap()
+        influences.add_all([
+            EmitPheromone(None, Point2D(2.5, 3.9), "trail", 1.0),
+            EmitPheromone(None, Point2D(2.1, 3.2), "trail", 2.0),
+            EmitPheromone(None, Point2D(12.0, -1.0), "trail", 4.0),
+            EmitPheromone(None, Point2D(5.0, 5.0), "unknown", 8.0),
+        ])
+        LogoReactionModel()._process_emit_pheromone_influences(influences, env)
+
+        grid = env.pheromone_grids["trail"]
+        self.assertAlmostEqual(float(grid[3, 2]), 3.0)
+        self.assertAlmostEqual(float(grid[0, 9]), 4.0)
+        self.assertAlmostEqual(float(grid.sum()), 7.0)
+
+    def test_influence_buffer(self):
+        """Test vectorized processing of buffered influences"""
+        from similar2logo.influences import InfluenceBuffer, InfluencesMap
+
+        env = Environment(10, 10, toroidal=True)
+        turtles = [Turtle(position=Point2D(1.0, 1.0), heading=0.0),
+                   Turtle(position=Point2D(9.5, 5.0), heading=3.0)]
+        buffer = InfluenceBuffer(turtles, capacity=1)
+        buffer.push_move(0, 2.0, 1.0)
+        buffer.push_move(0, 1.0, 0.0)
+        buffer.push_move(1, 1.0, 0.0)
+        buffer.push_turn(1, 0.5)
+        buffer.push_speed(0, 2.0)
+        self.assertEqual(len(buffer), 5)
+
+        reaction = LogoReactionModel()
+        reaction.make_regular_reaction(0, 1, env, InfluencesMap(buffer))
+
+        self.assertAlmostEqual(turtles[0].position.x, 4.0)
+        self.assertAlmostEqual(turtles[0].position.y, 2.0)
+        self.assertAlmostEqual(turtles[1].position.x, 0.5)
+        self.assertAlmostEqual(turtles[1].heading, 3.5 - 2 * math.pi, places=5)
+        self.assertAlmostEqual(turtles[0].speed, turtles[1].speed + 2.0)
+
+    def test_buffered_stop(self):
+        """Test stop rows override the speed changes of the same step"""
+        from similar2logo.influences import InfluenceBuffer, InfluencesMap
+
+        turtles = [Turtle(), Turtle(), Turtle()]
+        for turtle in turtles:
+            turtle.speed = 1.0
+            turtle.acceleration = 0.5
+        buffer = InfluenceBuffer(turtles)
+        buffer.push_speed(0, 2.0)
+        buffer.push_stop(0)
+        buffer.push_stop(2)
+        buffer.push_stop(2)
+
+        LogoReactionModel().make_regular_reaction(
+            0, 1, Environment(10, 10), InfluencesMap(buffer)
+        )
+        self.assertEqual([t.speed for t in turtles], [0.0, 1.0, 0.0])
+        self.assertEqual([t.acceleration for t in turtles], [0.0, 0.5, 0.0])
+
 
 class TestDSL(unittest.TestCase):
     """Test DSL functionality"""
@@ -371,6 +1100,95 @@ class TestDSL(unittest.TestCase):
         end_pos = sim_obj.turtles[0].position
         self.assertNotEqual(start_pos, end_pos)
 
+    def test_cone_filter(self):
+        """Test the dot-product vision cone"""
+        import numpy as np
+        from similar2logo._kernels import cone_filter
+
+        # Agent at the origin heading North (towards negative y)
+        positions = np.array([[0.0, -5.0], [0.0, 5.0], [5.0, 0.0], [0.0, -20.0]])
+        distances = np.hypot(positions[:, 0], positions[:, 1])
+        mask = cone_filter(0.0, 0.0, 0.0, math.pi / 2, 10.0, positions, distances)
+        self.assertEqual(mask.tolist(), [True, False, False, False])
+
+        # A full circle keeps everything within the radius
+        mask = cone_filter(0.0, 0.0, 0.0, 2 * math.pi, 10.0, positions, distances)
+        self.assertEqual(mask.tolist(), [True, True, True, False])
+
+    def test_boid_turn(self):
+        """Test that boid_turn sums the three steering helpers"""
+        from similar2logo.dsl import SimpleTurtle
+
+        boid = SimpleTurtle(position=Point2D(5.0, 5.0), heading=0.5)
+        neighbors = [
+            SimpleTurtle(position=Point2D(6.0, 5.5), heading=1.0),
+            SimpleTurtle(position=Point2D(3.0, 8.0), heading=-2.0),
+        ]
+        separate = boid.separate_from(neighbors, 2.0, 0.7)
+        expected = (boid.align_with(neighbors, 0.3)[0].delta_heading +
+                    separate[0].delta_heading +
+                    boid.cohere_with(neighbors, 0.5)[0].delta_heading)
+
+        influences = boid.boid_turn(neighbors, 2.0, w_align=0.3, w_sep=0.7,
+                                    w_coh=0.5)
+        self.assertEqual(len(influences), 1)
+        self.assertAlmostEqual(influences[0].delta_heading, expected)
+        self.assertEqual(boid.boid_turn([]), [])
+
+    def test_boid_turns(self):
+        """Test the population boids turns against per-boid turns"""
+        import subprocess
+        import numpy as np
+        from similar2logo import _boids_kernel
+
+        rng = np.random.default_rng(17)
+        xs, ys = rng.uniform(0, 30, size=(2, 300))
+        headings = rng.uniform(-math.pi, math.pi, 300)
+        grid = SpatialHashGrid(4.0, 30, 30, toroidal=True)
+        grid.rebuild_soa(xs, ys)
+        offsets, idx, _ = grid.neighbors(4.0)
+        expected = [
+            _boids_kernel.boid_turn(
+                xs[i], ys[i], headings[i], xs[idx[offsets[i]:offsets[i + 1]]],
+                ys[idx[offsets[i]:offsets[i + 1]]],
+                headings[idx[offsets[i]:offsets[i + 1]]], 1.5
+            )
+            for i in range(300)
+        ]
+        for use_numba in {False, _boids_kernel.HAS_NUMBA}:
+            with patch.object(_boids_kernel, 'HAS_NUMBA', use_numba):
+                turns = _boids_kernel.boid_turns(xs, ys, headings, 4.0, 1.5,
+                                                 30, 30, toroidal=True,
+                                                 backend='cuda')
+            np.testing.assert_allclose(turns, expected, atol=1e-12)
+
+        # The all-pairs CUDA kernel, run by numba's CUDA simulator
+        if not _boids_kernel.HAS_NUMBA:
+            return
+        code = (
+            "import numpy as np\n"
+            "from similar2logo import _boids_kernel as b\n"
+            "assert b._cuda is None  # not probed on import\n"
+            "assert b.has_cuda()\n"
+            "rng = np.random.default_rng(5)\n"
+            "xs, ys = rng.uniform(0, 20, size=(2, 300))\n"
+            "h = rng.uniform(-3, 3, 300)\n"
+            "for toroidal in (False, True):\n"
+            "    gpu = b.boid_turns(xs, ys, h, 3.0, 1.0, 20, 20, toroidal,\n"
+            "                       backend='cuda')\n"
+            "    cpu = b.boid_turns(xs, ys, h, 3.0, 1.0, 20, 20, toroidal,\n"
+            "                       backend='cpu')\n"
+            "    np.testing.assert_allclose(gpu, cpu, atol=1e-12)\n"
+            "print('ok')\n"
+        )
+        python_dir = os.path.join(os.path.dirname(__file__), '..', '..',
+                                  'python')
+        env = dict(os.environ, NUMBA_ENABLE_CUDASIM='1',
+                   PYTHONPATH=python_dir)
+        result = subprocess.run([sys.executable, '-c', code], env=env,
+                                capture_output=True, text=True, timeout=300)
+        self.assertEqual(result.stdout.strip(), 'ok', result.stderr)
+
 
 
 
@@ -387,25 +1205,124 @@ class TestProbes(unittest.TestCase):
         # Test speed factor
         self.assertEqual(probe.get_speed_factor(), 30.0)
 
+    def test_realtime_probe_deadlines(self):
+        """Test the real-time probe waits for absolute per-step deadlines"""
+        probe = RealTimeMatcherProbe(200.0)
+        probe.observe_at_initial_time(0, None)
+        start = probe.previous_measure_real_time
+        for step in range(1, 21):
+            probe.observe_at_partial_consistent_time(step, None)
+            self.assertGreaterEqual(time.perf_counter() - start, step / 200.0)
+
+        # A step far behind schedule restarts it instead of catching up
+        probe.previous_measure_real_time -= 5.0
+        probe.observe_at_partial_consistent_time(21, None)
+        self.assertEqual(probe.previous_measure_sim_time, 21)
+
+    def test_probe_manager_callbacks(self):
+        """Test probes added and removed are notified in insertion order"""
+        from similar2logo.probes import IProbe, ProbeManager
+        calls = []
+
+        class NamedProbe(IProbe):
+            def __init__(self, name):
+                self.name = name
+
+            def observe_at_initial_time(self, initial_time, simulation):
+                calls.append(('initial', self.name, initial_time))
+
+            def observe_at_partial_consistent_time(self, current_time,
+                                                   simulation):
+                calls.append(('step', self.name, current_time))
+
+        manager = ProbeManager()
+        for name in ('a', 'b', 'c'):
+            manager.add_probe(name, NamedProbe(name))
+        manager.remove_probe('b')
+        manager.notify_initial_time(0, None)
+        manager.notify_step(1, None)
+        manager.notify_final_time(1, None)
+        self.assertEqual(calls, [('initial', 'a', 0), ('initial', 'c', 0),
+                                 ('step', 'a', 1), ('step', 'c', 1)])
+
+        # Replacing a probe under the same name notifies the new one
+        manager.add_probe('a', NamedProbe('d'))
+        calls.clear()
+        manager.notify_step(2, None)
+        self.assertEqual(calls, [('step', 'd', 2), ('step', 'c', 2)])
+
+    def test_probe_context(self):
+        """Test probes receive the state arrays in a ProbeContext"""
+        import numpy as np
+        from similar2logo.probes import IProbe, ProbeContext
+
+        class SpeedProbe(IProbe):
+            def __init__(self):
+                self.seen = []
+
+            def observe_at_initial_time(self, initial_time, simulation):
+                pass
+
+            def observe_at_partial_consistent_time(self, current_time,
+                                                   simulation):
+                self.seen.append((
+                    simulation,
+                    float(np.mean(simulation.turtles_speed)),
+                    len(simulation.turtles),
+                ))
+
+        env = Environment(20, 20)
+        sim = LogoSimulation(env, num_turtles=0)
+        sim.add_agents_bulk([Point2D(5.0, 5.0)] * 3, [0.0] * 3)
+        for turtle, speed in zip(sim.turtles, (1.0, 2.0, 3.0)):
+            turtle.speed = speed
+        probe = SpeedProbe()
+        sim.probe_manager.add_probe("speed", probe)
+        sim.step()
+
+        context, mean_speed, count = probe.seen[0]
+        self.assertIsInstance(context, ProbeContext)
+        self.assertIs(context.simulation, sim)
+        self.assertIs(context.environment, env)
+        self.assertEqual(context.step, 0)
+        self.assertAlmostEqual(mean_speed, 2.0)
+        # Other attributes are read from the simulation
+        self.assertEqual(count, 3)
+
 
 class TestFastMath(unittest.TestCase):
     """Test fast math approximations"""
 
     def test_fastmath_trig(self):
         """Test fast trigonometric functions"""
-        # Test against standard math functions
-        test_angles = [0.0, math.pi/4, math.pi/2, math.pi, 2*math.pi]
+        import numpy as np
 
-        for angle in test_angles:
-            # Allow some approximation error
-            self.assertAlmostEqual(sin(angle), math.sin(angle), places=1)
-            self.assertAlmostEqual(cos(angle), math.cos(angle), places=1)
+        # The C++ lookup table is accurate to a fraction of 1e-3
+        angles = np.linspace(-2 * math.pi, 2 * math.pi, 1001)
+        np.testing.assert_allclose([sin(a) for a in angles], np.sin(angles),
+                                   atol=1e-3)
+        np.testing.assert_allclose([cos(a) for a in angles], np.cos(angles),
+                                   atol=1e-3)
 
     def test_fastmath_atan2(self):
         """Test fast atan2 function"""
-        # Test some basic cases
-        self.assertAlmostEqual(atan2(1.0, 0.0), math.atan2(1.0, 0.0), places=2)
-        self.assertAlmostEqual(atan2(0.0, 1.0), math.atan2(0.0, 1.0), places=2)
+        import numpy as np
+
+        angles = np.linspace(-math.pi, math.pi, 361)
+        ys, xs = 3.0 * np.sin(angles), 3.0 * np.cos(angles)
+        np.testing.assert_allclose([atan2(y, x) for y, x in zip(ys, xs)],
+                                   np.arctan2(ys, xs), atol=1e-3)
+
+    def test_fastmath_arrays(self):
+        """Test vectorized sine and cosine"""
+        import numpy as np
+        from similar2logo.fastmath import sin_arr, cos_arr
+
+        angles = np.linspace(-2 * math.pi, 2 * math.pi, 1001)
+        out = np.empty_like(angles)
+        self.assertIs(sin_arr(angles, out=out), out)
+        np.testing.assert_allclose(out, np.sin(angles), atol=1e-3)
+        np.testing.assert_allclose(cos_arr(angles), np.cos(angles), atol=1e-3)
 
 
 class TestWebInterface(unittest.TestCase):
@@ -452,6 +1369,355 @@ class TestWebInterface(unittest.TestCase):
         except ImportError:
             self.skipTest("Web dependencies not available")
 
+    def test_set_parameters(self):
+        """Test parameter updates across turtle classes and params objects"""
+        from types import SimpleNamespace
+        try:
+            from similar2logo.web.server import WebSimulation
+        except ImportError:
+            self.skipTest("Web dependencies not available")
+
+        class Walker(Turtle):
+            def __init__(self, **kwargs):
+                super().__init__(**kwargs)
+                self.step_size = 1.0
+
+        class Tuned(Turtle):
+            def __init__(self, **kwargs):
+                super().__init__(**kwargs)
+                self.params = SimpleNamespace(step_size=1.0, gain=2.0)
+
+        sim = LogoSimulation(Environment(10, 10), parallel_backend=None)
+        sim.add_turtles(2, Walker)
+        sim.add_turtles(2, Tuned)
+        sim.environment.params = SimpleNamespace(gain=0.5)
+        web_sim = WebSimulation(sim, update_rate=1)
+
+        updated = web_sim.set_parameters({'step_size': 3.0, 'gain': 4.0,
+                                          'unknown': 1})
+        self.assertEqual(updated, {'step_size': 3.0, 'gain': 4.0})
+        for turtle in sim.turtles:
+            if isinstance(turtle, Walker):
+                self.assertEqual(turtle.step_size, 3.0)
+                self.assertFalse(hasattr(turtle, 'gain'))
+            else:
+                self.assertEqual(vars(turtle.params),
+                                 {'step_size': 3.0, 'gain': 4.0})
+        self.assertEqual(sim.environment.params.gain, 4.0)
+
+    def test_async_simulation_loop(self):
+        """Test that the simulation loop steps in the event loop"""
+        import asyncio
+        import threading
+        try:
+            from similar2logo.web.server import WebSimulation
+        except ImportError:
+            self.skipTest("Web dependencies not available")
+
+        sim = LogoSimulation(Environment(10, 10), num_turtles=3,
+                             parallel_backend=None)
+        web_sim = WebSimulation(sim, update_rate=1000)
+        # Without an event loop the loop waits for the server's startup
+        web_sim.start()
+        self.assertIsNone(web_sim.sim_task)
+        web_sim.stop()
+
+        # Steps are only counted, so no compiled kernel runs in the
+        # step thread
+        threads = []
+        sim.step = lambda: threads.append(threading.get_ident())
+
+        async def run():
+            web_sim.start()
+            while len(threads) < 3:
+                await asyncio.sleep(0.001)
+            web_sim.stop()
+            await web_sim.sim_task
+
+        asyncio.run(asyncio.wait_for(run(), timeout=10))
+        self.assertTrue(web_sim.sim_task.done())
+        self.assertNotIn(threading.get_ident(), threads)
+        self.assertEqual(len(set(threads)), 1)
+
+    def test_loop_deadlines(self):
+        """Test that loop periods include the work and drop missed ticks"""
+        import asyncio
+        import time
+        try:
+            from similar2logo.web.server import WebSimulation
+        except ImportError:
+            self.skipTest("Web dependencies not available")
+
+        web_sim = WebSimulation(LogoSimulation(Environment(10, 10)),
+                                update_rate=50)
+
+        async def run():
+            start = time.monotonic()
+            deadline = await web_sim._tick(start)
+            self.assertEqual(deadline, start + 0.02)
+            self.assertGreater(time.monotonic(), deadline - 0.005)
+            # Late by a second: the next deadline restarts from now
+            late = await web_sim._tick(start - 1.0)
+            self.assertGreater(late, deadline)
+            self.assertLessEqual(late, time.monotonic())
+
+        asyncio.run(run())
+
+    def test_broadcast_frames(self):
+        """Test that each frame is encoded once and sent to every client"""
+        import asyncio
+        import struct
+        try:
+            from similar2logo.web.server import WebSimulation
+        except ImportError:
+            self.skipTest("Web dependencies not available")
+
+        sim = LogoSimulation(Environment(10, 10), num_turtles=3,
+                             parallel_backend=None)
+        web_sim = WebSimulation(sim, update_rate=1000)
+
+        class Client:
+            def __init__(self, frames):
+                self.frames = frames
+                self.sent = []
+
+            async def send_bytes(self, payload):
+                if len(self.sent) == self.frames:
+                    raise ConnectionError
+                self.sent.append(payload)
+
+        clients = [Client(2), Client(3), Client(0)]
+        web_sim.connected_clients = list(clients)
+        calls = []
+        get_state = sim.get_state_arrays
+        sim.get_state_arrays = lambda: calls.append(1) or get_state()
+
+        # The loop ends once every client has failed and been dropped
+        asyncio.run(asyncio.wait_for(web_sim._broadcast_loop(), timeout=10))
+        self.assertEqual(web_sim.connected_clients, [])
+        self.assertEqual(len(calls), 4)
+        self.assertEqual(clients[0].sent, clients[1].sent[:2])
+        self.assertEqual([struct.unpack('<4I', frame[:16])[2]
+                          for frame in clients[1].sent], [3, 0, 0])
+
+    def test_model_listing_cache(self):
+        """Test that model listings and sources are cached per mtime"""
+        import json
+        import tempfile
+        try:
+            from similar2logo.web import models
+        except ImportError:
+            self.skipTest("Web dependencies not available")
+
+        with tempfile.TemporaryDirectory() as examples_dir, \
+                patch.object(models, '_EXAMPLES_DIR', examples_dir):
+            path = os.path.join(examples_dir, 'boids_dsl.py')
+            with open(path, 'w') as f:
+                f.write('first')
+            os.utime(examples_dir, ns=(1, 1))
+            os.utime(path, ns=(1, 1))
+
+            with patch.object(models.os, 'scandir',
+                              wraps=models.os.scandir) as scandir:
+                listing = models.get_available_models()
+                listing[0]['name'] = 'changed'
+                again = models.get_available_models()
+                self.assertEqual(scandir.call_count, 1)
+            self.assertEqual(again[0]['name'], 'Boids (Flocking)')
+            self.assertEqual(again[0]['filepath'], path)
+            self.assertEqual(models._KNOWN_MODELS['boids_dsl.py']['name'],
+                             'Boids (Flocking)')
+            self.assertEqual(models.get_model_code('boids_dsl.py'), 'first')
+            body = models.get_models_json()
+            self.assertIs(models.get_models_json(), body)
+            self.assertEqual(json.loads(body), {'models': again})
+
+            # Adding a file or editing one changes the mtimes
+            with open(os.path.join(examples_dir, 'heatbugs.py'), 'w'):
+                pass
+            with open(path, 'w') as f:
+                f.write('second')
+            os.utime(examples_dir, ns=(2, 2))
+            os.utime(path, ns=(2, 2))
+            self.assertEqual(len(models.get_available_models()), 2)
+            self.assertEqual(len(json.loads(models.get_models_json())['models']),
+                             2)
+            self.assertEqual(models.get_model_code('boids_dsl.py'), 'second')
+            self.assertIsNone(models.get_model_code('missing.py'))
+
+    def test_cpp_engine_state(self):
+        """Test that C++ engine decisions fill the state buffer"""
+        import numpy as np
+        from similar2logo.cpp_engine import CppLogoSimulation
+
+        class Perception:
+            def __init__(self, x, y, heading):
+                self.position = Point2D(x, y)
+                self.heading = heading
+
+            def get_position(self):
+                return self.position
+
+            def get_heading(self):
+                return self.heading
+
+            def get_speed(self):
+                return 1.0
+
+            def get_nearby_arrays(self):
+                return np.empty((0, 2)), np.empty(0), np.empty(0)
+
+            def get_all_pheromones(self):
+                return {}
+
+        class Agent:
+            def decide(self, perception):
+                return []
+
+        # The compiled engine is not needed to drive the callback
+        sim = CppLogoSimulation.__new__(CppLogoSimulation)
+        sim.width, sim.height = 10, 10
+        sim._py_agents = [Agent(), Agent()]
+        sim._state_buffer = np.zeros((2, 3), dtype=np.float32)
+        sim._step = 0
+        for step in range(2):
+            for index in (1, 0):
+                sim._decision_callback(
+                    index, Perception(index + step, 2.0, 0.5 * index), None
+                )
+
+        state = sim.get_state()
+        self.assertEqual(state['step'], 2)
+        self.assertEqual(state['positions'].tolist(), [[1.0, 2.0], [2.0, 2.0]])
+        self.assertEqual(state['headings'].tolist(), [0.0, 0.5])
+
+    def test_cpp_engine_nearby_turtles(self):
+        """Test the nearby_turtles of C++ engine perceptions"""
+        import numpy as np
+        from similar2logo.cpp_engine import _to_py_perception
+
+        class Perception:
+            def get_position(self):
+                return Point2D(0.0, 0.0)
+
+            def get_heading(self):
+                return 0.0
+
+            def get_speed(self):
+                return 1.0
+
+            def get_nearby_arrays(self):
+                return (np.array([[3.0, 4.0], [1.0, 0.0]]),
+                        np.array([0.5, 1.5]), np.array([5.0, 1.0]))
+
+            def get_all_pheromones(self):
+                return {}
+
+        perception = _to_py_perception(Perception())
+        self.assertIn('nearby_turtles', perception)
+        nearby = perception['nearby_turtles']
+        self.assertIs(perception.get('nearby_turtles'), nearby)
+        self.assertEqual([n['distance'] for n in nearby], [5.0, 1.0])
+        self.assertEqual([n['heading'] for n in nearby], [0.5, 1.5])
+        self.assertEqual(nearby[0]['position'].x, 3.0)
+        with self.assertRaises(KeyError):
+            perception['missing']
+
+    def test_state_delta_encoding(self):
+        """Test that only moved turtles are sent after the first frame"""
+        import struct
+        from similar2logo.web.encoding import StateDeltaEncoder
+
+        env = Environment(10, 10)
+        sim = LogoSimulation(env, num_turtles=3, parallel_backend=None)
+        encoder = StateDeltaEncoder()
+
+        keyframe = encoder.encode(sim.get_state())
+        self.assertEqual(struct.unpack('<4I', keyframe[:16])[:3], (0, 3, 3))
+
+        delta = encoder.encode(sim.get_state())
+        self.assertEqual(struct.unpack('<4I', delta[:16])[:3], (0, 3, 0))
+
+    def test_state_delta_keyframes(self):
+        """Test periodic keyframes, slow drift and unchanged grids"""
+        import json
+        import struct
+        import numpy as np
+        from similar2logo.web.encoding import StateDeltaEncoder
+
+        encoder = StateDeltaEncoder(epsilon=0.1, keyframe_interval=5)
+        positions = np.zeros((2, 2))
+        grid = np.zeros((3, 4), dtype=np.float32)
+
+        def encode():
+            frame = encoder.encode({
+                'step': 0,
+                'positions': positions, 'headings': np.zeros(2),
+                'pheromones': {'food': grid},
+            })
+            _, _, changed, length = struct.unpack('<4I', frame[:16])
+            body = 16 + 16 * changed
+            meta = json.loads(frame[body:body + length])
+            return changed, meta['keyframe'], meta['pheromone_grids']
+
+        self.assertEqual(encode(), (2, True, [['food', 3, 4]]))
+        # Turtle 0 drifts by less than epsilon per frame
+        sent = []
+        for _ in range(3):
+            positions[0, 0] += 0.06
+            sent.append(encode())
+        self.assertEqual(sent, [(0, False, []), (1, False, []), (0, False, [])])
+
+        grid[1, 2] = 1.0
+        self.assertEqual(encode(), (0, False, [['food', 3, 4]]))
+        self.assertEqual(encode(), (2, True, [['food', 3, 4]]))
+
+    def test_state_arrays_encoding(self):
+        """Test that array-backed states match the dict states"""
+        import json
+        import struct
+        import numpy as np
+        from similar2logo.web.encoding import StateDeltaEncoder
+
+        env = Environment(10, 10)
+        env.add_pheromone("food", diffusion_coef=0.1, evaporation_coef=0.01)
+        sim = LogoSimulation(env, num_turtles=3, parallel_backend=None)
+
+        arrays = sim.get_state_arrays()
+        state = sim.get_state()
+        self.assertEqual(arrays['positions'].shape, (3, 2))
+        self.assertEqual(arrays['positions'].tolist(),
+                         [t['position'] for t in state['turtles']])
+        self.assertEqual(arrays['headings'].tolist(),
+                         [t['heading'] for t in state['turtles']])
+        def decode(frame):
+            # Turtle rows, then the JSON trailer with the binary grids
+            # put back in place
+            _, _, changed, length = struct.unpack('<4I', frame[:16])
+            body = 16 + 16 * changed
+            meta = json.loads(frame[body:body + length])
+            offset = body + length
+            for pid, rows, cols in meta.pop('pheromone_grids', []):
+                grid = np.frombuffer(frame, '<f4', rows * cols, offset)
+                meta['pheromones'][pid] = grid.reshape(rows, cols).tolist()
+                offset += 4 * rows * cols
+            self.assertEqual(offset, len(frame))
+            self.assertEqual(length % 4, 0)
+            return frame[:12], frame[16:body], meta
+
+        frame = StateDeltaEncoder().encode(arrays)
+        expected = StateDeltaEncoder().encode(state)
+        self.assertEqual(decode(frame), decode(expected))
+        self.assertIn(b'"pheromone_grids":[["food",10,10]]', frame)
+
+
+class _GridReader(Turtle):
+    """Turtle turning by the first value of its 'grid' perception"""
+
+    def decide(self, perception):
+        time.sleep(0.001)
+        return [self.influence_turn(float(perception['grid'][0]))]
+
 
 class TestIntegration(unittest.TestCase):
     """Test integration between components"""
@@ -485,6 +1751,524 @@ class TestIntegration(unittest.TestCase):
         for turtle in sim.turtles:
             self.assertNotEqual(turtle.position.x, 50.0)  # Should have moved
 
+    def test_state_arrays(self):
+        """Test the structure-of-arrays mirror of the turtle state"""
+        env = Environment(50, 50)
+        sim = LogoSimulation(env, num_turtles=4, parallel_backend=None)
+        sim.step()
+
+        arrays = sim.state_arrays(refresh=True)
+        self.assertEqual(set(arrays), {'x', 'y', 'heading', 'speed'})
+        for i, turtle in enumerate(sim.turtles):
+            self.assertAlmostEqual(arrays['x'][i], turtle.position.x, places=4)
+            self.assertAlmostEqual(arrays['y'][i], turtle.position.y, places=4)
+            self.assertAlmostEqual(arrays['heading'][i], turtle.heading, places=5)
+
+    def test_step_reads_positions_once(self):
+        """Test that the spatial index is built from the state arrays"""
+        import numpy as np
+        env = Environment(50, 50)
+        sim = LogoSimulation(env, num_turtles=30, parallel_backend=None)
+        start = [(t.position.x, t.position.y) for t in sim.turtles]
+        with patch.object(sim.spatial_index, 'rebuild') as rebuild:
+            sim.step()
+        rebuild.assert_not_called()
+
+        xs, ys = sim._positions
+        self.assertEqual(list(zip(xs.tolist(), ys.tolist())), start)
+        np.testing.assert_array_equal(sim.xs, xs.astype(np.float32))
+        expected = SpatialHashGrid(sim.perception_radius, 50, 50)
+        for turtle, (x, y) in zip(sim.turtles, start):
+            expected.insert(turtle, x, y)
+        self.assertEqual(sim.spatial_index.cells, expected.cells)
+
+    def test_heading_trig(self):
+        """Test the cached sine and cosine of turtle headings"""
+        turtle = Turtle(position=Point2D(5.0, 5.0), heading=0.5)
+        move = turtle.influence_move_forward(2.0)
+        self.assertAlmostEqual(move.dx, 2.0 * math.sin(0.5))
+        turtle.heading = 1.5
+        move = turtle.influence_move_forward(2.0)
+        self.assertAlmostEqual(move.dy, -2.0 * math.cos(1.5))
+
+        sim = LogoSimulation(Environment(20, 20), num_turtles=3,
+                             parallel_backend=None)
+        sin_h, cos_h = sim.heading_trig(refresh=True)
+        for i, t in enumerate(sim.turtles):
+            self.assertAlmostEqual(sin_h[i], math.sin(t.heading), places=5)
+            self.assertAlmostEqual(cos_h[i], math.cos(t.heading), places=5)
+
+    def test_step_vectorized(self):
+        """Test the fused step against the influence/reaction step"""
+        import copy
+        import numpy as np
+        from similar2logo.parallel import create_executor
+
+        class Steady(Turtle):
+            VECTORIZED_DECIDE = True
+
+            @staticmethod
+            def decide_kernel(xs, ys, headings, speeds, pheromone, seed,
+                              out_dh, out_ds, out_dx, out_dy):
+                out_dx[:] = np.sin(headings) * speeds
+                out_dy[:] = -np.cos(headings) * speeds
+                out_dh[:] = 0.4
+                out_ds[:] = -0.1
+
+            def decide(self, perception):
+                return [self.influence_move_forward(self.speed),
+                        self.influence_turn(0.4),
+                        self.influence_change_speed(-0.1)]
+
+        class Ranged(Steady):
+            decide_kernel = None
+
+            @staticmethod
+            def decide_compiled(start, stop, xs, ys, headings, speeds,
+                                pheromone, seed, out_dh, out_ds, out_dx,
+                                out_dy):
+                rows = slice(start, stop)
+                Steady.decide_kernel(xs[rows], ys[rows], headings[rows],
+                                     speeds[rows], pheromone, seed,
+                                     out_dh[rows], out_ds[rows],
+                                     out_dx[rows], out_dy[rows])
+
+        class Custom(Steady):
+            def decide(self, perception):
+                return [self.influence_turn(1.0)]
+
+        for toroidal in (True, False):
+            env = Environment(30, 30, toroidal=toroidal)
+            sim = LogoSimulation(env, num_turtles=50, turtle_class=Steady,
+                                 parallel_backend=None)
+            fused = copy.deepcopy(sim)
+            self.assertIsNotNone(fused._vectorized_decide_kernel())
+            for _ in range(5):
+                sim.step()
+                fused.step_vectorized()
+            self.assertEqual(fused.current_step, 5)
+            for a, b in zip(sim.turtles, fused.turtles):
+                self.assertAlmostEqual(a.position.x, b.position.x)
+                self.assertAlmostEqual(a.position.y, b.position.y)
+                self.assertAlmostEqual(a.heading, b.heading)
+                self.assertAlmostEqual(a.speed, b.speed)
+
+        # Range kernels split across the worker threads
+        env = Environment(30, 30, toroidal=True)
+        sim = LogoSimulation(env, num_turtles=50, turtle_class=Ranged,
+                             parallel_backend=None)
+        threaded = copy.deepcopy(sim)
+        threaded._executor = create_executor('thread', num_workers=2,
+                                             parallel_threshold=8)
+        try:
+            for _ in range(3):
+                sim.step()
+                threaded.step_vectorized()
+        finally:
+            threaded._executor.shutdown()
+        for a, b in zip(sim.turtles, threaded.turtles):
+            self.assertAlmostEqual(a.position.x, b.position.x)
+            self.assertAlmostEqual(a.heading, b.heading)
+
+        # A subclass overriding decide() without a kernel is not fused
+        sim = LogoSimulation(Environment(30, 30), num_turtles=5,
+                             turtle_class=Custom, parallel_backend=None)
+        self.assertIsNone(sim._vectorized_decide_kernel())
+        headings = [t.heading for t in sim.turtles]
+        sim.step_vectorized()
+        for turtle, heading in zip(sim.turtles, headings):
+            self.assertAlmostEqual(turtle.heading,
+                                   MathUtil.normalize_angle(heading + 1.0))
+
+    def test_chunked_decisions(self):
+        """Test that threaded decisions are batched per chunk of turtles"""
+        from similar2logo.parallel import ThreadedDecisionExecutor
+
+        class Mover(Turtle):
+            def decide(self, perception):
+                return [self.influence_move_forward(perception['step'])]
+
+        turtles = [Mover() for _ in range(200)]
+        perceptions = {turtle: {'step': i} for i, turtle in enumerate(turtles)}
+        executor = ThreadedDecisionExecutor(num_workers=2,
+                                            parallel_threshold=16,
+                                            io_bound=True)
+        try:
+            chunks = executor.map_decisions(turtles, perceptions)
+            self.assertEqual(len(chunks), 8)
+            moves = [move for chunk in chunks for move in chunk]
+            self.assertEqual([move.agent for move in moves], turtles)
+
+            # Below the threshold everything runs as one chunk
+            chunks = executor.map_decisions(turtles[:10], perceptions)
+            self.assertEqual(len(chunks), 1)
+        finally:
+            executor.shutdown()
+
+    def test_process_decisions_refer_to_parent_turtles(self):
+        """Test that worker influences are mapped back to the turtles"""
+        import copy
+        from similar2logo.parallel import (_attach_chunk,
+                                           _decide_chunk_detached)
+
+        class Sleeper(Turtle):
+            def decide(self, perception):
+                return [self.influence_turn(0.5)], 7
+
+        turtles = [Sleeper() for _ in range(3)]
+        # The worker decides on copies of the turtles
+        result = _decide_chunk_detached((copy.deepcopy(turtles), [{}] * 3))
+        for influence in result[0]:
+            self.assertIsNone(influence.agent)
+
+        influences = _attach_chunk(turtles, result)
+        self.assertEqual([i.agent for i in influences], turtles)
+        self.assertEqual([i.source_agent for i in influences], turtles)
+        self.assertEqual([t.next_wake_step for t in turtles], [7, 7, 7])
+
+    def test_process_tasks_share_arrays(self):
+        """Test that task arrays are placed once in shared memory"""
+        import numpy as np
+        from similar2logo import parallel
+        from similar2logo.parallel import ProcessDecisionExecutor
+
+        if parallel.shared_memory is None:
+            self.skipTest("multiprocessing.shared_memory is not available")
+        grid = np.arange(1000.0)
+        tasks = [([Turtle()], [{'grid': grid}]) for _ in range(3)]
+        executor = ProcessDecisionExecutor(num_workers=1)
+        try:
+            packed = executor._pack_tasks(tasks)
+            self.assertEqual(len({spans[0] for _, _, spans in packed}), 1)
+            self.assertEqual(packed[0][2], [(0, grid.nbytes)])
+
+            # What a worker sees: a read-only view of the block
+            shm = parallel._open_shared(packed[0][1])
+            try:
+                view = shm.buf.toreadonly()
+                task = parallel.pickle.loads(packed[1][0],
+                                             buffers=[view[:grid.nbytes]])
+                shared = task[1][0]['grid']
+                np.testing.assert_array_equal(shared, grid)
+                self.assertFalse(shared.flags.writeable)
+                del task, shared, view
+            finally:
+                shm.close()
+        finally:
+            executor.shutdown()
+        self.assertIsNone(executor._shared)
+
+    def test_environment_pickle_skips_scratch(self):
+        """Test that diffusion scratch grids are not pickled"""
+        import pickle
+        import numpy as np
+
+        env = Environment(8, 6, toroidal=True)
+        env.add_pheromone("trail", diffusion_coef=0.5)
+        env.pheromone_grids["trail"][2, 3] = 8.0
+        env.diffuse_and_evaporate()
+        self.assertTrue(env._pheromone_scratch)
+
+        copy = pickle.loads(pickle.dumps(env))
+        self.assertEqual(copy._pheromone_scratch, {})
+        self.assertIsNone(copy._pheromone_halo)
+        np.testing.assert_array_equal(copy.pheromone_grids["trail"],
+                                      env.pheromone_grids["trail"])
+        # The copy still diffuses
+        copy.diffuse_and_evaporate()
+        env.diffuse_and_evaporate()
+        np.testing.assert_array_equal(copy.pheromone_grids["trail"],
+                                      env.pheromone_grids["trail"])
+
+    def test_process_workers_recycled(self):
+        """Test that the worker pool is replaced after enough tasks"""
+        from similar2logo.parallel import ProcessDecisionExecutor
+
+        executor = ProcessDecisionExecutor(num_workers=2,
+                                           max_tasks_per_child=3)
+        try:
+            pool = executor.executor
+            executor._maybe_recycle(4)
+            executor._maybe_recycle(2)
+            self.assertIs(executor.executor, pool)
+            executor._maybe_recycle(1)
+            self.assertIsNot(executor.executor, pool)
+            self.assertEqual(executor._tasks_sent, 1)
+        finally:
+            executor.shutdown()
+
+    def test_python_decisions_stay_in_calling_thread(self):
+        """Test that threads are not used for decide() written in Python"""
+        import threading
+        from similar2logo.parallel import ThreadedDecisionExecutor
+
+        threads = set()
+
+        class Mover(Turtle):
+            def decide(self, perception):
+                threads.add(threading.get_ident())
+                return [self.influence_move_forward(1.0)]
+
+        turtles = [Mover() for _ in range(200)]
+        executor = ThreadedDecisionExecutor(num_workers=2,
+                                            parallel_threshold=16)
+        try:
+            chunks = executor.map_decisions(turtles, [{}] * len(turtles))
+            self.assertEqual(len(chunks), 1)
+            self.assertEqual(len(chunks[0]), 200)
+            self.assertEqual(threads, {threading.get_ident()})
+        finally:
+            executor.shutdown()
+
+    def test_executor_cache(self):
+        """Test create_executor reuses executors until they are shut down"""
+        from similar2logo.parallel import create_executor, reset_executors
+
+        executor = create_executor('thread', num_workers=2)
+        self.assertIs(create_executor('thread', num_workers=2), executor)
+        self.assertIsNot(create_executor('thread', num_workers=3), executor)
+
+        executor.shutdown()
+        replacement = create_executor('thread', num_workers=2)
+        self.assertIsNot(replacement, executor)
+
+        reset_executors()
+        self.assertIsNot(create_executor('thread', num_workers=2), replacement)
+        reset_executors()
+
+    def test_process_backend_exits(self):
+        """Test a process-backend run exits after its compiled kernels ran"""
+        import subprocess
+        import tempfile
+
+        code = (
+            "from similar2logo.environment import Environment\n"
+            "from similar2logo.model import LogoSimulation\n"
+            "if __name__ == '__main__':\n"
+            "    sim = LogoSimulation(Environment(50, 50, toroidal=True),\n"
+            "                         num_turtles=300,\n"
+            "                         parallel_backend='process',\n"
+            "                         num_workers=2)\n"
+            "    for _ in range(3):\n"
+            "        sim.step()\n"
+            "    print('ok')\n"
+        )
+        python_dir = os.path.join(os.path.dirname(__file__), '..', '..',
+                                  'python')
+        env = dict(os.environ, PYTHONPATH=python_dir)
+        with tempfile.TemporaryDirectory() as directory:
+            script = os.path.join(directory, 'run.py')
+            with open(script, 'w') as f:
+                f.write(code)
+            try:
+                result = subprocess.run([sys.executable, script], env=env,
+                                        capture_output=True, text=True,
+                                        timeout=120)
+            except subprocess.TimeoutExpired:
+                self.fail("the simulation did not exit")
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), 'ok')
+
+    def test_shared_process_executor(self):
+        """Test two simulations deciding at once through one executor"""
+        import threading
+        import numpy as np
+        from concurrent.futures import ThreadPoolExecutor
+        from similar2logo import parallel
+        from similar2logo.parallel import reset_executors
+
+        if parallel.shared_memory is None:
+            self.skipTest("multiprocessing.shared_memory is not available")
+
+        first = LogoSimulation(Environment(10, 10), num_turtles=0,
+                               parallel_backend='process', num_workers=2)
+        second = LogoSimulation(Environment(10, 10), num_turtles=0,
+                                parallel_backend='process', num_workers=2)
+        executor = first._executor
+        self.assertIs(second._executor, executor)
+        # Workers in this process stand in for the worker processes
+        executor.executor = ThreadPoolExecutor(max_workers=2)
+        executor.parallel_threshold = 1
+        results = {}
+
+        def decide(name, value):
+            grid = np.full(100, value)
+            turtles = [_GridReader() for _ in range(8)]
+            headings = set()
+            for _ in range(5):
+                chunks = executor.map_decisions(
+                    turtles, [{'grid': grid}] * len(turtles))
+                headings.update(influence.delta_heading
+                                for chunk in chunks for influence in chunk)
+            results[name] = headings
+
+        try:
+            threads = [threading.Thread(target=decide, args=(name, value))
+                       for name, value in (('first', 1.0), ('second', 2.0))]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            reset_executors()
+            for shm in parallel._worker_shared.values():
+                shm.close()
+            parallel._worker_shared.clear()
+        self.assertEqual(results, {'first': {1.0}, 'second': {2.0}})
+
+    def test_perception(self):
+        """Test the slotted perception keeps the dictionary interface"""
+        from similar2logo.model import Perception
+        env = Environment(20, 20)
+        sim = LogoSimulation(env, num_turtles=0, parallel_backend=None)
+        a = Turtle(position=Point2D(5.0, 5.0))
+        b = Turtle(position=Point2D(6.0, 5.0))
+        sim.turtles.extend((a, b))
+        sim.spatial_index.rebuild(sim.turtles)
+
+        perception = sim._build_perception(a)
+        self.assertIsInstance(perception, Perception)
+        self.assertEqual(perception['position'], a.position)
+        self.assertEqual(perception.nearby_agents, [b])
+        self.assertAlmostEqual(perception['nearby_turtles'][0]['distance'], 1.0)
+        self.assertEqual(perception['nearby_positions'].tolist(), [[6.0, 5.0]])
+        self.assertIn('marks', perception)
+        self.assertNotIn('influence_buffer', perception)
+        self.assertIsNone(perception.get('custom'))
+        perception['custom'] = 1
+        self.assertEqual(perception['custom'], 1)
+
+        # The same object is refilled at the next build
+        b.position = Point2D(15.0, 15.0)
+        sim.spatial_index.rebuild(sim.turtles)
+        self.assertIs(sim._build_perception(a), perception)
+        self.assertEqual(perception['nearby_turtles'], [])
+        # Keys added by decide() do not carry over to the next step
+        self.assertNotIn('custom', perception)
+        self.assertEqual(list(perception), [k for k in Perception.FIELDS
+                                            if k in perception])
+
+    def test_turtle_indices(self):
+        """Test that turtles keep their index in the turtle list"""
+        from similar2logo.influences import (
+            SystemInfluenceAddAgent, SystemInfluenceRemoveAgent
+        )
+        env = Environment(20, 20)
+        sim = LogoSimulation(env, num_turtles=4, parallel_backend=None)
+        a, b, c, d = sim.turtles
+        self.assertEqual([t._idx for t in sim.turtles], [0, 1, 2, 3])
+
+        # The last turtle is swapped into the slot of a removed one
+        e = Turtle()
+        sim.reaction_model.make_system_reaction(
+            0, 1, env,
+            [SystemInfluenceRemoveAgent(b), SystemInfluenceAddAgent(e),
+             SystemInfluenceAddAgent(e)],
+            sim.turtles
+        )
+        self.assertEqual(sim.turtles, [a, d, c, e])
+        self.assertEqual([t._idx for t in sim.turtles], [0, 1, 2, 3])
+        self.assertEqual(b._idx, -1)
+
+        sim.step()
+        self.assertEqual(len(sim._perceptions), 0)
+
+    def test_sleeping_turtles(self):
+        """Test that turtles can skip their decisions until a wake step"""
+        calls = []
+
+        class Sleeper(Turtle):
+            def decide(self, perception):
+                calls.append(perception['time'])
+                return [self.influence_turn(0.1)], perception['time'] + 3
+
+        for backend in (None, 'thread'):
+            calls.clear()
+            env = Environment(20, 20)
+            sim = LogoSimulation(env, num_turtles=0, parallel_backend=backend)
+            sleeper = Sleeper()
+            sim.turtles.extend([sleeper, Turtle()])
+            for _ in range(7):
+                sim.step()
+            self.assertEqual(calls, [0, 3, 6])
+            self.assertEqual(sleeper.next_wake_step, 9)
+            self.assertAlmostEqual(sleeper.heading, 0.3)
+
+    def test_seeded_placement(self):
+        """Test that random.seed makes bulk turtle placement reproducible"""
+        import random
+
+        placements = []
+        for _ in range(2):
+            random.seed(0)
+            sim = LogoSimulation(Environment(50, 50, True), num_turtles=3,
+                                 parallel_backend=None)
+            placements.append([(t.position.x, t.position.y, t.heading)
+                               for t in sim.turtles])
+        self.assertEqual(placements[0], placements[1])
+
+    def test_cached_influences_not_pooled(self):
+        """Test that influences built by a turtle and kept are not recycled"""
+        class Keeper(Turtle):
+            def decide(self, perception):
+                if not hasattr(self, '_turn'):
+                    self._turn = ChangeDirection(self, 0.1)
+                return [self._turn]
+
+        class Turner(Turtle):
+            def decide(self, perception):
+                return [self.influence_turn(0.2)]
+
+        sim = LogoSimulation(Environment(20, 20), num_turtles=0,
+                             parallel_backend=None)
+        keeper = Keeper()
+        turners = [Turner() for _ in range(3)]
+        sim.turtles.extend([keeper] + turners)
+        for _ in range(3):
+            sim.step()
+        self.assertIs(keeper._turn.agent, keeper)
+        self.assertAlmostEqual(keeper.heading, 0.3)
+        for turner in turners:
+            self.assertAlmostEqual(turner.heading, 0.6)
+
+    def test_sleep_decision_wake_steps(self):
+        """Test which decide() results count as (influences, wake step)"""
+        import numpy as np
+        from similar2logo.model import sleep_decision
+
+        turtle = Turtle()
+        turn = turtle.influence_turn(0.1)
+        self.assertEqual(sleep_decision(turtle, ([turn], np.int64(5))), [turn])
+        self.assertEqual(turtle.next_wake_step, 5)
+        self.assertIs(type(turtle.next_wake_step), int)
+        # A bool is not a wake step
+        decided = ([turn], True)
+        self.assertIs(sleep_decision(turtle, decided), decided)
+        self.assertEqual(turtle.next_wake_step, 5)
+
+    def test_pheromone_samples(self):
+        """Test that batch-sampled pheromones match per-turtle lookups"""
+        import numpy as np
+        for toroidal in (False, True):
+            env = Environment(8, 6, toroidal=toroidal)
+            env.add_pheromone("food")
+            env.pheromone_grids["food"][:] = np.arange(48).reshape(6, 8)
+            sim = LogoSimulation(env, num_turtles=0, parallel_backend=None)
+            sim.turtles.extend(
+                Turtle(position=Point2D(x, y))
+                for x, y in [(0.2, 0.9), (7.9, 5.5), (3.5, 2.0), (8.0, 6.0)]
+            )
+            sim.spatial_index.rebuild(sim.turtles)
+            sim._query_all_neighbors()
+            sim._sample_pheromones()
+            self.assertIsNotNone(sim._pheromone_samples)
+            for index, turtle in enumerate(sim.turtles):
+                x, y = int(turtle.position.x), int(turtle.position.y)
+                self.assertEqual(
+                    sim._build_perception(turtle, index)['pheromones'],
+                    {"food": env.get_pheromone_value(x, y, "food")}
+                )
+
     def test_cpp_bindings_integration(self):
         """Test C++ bindings integration"""
         print(f"C++ Core available: {HAS_CPP_CORE}")